@@ -22,6 +22,9 @@ from app.services.chat_service import (
 )
 from app.middleware import global_limiter
 
+# StarCraft 2 Editor AI imports
+from sc2editor.llm import SC2EditorLLM
+
 
 api_limit = get_settings().fastapi.api_limit
 
@@ -39,6 +42,7 @@ async def stream_chat(
     conversations: Annotated[
         dict[str, list[Any]], Depends(Provide[Container.conversations])
     ],
+    llm: Annotated[SC2EditorLLM, Depends(Provide[Container.llm])],
 ):
     """
     Stream chat response using Gemini
@@ -49,9 +53,18 @@ async def stream_chat(
         response: FastAPI Response object to set headers and manage streaming
         app_logging: Application logging instance
         conversations: Dictionary of all conversations from all clients
+        llm: SC2EditorLLM instance for handling LLM operations
     """
     logger = app_logging.logger
 
+    # Oversized prompts are rejected before they are stored or reach any LLM call
+    if llm.exceeds_prompt_limit(body.message):
+        logger.warning("Rejected a prompt that exceeds the prompt token limit")
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"The prompt exceeds the limit of {llm.max_prompt_tokens} estimated tokens.",
+        )
+
     # Generate conversation ID if not provided
     conversation_id = body.conversation_id or str(uuid.uuid4())
 
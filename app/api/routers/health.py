@@ -47,6 +47,7 @@ async def health_check(
             "gemini_llm": "connected" if llm else "disconnected",
         },
         "active_conversations": len(conversations),
+        "llm_metrics": llm.get_metrics(),
     }
 
     return health_status
@@ -17,6 +17,8 @@ from config import get_settings
 
 # LLM related
 from sc2editor.llm import SC2EditorLLM
+from sc2editor.llm.neo4j_pool import Neo4jConnectionPool
+from sc2editor.llm.gemini_pool import GeminiClientPool
 
 
 class Container(containers.DeclarativeContainer):
@@ -47,6 +49,28 @@ class Container(containers.DeclarativeContainer):
 
     # Configuration provider
     config = providers.Configuration(pydantic_settings=[get_settings()])
+    # Neo4j connection pool provider, shared by graph and vector retrieval
+    neo4j_pool = providers.Singleton(
+        Neo4jConnectionPool,
+        uri=config.neo4j_uri.provided,
+        username=config.neo4j_username.provided,
+        password=config.neo4j_password.provided,
+        max_connection_pool_size=config.neo4j.max_connection_pool_size.provided,
+        connection_acquisition_timeout=config.neo4j.connection_acquisition_timeout.provided,
+        max_connection_lifetime=config.neo4j.max_connection_lifetime.provided,
+        connection_timeout=config.neo4j.connection_timeout.provided,
+        liveness_check_timeout=config.neo4j.liveness_check_timeout.provided,
+        keep_alive=config.neo4j.keep_alive.provided,
+    )
+    # Gemini API client pool provider, shared by every chat model and the embeddings
+    gemini_pool = providers.Singleton(
+        GeminiClientPool,
+        api_key=config.google_api_key.provided,
+        max_connections=config.gemini.max_connections.provided,
+        keepalive_time=config.gemini.keepalive_time.provided,
+        keepalive_timeout=config.gemini.keepalive_timeout.provided,
+    )
+
     # LLM provider
     llm = providers.Singleton(
         SC2EditorLLM,
@@ -55,9 +79,71 @@ class Container(containers.DeclarativeContainer):
         neo4j_password=config.neo4j_password.provided,
         model=config.llm.model.provided,
         embedding=config.llm.embedding.provided,
+        embedding_cache_enabled=config.llm.embedding_cache_enabled.provided,
+        embedding_cache_dir=config.llm.embedding_cache_dir.provided,
+        embedding_cache_max_entries=config.llm.embedding_cache_max_entries.provided,
+        local_vector_index_enabled=config.llm.local_vector_index_enabled.provided,
+        local_vector_index_snapshot=config.llm.local_vector_index_snapshot.provided,
+        local_vector_index_dir=config.llm.local_vector_index_dir.provided,
+        local_vector_index_precision=config.llm.local_vector_index_precision.provided,
+        local_vector_index_dimensions=config.llm.local_vector_index_dimensions.provided,
+        local_vector_index_rescore_factor=config.llm.local_vector_index_rescore_factor.provided,
+        local_vector_index_search_type=config.llm.local_vector_index_search_type.provided,
+        local_vector_index_rrf_k=config.llm.local_vector_index_rrf_k.provided,
+        local_vector_index_vector_weight=config.llm.local_vector_index_vector_weight.provided,
+        local_vector_index_keyword_weight=config.llm.local_vector_index_keyword_weight.provided,
         maximum_information_acquisition_rate=config.llm.maximum_information_acquisition_rate.provided,
         maximum_retriever_attempts=config.llm.maximum_retriever_attempts.provided,
         timeout=config.llm.timeout.provided,
+        front_end_mode=config.llm.front_end_mode.provided,
+        entity_extraction_mode=config.llm.entity_extraction_mode.provided,
+        context_judgment_mode=config.llm.context_judgment_mode.provided,
+        speculative_vector_search=config.llm.speculative_vector_search.provided,
+        graph_retrieval_timeout=config.llm.graph_retrieval_timeout.provided,
+        vector_retrieval_timeout=config.llm.vector_retrieval_timeout.provided,
+        graph_retrieval_mode=config.llm.graph_retrieval_mode.provided,
+        graph_context_token_budget=config.llm.graph_context_token_budget.provided,
+        graph_candidate_limit=config.llm.graph_candidate_limit.provided,
+        graph_edge_type_priority=config.llm.graph_edge_type_priority.provided,
+        graph_snapshot_enabled=config.llm.graph_snapshot_enabled.provided,
+        graph_snapshot_hops=config.llm.graph_snapshot_hops.provided,
+        graph_query_cache_enabled=config.llm.graph_query_cache_enabled.provided,
+        graph_query_cache_max_entries=config.llm.graph_query_cache_max_entries.provided,
+        graph_query_cache_ttl=config.llm.graph_query_cache_ttl.provided,
+        vector_retrieval_mode=config.llm.vector_retrieval_mode.provided,
+        vector_candidate_k=config.llm.vector_candidate_k.provided,
+        vector_score_threshold=config.llm.vector_score_threshold.provided,
+        vector_score_gap=config.llm.vector_score_gap.provided,
+        vector_context_token_budget=config.llm.vector_context_token_budget.provided,
+        reranker_enabled=config.llm.reranker_enabled.provided,
+        reranker_token_budget=config.llm.reranker_token_budget.provided,
+        reranker_embedding_weight=config.llm.reranker_embedding_weight.provided,
+        context_cleanup_skip_tokens=config.llm.context_cleanup_skip_tokens.provided,
+        graph_query_backend=config.llm.graph_query_backend.provided,
+        graph_query_concurrency=config.llm.graph_query_concurrency.provided,
+        answer_cache_enabled=config.llm.answer_cache_enabled.provided,
+        answer_cache_similarity_threshold=config.llm.answer_cache_similarity_threshold.provided,
+        answer_cache_max_entries=config.llm.answer_cache_max_entries.provided,
+        answer_cache_ttl=config.llm.answer_cache_ttl.provided,
+        answer_cache_history_turns=config.llm.answer_cache_history_turns.provided,
+        answer_cache_embedding_timeout=config.llm.answer_cache_embedding_timeout.provided,
+        graph_version_check_interval=config.llm.graph_version_check_interval.provided,
+        graph_statistics_cache_enabled=config.llm.graph_statistics_cache_enabled.provided,
+        graph_statistics_file=config.llm.graph_statistics_file.provided,
+        vector_index_embedding_check=config.llm.vector_index_embedding_check.provided,
+        checkpointer_mode=config.llm.checkpointer_mode.provided,
+        checkpointer_max_threads=config.llm.checkpointer_max_threads.provided,
+        history_token_budget=config.llm.history_token_budget.provided,
+        history_summary_cache_max_entries=config.llm.history_summary_cache_max_entries.provided,
+        history_node_token_budgets=config.llm.history_node_token_budgets.provided,
+        max_prompt_tokens=config.llm.max_prompt_tokens.provided,
+        max_history_message_tokens=config.llm.max_history_message_tokens.provided,
+        node_models=config.llm.node_models.provided,
+        node_timeouts=config.llm.node_timeouts.provided,
+        neo4j_pool=neo4j_pool,
+        gemini_pool=gemini_pool,
+        # Initialized in the lifespan of the application so that startup does not block the event loop
+        auto_initialize=False,
     )
 
     # Conversations storage provider
@@ -31,6 +31,8 @@ from app.middleware import SecurityHeadersMiddleware, global_limiter
 
 # StarCraft 2 Editor AI imports
 from sc2editor.llm import SC2EditorLLM
+from sc2editor.llm.neo4j_pool import Neo4jConnectionPool
+from sc2editor.llm.gemini_pool import GeminiClientPool
 
 
 @asynccontextmanager
@@ -39,6 +41,8 @@ async def lifespan(
     app: FastAPI,
     app_logging: ApplicationLogging = Provide[Container.app_logging],
     llm: SC2EditorLLM = Provide[Container.llm],
+    neo4j_pool: Neo4jConnectionPool = Provide[Container.neo4j_pool],
+    gemini_pool: GeminiClientPool = Provide[Container.gemini_pool],
 ):
     """
     Startup and shutdown events
@@ -47,12 +51,17 @@ async def lifespan(
         app: FastAPI application instance
         app_logging: Application logging instance
         llm: SC2EditorLLM instance for handling LLM operations
+        neo4j_pool: Neo4j connection pool shared by the LLM components
+        gemini_pool: Gemini API client pool shared by the chat models and the embeddings
     """
 
     logger = app_logging.logger
     # Startup
     logger.info("Starting StarCraft 2 Editor AI Backend...")
 
+    await llm.ainitialize()
+    logger.info("Initialized SC2EditorLLM resources.")
+
     # Start background cleanup task
     cleanup_task = asyncio.create_task(cleanup_old_conversations())
     logger.info("Background cleanup task started")
@@ -60,7 +69,9 @@ async def lifespan(
     yield
 
     # Shutdown
-    llm.close()
+    await llm.aclose()
+    await neo4j_pool.aclose()
+    await gemini_pool.aclose()
     logger.info("Closed SC2EditorLLM resources.")
     logger.info("Shutting down StarCraft 2 Editor AI Backend...")
 
@@ -237,7 +237,9 @@ async def generate_streaming_response(
 
     finally:
         # Graph State initialization
-        if llm.checkpointer.get({"configurable": {"thread_id": conversation_id}}):
+        if llm.checkpointer is not None and llm.checkpointer.get(
+            {"configurable": {"thread_id": conversation_id}}
+        ):
             llm.delete_thread_id(conversation_id)
             logger.info(
                 f"LangGraph State of Conversation ID {conversation_id} has been initialized."
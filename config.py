@@ -1,10 +1,11 @@
 # Python Standard Library imports
-from typing import Union
+from typing import Literal, Union
+from pathlib import Path
 from functools import lru_cache
 
 # Third-party Library imports
 from dotenv import load_dotenv
-from pydantic import BaseModel, Field, IPvAnyAddress
+from pydantic import BaseModel, Field, IPvAnyAddress, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Custom Library imports
@@ -18,6 +19,62 @@ class LLMConfig(BaseModel):
     embedding: str = Field(
         default="models/text-embedding-004", description="Gemini Embedding Model"
     )
+    embedding_cache_enabled: bool = Field(
+        default=False,
+        description="Whether to keep query and document embeddings in a persistent on-disk cache",
+    )
+    embedding_cache_dir: Path = Field(
+        default=Path("cache/embeddings"),
+        description="Directory of the embedding cache. Relative paths are relative to the project root",
+    )
+    embedding_cache_max_entries: int = Field(
+        default=20000, ge=1, description="Maximum number of cached embeddings"
+    )
+    local_vector_index_enabled: bool = Field(
+        default=False,
+        description="Whether to answer vector searches from an in-process index of the Document embeddings instead of Neo4j",
+    )
+    local_vector_index_snapshot: bool = Field(
+        default=True,
+        description="Whether to save the local vector index to a snapshot file and memory-map it on the next start",
+    )
+    local_vector_index_dir: Path = Field(
+        default=Path("cache/vector_index"),
+        description="Directory of the local vector index snapshot. Relative paths are relative to the project root",
+    )
+    local_vector_index_precision: Literal["float32", "float16", "int8"] = Field(
+        default="float32",
+        description="Precision of the embeddings searched by the local vector index. int8 uses a quarter of the memory of float32",
+    )
+    local_vector_index_dimensions: Union[int, None] = Field(
+        default=None,
+        ge=1,
+        description="Number of leading embedding dimensions searched by the local vector index. If None, all dimensions are searched",
+    )
+    local_vector_index_rescore_factor: int = Field(
+        default=0,
+        ge=0,
+        description="If positive, the local vector index re-scores k times this many candidates with the full-precision embeddings",
+    )
+    local_vector_index_search_type: Literal["vector", "hybrid"] = Field(
+        default="hybrid",
+        description="'hybrid' fuses the local vector search with a local BM25 search of the document texts, like the Neo4j hybrid search",
+    )
+    local_vector_index_rrf_k: int = Field(
+        default=60,
+        ge=1,
+        description="Rank offset of the reciprocal rank fusion of the local hybrid search",
+    )
+    local_vector_index_vector_weight: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="Weight of the vector ranking in the local hybrid search",
+    )
+    local_vector_index_keyword_weight: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="Weight of the BM25 ranking in the local hybrid search",
+    )
     maximum_information_acquisition_rate: Union[int, float] = Field(
         default=0.15,
         ge=0.0,
@@ -30,6 +87,281 @@ class LLMConfig(BaseModel):
     timeout: Union[int, float] = Field(
         default=30.0, ge=15.0, description="Timeout for LLM requests in seconds"
     )
+    front_end_mode: Literal["sequential", "speculative", "fused"] = Field(
+        default="sequential",
+        description="How router and entity extraction are run. 'speculative' starts entity extraction while the router is still deciding, 'fused' does both in one structured call",
+    )
+    entity_extraction_mode: Literal["llm", "local", "hybrid"] = Field(
+        default="llm",
+        description="How entity_extract_node extracts keywords. 'local' matches graph node ids without an LLM call, 'hybrid' calls the LLM only when the local matcher finds nothing. Not used in the fused front end",
+    )
+    context_judgment_mode: Literal["separate", "fused"] = Field(
+        default="separate",
+        description="How context cleanup and answer judgment are run. 'fused' returns the cleaned context and the judgment in one structured call",
+    )
+    speculative_vector_search: bool = Field(
+        default=False,
+        description="In speculative mode, also start the first vector search on the raw question alongside the router",
+    )
+    graph_retrieval_timeout: Union[int, float] = Field(
+        default=10.0,
+        gt=0.0,
+        description="Timeout for the graph retrieval leg in seconds. On timeout, the answer continues without graph data",
+    )
+    vector_retrieval_timeout: Union[int, float] = Field(
+        default=10.0,
+        gt=0.0,
+        description="Timeout for the vector retrieval leg in seconds. On timeout, the answer continues without vector data",
+    )
+    graph_retrieval_mode: Literal["proportional", "ranked"] = Field(
+        default="proportional",
+        description="How much graph data is retrieved. 'proportional' grows with the size of the database, 'ranked' returns the most relevant edges within a fixed token budget",
+    )
+    graph_context_token_budget: int = Field(
+        default=2000,
+        ge=1,
+        description="In ranked mode, estimated tokens of graph data on the last retriever attempt. Earlier attempts get an equal share per attempt",
+    )
+    graph_candidate_limit: int = Field(
+        default=200,
+        ge=1,
+        description="In ranked mode, maximum number of candidate edges fetched per keyword",
+    )
+    graph_edge_type_priority: dict[str, float] = Field(
+        default_factory=dict,
+        description="In ranked mode, weight per relationship type. Types that are not listed have a weight of 1",
+    )
+    graph_snapshot_enabled: bool = Field(
+        default=False,
+        description="Whether to answer the keyword graph lookups from an in-memory snapshot of the graph instead of Neo4j",
+    )
+    graph_snapshot_hops: int = Field(
+        default=1,
+        ge=1,
+        description="Number of hops the in-memory graph snapshot expands from the matched nodes",
+    )
+    graph_query_cache_enabled: bool = Field(
+        default=True,
+        description="Whether to cache the results of the keyword graph lookup queries until the graph version changes",
+    )
+    graph_query_cache_max_entries: int = Field(
+        default=1024,
+        ge=1,
+        description="Maximum number of cached keyword lookup results",
+    )
+    graph_query_cache_ttl: Union[int, float] = Field(
+        default=300.0,
+        gt=0,
+        description="Time to live of a cached keyword lookup result in seconds",
+    )
+    vector_retrieval_mode: Literal["proportional", "adaptive"] = Field(
+        default="proportional",
+        description="How many documents a vector search returns. 'proportional' returns a fixed fraction of all documents, 'adaptive' cuts the candidates off by score and a token budget",
+    )
+    vector_candidate_k: int = Field(
+        default=50,
+        ge=1,
+        description="In adaptive mode, number of candidate documents fetched per vector search",
+    )
+    vector_score_threshold: float = Field(
+        default=0.5,
+        ge=0.0,
+        le=1.0,
+        description="In adaptive mode, minimum score of a returned document",
+    )
+    vector_score_gap: float = Field(
+        default=0.15,
+        ge=0.0,
+        description="In adaptive mode, a drop in score larger than this between consecutive candidates ends the result",
+    )
+    vector_context_token_budget: int = Field(
+        default=4000,
+        ge=1,
+        description="In adaptive mode, maximum estimated tokens of the documents of a vector search",
+    )
+    reranker_enabled: bool = Field(
+        default=False,
+        description="Whether to rerank the retrieved graph triples and vector chunks locally before context cleanup",
+    )
+    reranker_token_budget: int = Field(
+        default=3000,
+        ge=1,
+        description="Maximum estimated tokens of the reranked items of a retriever attempt",
+    )
+    reranker_embedding_weight: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description="Weight of the embedding cosine similarity in the reranker score. 0 uses BM25 only and needs no embedding calls",
+    )
+    context_cleanup_skip_tokens: int = Field(
+        default=0,
+        ge=0,
+        description="Context of at most this many estimated tokens is not sent to context cleanup. 0 always cleans up. Not used in the fused context judgment",
+    )
+    graph_query_backend: Literal["async_driver", "executor"] = Field(
+        default="async_driver",
+        description="How Cypher queries are kept off the event loop. 'executor' runs the blocking driver on a bounded thread pool",
+    )
+    graph_query_concurrency: int = Field(
+        default=8, ge=1, description="Maximum number of concurrent Cypher queries"
+    )
+    answer_cache_enabled: bool = Field(
+        default=False,
+        description="Whether to replay cached answers for questions similar to ones already answered",
+    )
+    answer_cache_similarity_threshold: float = Field(
+        default=0.95,
+        ge=0.0,
+        le=1.0,
+        description="Minimum cosine similarity between two questions to replay a cached answer",
+    )
+    answer_cache_max_entries: int = Field(
+        default=256, ge=1, description="Maximum number of cached answers"
+    )
+    answer_cache_ttl: Union[int, float] = Field(
+        default=3600.0, gt=0.0, description="Time to live of a cached answer in seconds"
+    )
+    answer_cache_history_turns: int = Field(
+        default=2,
+        ge=0,
+        description="Number of most recent history messages that must match to replay a cached answer",
+    )
+    answer_cache_embedding_timeout: Union[int, float] = Field(
+        default=1.0,
+        gt=0.0,
+        description="Timeout for embedding the question in seconds. A slower embedding skips the answer cache",
+    )
+    graph_version_check_interval: Union[int, float] = Field(
+        default=60.0,
+        ge=0.0,
+        description="Minimum interval in seconds between checks whether the graph database was re-ingested",
+    )
+    graph_statistics_cache_enabled: bool = Field(
+        default=False,
+        description="Whether to load the graph statistics from the file written at ingestion time instead of counting them at startup",
+    )
+    graph_statistics_file: Path = Field(
+        default=Path("cache/graph_statistics.json"),
+        description="Path of the graph statistics file. Relative paths are relative to the project root",
+    )
+    vector_index_embedding_check: bool = Field(
+        default=True,
+        description="Whether to embed the Documents without an embedding when attaching to the Neo4j vector index at startup",
+    )
+    checkpointer_mode: Literal["memory", "bounded", "none"] = Field(
+        default="memory",
+        description="How the graph state is checkpointed. 'memory' keeps every step, 'bounded' keeps the final state of at most checkpointer_max_threads conversations, 'none' uses no checkpointer",
+    )
+    checkpointer_max_threads: int = Field(
+        default=256,
+        ge=1,
+        description="In bounded mode, maximum number of conversations whose graph state is kept",
+    )
+    history_token_budget: int = Field(
+        default=0,
+        ge=0,
+        description="Estimated tokens of the most recent messages sent verbatim in the conversation history. Older messages are summarized. 0 sends the whole history verbatim",
+    )
+    history_summary_cache_max_entries: int = Field(
+        default=1024,
+        ge=1,
+        description="Maximum number of cached conversation summaries",
+    )
+    history_node_token_budgets: dict[str, int] = Field(
+        default_factory=dict,
+        description="Estimated tokens of conversation history sent by each node, keyed by node name. 'history_node' limits the messages summarized at once. Nodes that are not listed send the whole history",
+    )
+    max_prompt_tokens: int = Field(
+        default=0,
+        ge=0,
+        description="Current prompts of more estimated tokens are rejected before any LLM call. 0 is unlimited",
+    )
+    max_history_message_tokens: int = Field(
+        default=0,
+        ge=0,
+        description="History messages of more estimated tokens are cut to this before any LLM call. 0 is unlimited",
+    )
+    node_models: dict[str, str] = Field(
+        default_factory=dict,
+        description="Gemini LLM Model of each node, keyed by node name. Nodes that are not listed use model",
+    )
+    node_timeouts: dict[str, Union[int, float]] = Field(
+        default_factory=dict,
+        description="Timeout for the LLM requests of each node in seconds (at least 15), keyed by node name. Nodes that are not listed use timeout",
+    )
+
+    @field_validator(
+        "embedding_cache_dir", "local_vector_index_dir", "graph_statistics_file"
+    )
+    @classmethod
+    def resolve_cache_path(cls, value: Path) -> Path:
+        """Resolve a relative cache path against the project root"""
+        return value if value.is_absolute() else Path(__file__).parent / value
+
+    @field_validator("node_timeouts")
+    @classmethod
+    def check_node_timeouts(
+        cls, value: dict[str, Union[int, float]]
+    ) -> dict[str, Union[int, float]]:
+        """Check that every node timeout has the same minimum as timeout"""
+        for node, timeout in value.items():
+            if timeout < 15.0:
+                raise ValueError(f"The timeout of {node} must be at least 15 seconds")
+        return value
+
+
+class Neo4jConfig(BaseModel):
+    """Neo4j connection pool configuration settings"""
+
+    max_connection_pool_size: int = Field(
+        default=50,
+        ge=1,
+        description="Maximum number of connections of each Neo4j driver. Keep it above graph_query_concurrency",
+    )
+    connection_acquisition_timeout: Union[int, float] = Field(
+        default=5.0,
+        gt=0,
+        description="Maximum time in seconds a query waits for a free connection",
+    )
+    max_connection_lifetime: Union[int, float] = Field(
+        default=3600.0,
+        gt=0,
+        description="Connections older than this many seconds are closed instead of reused",
+    )
+    connection_timeout: Union[int, float] = Field(
+        default=15.0,
+        gt=0,
+        description="Maximum time in seconds to open a new connection",
+    )
+    liveness_check_timeout: Union[int, float, None] = Field(
+        default=None,
+        ge=0,
+        description="Idle connections older than this many seconds are checked before reuse. If None, they are not checked",
+    )
+    keep_alive: bool = Field(
+        default=True, description="Whether to enable TCP keep-alive"
+    )
+
+
+class GeminiConfig(BaseModel):
+    """Gemini API client pool configuration settings"""
+
+    max_connections: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum number of connections to the Gemini API shared by every chat model",
+    )
+    keepalive_time: Union[int, float] = Field(
+        default=30.0,
+        gt=0,
+        description="Interval in seconds of the keep-alive pings that keep idle connections open",
+    )
+    keepalive_timeout: Union[int, float] = Field(
+        default=10.0,
+        gt=0,
+        description="Time in seconds to wait for a keep-alive ping to be answered before the connection is closed",
+    )
 
 
 class FastAPIConfig(BaseModel):
@@ -75,6 +407,8 @@ class Settings(BaseSettings):
 
     # Configuration sections
     llm: LLMConfig = Field(default_factory=LLMConfig)
+    neo4j: Neo4jConfig = Field(default_factory=Neo4jConfig)
+    gemini: GeminiConfig = Field(default_factory=GeminiConfig)
     fastapi: FastAPIConfig = Field(default_factory=FastAPIConfig)
 
     def __init__(self, **kwargs):
@@ -85,6 +419,8 @@ class Settings(BaseSettings):
         """Load configuration from config.yaml file"""
         yaml_data = load_config()
         self.llm = LLMConfig(**yaml_data["llm"])
+        self.neo4j = Neo4jConfig(**yaml_data["neo4j"])
+        self.gemini = GeminiConfig(**yaml_data["gemini"])
         self.fastapi = FastAPIConfig(**yaml_data["fastapi"])
 
 
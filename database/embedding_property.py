@@ -9,6 +9,9 @@ If you want to run this file, type the command below in the backend directory.
 uv run python -m database.embedding_property
 """
 
+# Python Standard Library imports
+from pathlib import Path
+
 # Third-party Library imports
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_neo4j import Neo4jVector
@@ -16,10 +19,24 @@ from langchain_neo4j import Neo4jVector
 # Custom Library imports
 from utils import print_time
 from config import get_settings
+from sc2editor.embeddings import CachedEmbeddings
+from sc2editor.llm.cypher_queries import BUMP_GRAPH_VERSION_QUERY
+from sc2editor.llm.graph_statistics import (
+    query_graph_statistics,
+    save_graph_statistics,
+)
 
 
 @print_time
-def main(embedding: str, url: str, username: str, password: str):
+def main(
+    embedding: str,
+    url: str,
+    username: str,
+    password: str,
+    embedding_cache_dir: str | Path | None = None,
+    embedding_cache_max_entries: int = 20000,
+    graph_statistics_file: str | Path | None = None,
+):
     """
     Main Function to add embedding properties to Neo4j Database.
 
@@ -28,10 +45,23 @@ def main(embedding: str, url: str, username: str, password: str):
         url: Neo4j Database URL
         username: The username of Neo4j Database account
         password: The password of Neo4j Database account
+        embedding_cache_dir: Directory of the embedding cache. If None, the cache is not used.
+        embedding_cache_max_entries: Maximum number of cached embeddings
+        graph_statistics_file: Path of the graph statistics file loaded at server startup. If None, it is not written.
     """
+    # Re-ingesting the same documents does not embed them over the network again
+    embeddings = GoogleGenerativeAIEmbeddings(model=embedding)
+    if embedding_cache_dir is not None:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            model=embedding,
+            cache_dir=embedding_cache_dir,
+            max_entries=embedding_cache_max_entries,
+        )
+
     # Add embedding property
-    Neo4jVector.from_existing_graph(
-        GoogleGenerativeAIEmbeddings(model=embedding),
+    vector_store = Neo4jVector.from_existing_graph(
+        embeddings,
         search_type="hybrid",
         node_label="Document",
         text_node_properties=["text"],
@@ -41,6 +71,17 @@ def main(embedding: str, url: str, username: str, password: str):
         password=password,
     )
 
+    # Let running servers know that the embeddings have changed
+    graph_version = vector_store.query(BUMP_GRAPH_VERSION_QUERY)[0]["GraphVersion"]
+    print("Graph version: ", graph_version)
+
+    # Servers load the statistics of this graph version instead of counting them at startup
+    if graph_statistics_file is not None:
+        save_graph_statistics(
+            graph_statistics_file, query_graph_statistics(vector_store)
+        )
+        print("Graph statistics saved to ", graph_statistics_file)
+
 
 if __name__ == "__main__":
     settings = get_settings()
@@ -49,4 +90,11 @@ if __name__ == "__main__":
         url=settings.neo4j_uri,
         username=settings.neo4j_username,
         password=settings.neo4j_password,
+        embedding_cache_dir=settings.llm.embedding_cache_dir
+        if settings.llm.embedding_cache_enabled
+        else None,
+        embedding_cache_max_entries=settings.llm.embedding_cache_max_entries,
+        graph_statistics_file=settings.llm.graph_statistics_file
+        if settings.llm.graph_statistics_cache_enabled
+        else None,
     )
@@ -9,6 +9,9 @@ If you want to run this file, type the command below in the backend directory.
 uv run python -m database.graph_database
 """
 
+# Python Standard Library imports
+from pathlib import Path
+
 # Third-party Library imports
 from langchain_experimental.graph_transformers import LLMGraphTransformer
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -18,6 +21,15 @@ from langchain_neo4j import Neo4jGraph
 from utils import print_time
 from config import get_settings
 from sc2editor.text_splitters import markdown_load_split
+from sc2editor.llm.cypher_queries import (
+    BUMP_GRAPH_VERSION_QUERY,
+    CREATE_FULLTEXT_INDEX_QUERY,
+    FULLTEXT_INDEX_NAME,
+)
+from sc2editor.llm.graph_statistics import (
+    query_graph_statistics,
+    save_graph_statistics,
+)
 
 
 def setup_llm_and_transformer(
@@ -38,6 +50,31 @@ def setup_llm_and_transformer(
     return llm, llm_transformer
 
 
+def create_fulltext_index(graph: Neo4jGraph):
+    """
+    Function to create the full-text index used for keyword lookups if it does not exist yet.
+
+    Args:
+        graph: Neo4j Database
+    """
+    graph.query(CREATE_FULLTEXT_INDEX_QUERY)
+    # Wait until the index is populated so that it can be queried right after ingestion
+    graph.query("CALL db.awaitIndexes(300);")
+
+
+def bump_graph_version(graph: Neo4jGraph) -> int:
+    """
+    Function to increase the graph version so that running servers drop data derived from the previous graph.
+
+    Args:
+        graph: Neo4j Database
+
+    Returns:
+        New graph version
+    """
+    return graph.query(BUMP_GRAPH_VERSION_QUERY)[0]["GraphVersion"]
+
+
 def query_database_stats(graph: Neo4jGraph) -> tuple[dict[str, int], dict[str, int]]:
     """
     A function that sends a query to a neo4j graph database and returns statistics.
@@ -69,7 +106,13 @@ def query_database_stats(graph: Neo4jGraph) -> tuple[dict[str, int], dict[str, i
 
 
 @print_time
-def main(model: str, url: str, username: str, password: str):
+def main(
+    model: str,
+    url: str,
+    username: str,
+    password: str,
+    graph_statistics_file: str | Path | None = None,
+):
     """
     Main Function to split text in Markdown document and add it to Neo4j Database.
 
@@ -78,6 +121,7 @@ def main(model: str, url: str, username: str, password: str):
         url: Neo4j Database URL
         username: The username of Neo4j Database account
         password: The password of Neo4j Database account
+        graph_statistics_file: Path of the graph statistics file loaded at server startup. If None, it is not written.
     """
     # Set up LLM and Graph Transformer
     llm, llm_transformer = setup_llm_and_transformer(model=model)
@@ -96,6 +140,13 @@ def main(model: str, url: str, username: str, password: str):
         graph_documents=graph_documents, include_source=True, baseEntityLabel=True
     )
 
+    # Index the id and text properties of the nodes for keyword lookups
+    create_fulltext_index(graph)
+    print(f"Full-text index {FULLTEXT_INDEX_NAME} is ready.")
+
+    # Let running servers know that the graph has changed
+    print("Graph version: ", bump_graph_version(graph))
+
     # Query and display statistics
     node_result, relationship_result = query_database_stats(graph)
 
@@ -103,6 +154,11 @@ def main(model: str, url: str, username: str, password: str):
     print("Number of total nodes: ", node_result["TotalNodes"])
     print("Number of total relationships: ", relationship_result["TotalRelationships"])
 
+    # Servers load the statistics of this graph version instead of counting them at startup
+    if graph_statistics_file is not None:
+        save_graph_statistics(graph_statistics_file, query_graph_statistics(graph))
+        print("Graph statistics saved to ", graph_statistics_file)
+
     # Close the connection
     graph.close()
 
@@ -114,4 +170,7 @@ if __name__ == "__main__":
         url=settings.neo4j_uri,
         username=settings.neo4j_username,
         password=settings.neo4j_password,
+        graph_statistics_file=settings.llm.graph_statistics_file
+        if settings.llm.graph_statistics_cache_enabled
+        else None,
     )
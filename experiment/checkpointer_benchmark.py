@@ -0,0 +1,251 @@
+"""
+Comparison of the per-request overhead of the graph state checkpointing of SC2EditorLLM.
+
+This module runs the same requests through the state graph with each checkpointer mode and prints
+the wall time per request, the peak memory allocated while a request runs and the bytes the checkpointer holds
+at the end of a request, before delete_thread_id is called.
+'memory (tracked state)' keeps the retrieval payloads in regular channels, as before they were moved to untracked channels.
+
+No Neo4j database or Gemini API is used. The Cypher query, vector search and LLM chains are replaced with local stand-ins
+that return payloads of a realistic size, so only the overhead of the graph itself is measured.
+
+If you want to run this file, type the command below in the backend directory.
+
+uv run python -m experiment.checkpointer_benchmark
+"""
+
+# Python Standard Library imports
+import os
+import time
+import asyncio
+import tracemalloc
+from statistics import median
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Third-party Library imports
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langgraph.channels import LastValue, UntrackedValue
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Gemini chat models are only created, never called
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+# Custom Library imports
+from sc2editor.llm import SC2EditorLLM  # noqa: E402
+
+
+TIMED_REQUESTS = 50
+TRACED_REQUESTS = 10
+EDGES_PER_KEYWORD = 60
+VECTOR_DOCUMENTS = 8
+DOCUMENT_CHARACTERS = 2000
+CLEANED_CONTEXT_CHARACTERS = 4000
+ANSWER = "Use the Unit Selection Changed event and a Text Message action. " * 8
+
+
+class StandInGraph:
+    """Stand-in for Neo4jGraph that returns a fixed number of edges per keyword."""
+
+    def query(self, query: str, params: dict[str, Any] | None = None):
+        if "GraphVersion" in query:
+            return [{"GraphVersion": 1}]
+
+        keywords = [el["keyword"] for el in (params or dict()).get("keywords", list())]
+        return [
+            {
+                "keyword": keyword,
+                "outputs": [
+                    f"{keyword} {idx} - RELATED_TO -> Trigger Action {idx}"
+                    for idx in range(EDGES_PER_KEYWORD)
+                ],
+            }
+            for keyword in keywords
+        ]
+
+    def close(self):
+        pass
+
+
+class StandInRetriever:
+    """Stand-in for the vector retriever that returns documents of a fixed size."""
+
+    async def ainvoke(self, query: str, *args, **kwargs):
+        return [
+            Document(
+                page_content=f"Document {idx} " + "x" * DOCUMENT_CHARACTERS,
+                metadata={"source": f"document_{idx}.md"},
+            )
+            for idx in range(VECTOR_DOCUMENTS)
+        ]
+
+
+def create_llm(checkpointer_mode: str, tracked: bool) -> SC2EditorLLM:
+    """
+    Function to create an SC2EditorLLM whose database, retriever and chains are local stand-ins.
+
+    Args:
+        checkpointer_mode: Checkpointer mode of the state graph
+        tracked: Whether to keep the retrieval payloads in tracked channels
+
+    Returns:
+        SC2EditorLLM ready to stream requests
+    """
+    llm = SC2EditorLLM(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        model="gemini-2.0-flash",
+        embedding="models/text-embedding-004",
+        maximum_retriever_attempts=2,
+        graph_query_backend="executor",
+        graph_query_cache_enabled=False,
+        checkpointer_mode=checkpointer_mode,
+        auto_initialize=False,
+    )
+
+    llm.neo4j_graph = StandInGraph()
+    llm._graph_query_executor = ThreadPoolExecutor(max_workers=2)
+    llm._graph_query_semaphore = asyncio.Semaphore(2)
+    llm.node_count = llm.relationship_count = 10000
+    llm.graph_version = 1
+    llm.vector_retriever = StandInRetriever()
+
+    llm.builder = llm._create_graph()
+    llm.graph = llm.builder.compile(checkpointer=llm.checkpointer)
+    if tracked:
+        for name, channel in list(llm.graph.channels.items()):
+            if isinstance(channel, UntrackedValue):
+                llm.graph.channels[name] = LastValue(channel.typ, key=name)
+    llm._is_initialized = True
+
+    # Every request retrieves twice: the first judgment asks for more context, the second one allows the answer
+    judgments = iter(["no", "yes"] * (TIMED_REQUESTS + TRACED_REQUESTS + 1))
+    llm._router_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(prompt_status="allow")
+    )
+    llm._entity_extract_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(keywords=["unit", "selection", "text"])
+    )
+    llm._retriever_query_node_chain = RunnableLambda(
+        lambda _: AIMessage("unit selection text message")
+    )
+    llm._context_cleanup_node_chain = RunnableLambda(
+        lambda _: AIMessage("c" * CLEANED_CONTEXT_CHARACTERS)
+    )
+    llm._answer_judgment_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(answer_status=next(judgments))
+    )
+    llm._answer_node_chain = RunnableLambda(lambda _: "answer") | GenericFakeChatModel(
+        messages=iter([AIMessage(ANSWER)] * (TIMED_REQUESTS + TRACED_REQUESTS + 1))
+    )
+
+    return llm
+
+
+def checkpointer_bytes(checkpointer: InMemorySaver | None) -> int:
+    """
+    Function to sum the serialized bytes held by an in-memory checkpointer.
+
+    Args:
+        checkpointer: Checkpointer of the state graph, or None
+
+    Returns:
+        Bytes of the serialized checkpoints, channel values and pending writes
+    """
+    if checkpointer is None:
+        return 0
+
+    checkpoint_bytes = sum(
+        len(checkpoint[1]) + len(metadata[1])
+        for namespaces in checkpointer.storage.values()
+        for checkpoints in namespaces.values()
+        for checkpoint, metadata, _ in checkpoints.values()
+    )
+    blob_bytes = sum(len(blob[1]) for blob in checkpointer.blobs.values())
+    write_bytes = sum(
+        len(write[2][1])
+        for writes in checkpointer.writes.values()
+        for write in writes.values()
+    )
+
+    return checkpoint_bytes + blob_bytes + write_bytes
+
+
+async def run_request(llm: SC2EditorLLM, thread_id: str) -> int:
+    """
+    Function to stream one request to the end, like the chat service.
+
+    Args:
+        llm: SC2EditorLLM with stand-ins
+        thread_id: Thread id of the request
+
+    Returns:
+        Bytes held by the checkpointer at the end of the request
+    """
+    messages = [
+        HumanMessage("How do I select a unit?"),
+        AIMessage("Use the Unit Selection Changed event."),
+        HumanMessage(
+            'When a unit is selected, how can I output the text "Unit selected!"'
+        ),
+    ]
+    async for _ in llm.astream({"messages": messages}, thread_id=thread_id):
+        pass
+
+    retained = checkpointer_bytes(llm.checkpointer)
+    llm.delete_thread_id(thread_id)
+
+    return retained
+
+
+async def benchmark(name: str, checkpointer_mode: str, tracked: bool = False):
+    """
+    Function to print the wall time, the peak allocation and the checkpointed bytes per request of one mode.
+
+    Args:
+        name: Name printed for the mode
+        checkpointer_mode: Checkpointer mode of the state graph
+        tracked: Whether to keep the retrieval payloads in tracked channels
+    """
+    llm = create_llm(checkpointer_mode, tracked)
+    # Warm up
+    await run_request(llm, "warm-up")
+
+    latencies = list()
+    for idx in range(TIMED_REQUESTS):
+        start = time.perf_counter()
+        await run_request(llm, f"timed-{idx}")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    peaks = list()
+    retained = list()
+    tracemalloc.start()
+    for idx in range(TRACED_REQUESTS):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        retained.append(await run_request(llm, f"traced-{idx}"))
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - baseline)
+    tracemalloc.stop()
+
+    print(
+        f"{name:<24} {median(latencies):>9.2f} ms {median(peaks) / 1024:>10.1f} KiB "
+        f"{median(retained) / 1024:>12.1f} KiB"
+    )
+
+
+async def main():
+    print(f"{'mode':<24} {'latency':>12} {'peak alloc':>14} {'checkpointed':>16}")
+    await benchmark("memory (tracked state)", "memory", tracked=True)
+    await benchmark("memory", "memory")
+    await benchmark("bounded", "bounded")
+    await benchmark("none", "none")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
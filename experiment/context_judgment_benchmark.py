@@ -0,0 +1,131 @@
+"""
+A/B comparison of context cleanup and answer judgment in SC2EditorLLM: two calls versus one fused call.
+
+This module retrieves the context of each prompt once, runs it through the context cleanup and answer judgment nodes
+('separate' mode) and through the fused context judgment node ('fused' mode), and prints the latency,
+the number of characters uploaded and the judgments of each.
+
+If you want to run this file, type the command below in the backend directory.
+
+uv run python -m experiment.context_judgment_benchmark
+"""
+
+# Python Standard Library imports
+import time
+import asyncio
+from statistics import median
+
+# Third-party Library imports
+from langchain_core.messages import HumanMessage
+
+# Custom Library imports
+from config import get_settings
+from sc2editor.llm import SC2EditorLLM
+from experiment.front_end_benchmark import LABELLED_PROMPTS
+
+
+REPEAT = 3
+
+
+async def retrieve_context(llm: SC2EditorLLM, prompt: str) -> dict:
+    """
+    Function to create the state right before context cleanup, like the first retrieval attempt of the graph.
+
+    Args:
+        llm: Initialized SC2EditorLLM
+        prompt: Current prompt
+
+    Returns:
+        State with messages, keywords and context
+    """
+    state = {"messages": [HumanMessage(prompt)], "retriever_attempt_count": 1}
+    state.update(await llm._entity_extract_node(state))
+    state.update(await llm._retriever_node(state))
+
+    return state
+
+
+async def separate_context_judgment(llm: SC2EditorLLM, state: dict) -> str:
+    """
+    Function to run context cleanup and answer judgment one after another, like the default graph.
+
+    Args:
+        llm: Initialized SC2EditorLLM
+        state: State right before context cleanup
+
+    Returns:
+        answer_status
+    """
+    cleaned_state = {**state, **await llm._context_cleanup_node(state)}
+    res = await llm._answer_judgment_node(cleaned_state)
+
+    return res["answer_allow_status"]
+
+
+async def fused_context_judgment(llm: SC2EditorLLM, state: dict) -> str:
+    """
+    Function to run the fused context judgment node.
+
+    Args:
+        llm: Initialized SC2EditorLLM
+        state: State right before context cleanup
+
+    Returns:
+        answer_status
+    """
+    res = await llm._context_judgment_node(state)
+
+    return res["answer_allow_status"]
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+
+    async def main():
+        async with SC2EditorLLM(
+            neo4j_uri=settings.neo4j_uri,
+            neo4j_username=settings.neo4j_username,
+            neo4j_password=settings.neo4j_password,
+            model=settings.llm.model,
+            embedding=settings.llm.embedding,
+            timeout=settings.llm.timeout,
+            auto_initialize=False,
+        ) as llm:
+            latencies = {"separate": list(), "fused": list()}
+            agreements = 0
+
+            for prompt, expected_status in LABELLED_PROMPTS:
+                if expected_status == "disallow":
+                    continue
+
+                state = await retrieve_context(llm, prompt)
+                # The separate path uploads the full context and history twice, the fused path once
+                payload = len(state["context"]) + len(
+                    llm._format_messages(state["messages"])
+                )
+
+                for _ in range(REPEAT):
+                    start = time.perf_counter()
+                    separate_status = await separate_context_judgment(llm, state)
+                    latencies["separate"].append((time.perf_counter() - start) * 1000)
+
+                    start = time.perf_counter()
+                    fused_status = await fused_context_judgment(llm, state)
+                    latencies["fused"].append((time.perf_counter() - start) * 1000)
+
+                    agreements += separate_status == fused_status
+
+                print(
+                    f"separate: {separate_status:3}, fused: {fused_status:3}, "
+                    f"context + history: {payload} chars <- {prompt[:60]}"
+                )
+
+            print()
+            for mode, mode_latencies in latencies.items():
+                print(
+                    f"[{mode}] latency: {median(mode_latencies):.0f} ms (median), "
+                    f"{max(mode_latencies):.0f} ms (max)"
+                )
+            print(f"Judgment agreement: {agreements / len(latencies['fused']):.0%}")
+
+    asyncio.run(main())
@@ -0,0 +1,202 @@
+"""
+Benchmark of keyword graph lookups: full-text index query versus CONTAINS scan.
+
+This module creates a synthetic graph of 10^5 entity nodes, runs the two keyword lookup queries used by SC2EditorLLM
+against it and prints their latencies. The synthetic nodes are numbered in the 'benchmark' property and removed at the end.
+
+Be careful, run this against an empty scratch database. The CONTAINS query scans every node in the database,
+so existing data distorts the result, and the full-text index created here is the one used by SC2EditorLLM.
+
+If you want to run this file, type the command below in the backend directory.
+
+uv run python -m experiment.fulltext_benchmark
+"""
+
+# Python Standard Library imports
+import time
+import random
+from statistics import median
+
+# Third-party Library imports
+from langchain_neo4j import Neo4jGraph
+
+# Custom Library imports
+from config import get_settings
+from database.graph_database import create_fulltext_index
+from sc2editor.llm.cypher_queries import (
+    FULLTEXT_INDEX_NAME,
+    KEYWORD_FULLTEXT_QUERY,
+    KEYWORD_CONTAINS_QUERY,
+    lucene_keyword_query,
+)
+
+
+NODE_COUNT = 100_000
+RELATIONSHIPS_PER_NODE = 2
+BATCH_SIZE = 10_000
+REPEAT = 10
+
+WORDS = [
+    "marine",
+    "trigger",
+    "unit",
+    "region",
+    "dialog",
+    "camera",
+    "ability",
+    "effect",
+    "behavior",
+    "actor",
+    "weapon",
+    "upgrade",
+    "doodad",
+    "terrain",
+    "variable",
+    "bank",
+    "record",
+    "point",
+    "lighting",
+    "model",
+    "button",
+    "requirement",
+]
+KEYWORDS = ["marine", "trigger", "dialog", "data editor", "unit selection"]
+
+
+def create_synthetic_graph(graph: Neo4jGraph):
+    """
+    Function to create NODE_COUNT synthetic entity nodes with random relationships.
+
+    Args:
+        graph: Neo4j Database
+    """
+    rng = random.Random(0)
+
+    # Range index to connect the synthetic nodes by their number
+    graph.query(
+        "CREATE INDEX benchmark_entity IF NOT EXISTS FOR (n:__Entity__) ON (n.benchmark);"
+    )
+    graph.query("CALL db.awaitIndexes(300);")
+
+    for start in range(0, NODE_COUNT, BATCH_SIZE):
+        nodes = [
+            {
+                "idx": idx,
+                "id": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {idx}",
+                "text": " ".join(rng.choices(WORDS, k=12)),
+            }
+            for idx in range(start, min(start + BATCH_SIZE, NODE_COUNT))
+        ]
+        graph.query(
+            """
+            UNWIND $nodes AS row
+            CREATE (n:__Entity__ {id: row.id, text: row.text, benchmark: row.idx})
+            """,
+            {"nodes": nodes},
+        )
+
+    for start in range(0, NODE_COUNT, BATCH_SIZE):
+        relationships = [
+            {"source": idx, "target": rng.randrange(NODE_COUNT)}
+            for idx in range(start, min(start + BATCH_SIZE, NODE_COUNT))
+            for _ in range(RELATIONSHIPS_PER_NODE)
+        ]
+        graph.query(
+            """
+            UNWIND $relationships AS row
+            MATCH (source:__Entity__ {benchmark: row.source})
+            MATCH (target:__Entity__ {benchmark: row.target})
+            CREATE (source)-[:RELATED_TO]->(target)
+            """,
+            {"relationships": relationships},
+        )
+
+
+def delete_synthetic_graph(graph: Neo4jGraph):
+    """
+    Function to delete the synthetic nodes, their relationships and the range index on their number.
+
+    Args:
+        graph: Neo4j Database
+    """
+    graph.query(
+        """
+        MATCH (n:__Entity__)
+        WHERE n.benchmark IS NOT NULL
+        CALL {
+            WITH n
+            DETACH DELETE n
+        } IN TRANSACTIONS OF 10000 ROWS
+        """
+    )
+    graph.query("DROP INDEX benchmark_entity IF EXISTS;")
+
+
+def measure(graph: Neo4jGraph, query: str, params: dict) -> tuple[float, int]:
+    """
+    Function to run a query REPEAT times.
+
+    Args:
+        graph: Neo4j Database
+        query: Cypher query
+        params: Query parameters
+
+    Returns:
+        Median latency in milliseconds and the number of rows returned
+    """
+    latencies = list()
+
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = graph.query(query, params)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    rows = sum(len(el["outputs"]) for el in response)
+    return median(latencies), rows
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    graph = Neo4jGraph(
+        settings.neo4j_uri, settings.neo4j_username, settings.neo4j_password
+    )
+
+    try:
+        print(f"Creating {NODE_COUNT} synthetic nodes...")
+        create_synthetic_graph(graph)
+        create_fulltext_index(graph)
+
+        for keyword_limit in (10, 100, 1000):
+            fulltext_latency, fulltext_rows = measure(
+                graph,
+                KEYWORD_FULLTEXT_QUERY,
+                {
+                    "keywords": [
+                        {"keyword": keyword, "search": lucene_keyword_query(keyword)}
+                        for keyword in KEYWORDS
+                    ],
+                    "keyword_limit": keyword_limit,
+                    "index_name": FULLTEXT_INDEX_NAME,
+                },
+            )
+            contains_latency, contains_rows = measure(
+                graph,
+                KEYWORD_CONTAINS_QUERY,
+                {
+                    "keywords": [{"keyword": keyword} for keyword in KEYWORDS],
+                    "keyword_limit": keyword_limit,
+                },
+            )
+
+            print()
+            print(f"Keywords: {len(KEYWORDS)}, limit per keyword: {keyword_limit}")
+            print(
+                f"Full-text index: {fulltext_latency:.1f} ms (median), {fulltext_rows} rows"
+            )
+            print(
+                f"CONTAINS scan:   {contains_latency:.1f} ms (median), {contains_rows} rows"
+            )
+
+    finally:
+        delete_synthetic_graph(graph)
+        graph.close()
@@ -0,0 +1,104 @@
+"""
+Recall versus memory of the compact storage options of the local vector index.
+
+This module loads the Document embeddings from Neo4j, searches them with a sample of the documents as queries,
+and compares each precision, dimension truncation and re-score setting of LocalVectorIndex
+with the float32 search over all dimensions: recall@k, bytes of the searched matrix and search latency.
+Each query document itself is excluded from the results, so the recall is measured on its neighbours.
+No Gemini API call is made.
+
+If you want to run this file, type the command below in the backend directory.
+
+uv run python -m experiment.vector_quantization_benchmark
+"""
+
+# Python Standard Library imports
+import time
+import random
+import tempfile
+from statistics import median
+
+# Third-party Library imports
+from langchain_neo4j import Neo4jGraph
+
+# Custom Library imports
+from config import get_settings
+from sc2editor.llm.cypher_queries import DOCUMENT_EMBEDDINGS_QUERY
+from sc2editor.llm.local_vector_index import LocalVectorIndex
+
+
+K = 10
+QUERY_COUNT = 200
+PRECISIONS = ["float32", "float16", "int8"]
+DIMENSIONS = [None, 512, 256]
+RESCORE_FACTORS = [0, 4]
+
+
+def search(index: LocalVectorIndex, queries: list[list[float]]) -> tuple[list, float]:
+    """
+    Function to find the neighbours of each query, one query at a time like the retriever.
+
+    Args:
+        index: Loaded local vector index
+        queries: Embedding of each query document
+
+    Returns:
+        Row indices of the K neighbours of each query without the query itself, and the median latency in ms
+    """
+    neighbours = list()
+    latencies = list()
+
+    for query in queries:
+        start = time.perf_counter()
+        indices, _ = index.search_by_vectors([query], K + 1)
+        latencies.append((time.perf_counter() - start) * 1000)
+        neighbours.append(indices[0].tolist()[1:])
+
+    return neighbours, median(latencies)
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    neo4j_graph = Neo4jGraph(
+        url=settings.neo4j_uri,
+        username=settings.neo4j_username,
+        password=settings.neo4j_password,
+    )
+    response = neo4j_graph.query(DOCUMENT_EMBEDDINGS_QUERY)
+    neo4j_graph.close()
+
+    texts = [el["text"] for el in response]
+    metadatas = [dict() for _ in response]
+    embeddings = [el["embedding"] for el in response]
+    queries = random.Random(0).sample(embeddings, min(QUERY_COUNT, len(embeddings)))
+    print(f"{len(embeddings)} documents, {len(queries)} queries, recall@{K}")
+    print()
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        exact_neighbours = None
+
+        for precision in PRECISIONS:
+            for dimensions in DIMENSIONS:
+                for rescore_factor in RESCORE_FACTORS:
+                    index = LocalVectorIndex(
+                        None,
+                        precision=precision,
+                        dimensions=dimensions,
+                        rescore_factor=rescore_factor,
+                    )
+                    # The full-precision embeddings are memory-mapped, like in the server
+                    index.load(texts, metadatas, embeddings, snapshot_dir=snapshot_dir)
+                    neighbours, latency = search(index, queries)
+
+                    if exact_neighbours is None:
+                        exact_neighbours = neighbours
+                    recall = sum(
+                        len(set(exact) & set(found)) / K
+                        for exact, found in zip(exact_neighbours, neighbours)
+                    ) / len(queries)
+
+                    memory = index.memory_usage()["search_matrix_bytes"] / 2**20
+                    print(
+                        f"{precision:7} dims: {str(dimensions or 'all'):4} rescore: {rescore_factor} | "
+                        f"recall: {recall:.3f}, memory: {memory:7.2f} MiB, latency: {latency:.2f} ms (median)"
+                    )
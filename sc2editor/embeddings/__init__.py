@@ -0,0 +1 @@
+from .cached_embeddings import CachedEmbeddings as CachedEmbeddings
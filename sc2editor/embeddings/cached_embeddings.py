@@ -0,0 +1,433 @@
+"""
+Module for a persistent on-disk embedding cache.
+
+This module wraps a LangChain Embeddings object so that every text is embedded over the network only once.
+Embeddings are stored in a memory-mapped float32 matrix with one row per cached text,
+and a second memory-mapped file holds the hash of the text stored in each row.
+Because every row carries its own key, several processes can share the cache files:
+rows are assigned under a file lock, and a row is only read back if it still holds the hash that was looked up.
+Files are never resized in place, since other processes may have them memory-mapped.
+They are recreated as new files that replace the old ones, and the other processes reopen them on their next write.
+"""
+
+# Python Standard Library imports
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Literal
+
+# Third-party Library imports
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+KEY_BYTES = hashlib.sha256().digest_size
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that stores embeddings content-addressed in a bounded memory-mapped file."""
+
+    def __init__(
+        self,
+        underlying_embeddings: Embeddings,
+        model: str,
+        cache_dir: str | Path,
+        max_entries: int = 20000,
+    ):
+        """
+        Initialize the cache and open the embeddings already stored for the model.
+
+        Args:
+            underlying_embeddings: Embeddings used for texts that are not cached yet
+            model: Name of the embedding model. Each model has its own cache files.
+            cache_dir: Directory of the cache files. It can be shared by several processes.
+            max_entries: Maximum number of cached embeddings. The least recently used one is replaced first.
+        """
+        self.underlying_embeddings = underlying_embeddings
+        self.model = model
+        self.max_entries = max_entries
+
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        file_stem = "".join(
+            character if character.isalnum() else "_" for character in model
+        )
+        self._matrix_path = cache_dir / f"{file_stem}.f32"
+        self._keys_path = cache_dir / f"{file_stem}.keys"
+        self._header_path = cache_dir / f"{file_stem}.json"
+        self._lock_path = cache_dir / f"{file_stem}.lock"
+
+        # Hash of the text -> row of the matrix, in least recently used order of this process
+        self._slots: OrderedDict[bytes, int] = OrderedDict()
+        self._matrix: np.memmap | None = None
+        self._keys: np.memmap | None = None
+        self._dimension: int | None = None
+        # Inode of the memory-mapped key file, to notice when another process replaced the files
+        self._keys_inode: int | None = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        with self._file_lock():
+            self._open()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        cached, missing_texts = self._lookup("document", texts)
+        if not missing_texts:
+            return cached
+
+        missing_embeddings = self.underlying_embeddings.embed_documents(missing_texts)
+        self._store("document", missing_texts, missing_embeddings)
+
+        return self._merge(texts, cached, missing_texts, missing_embeddings)
+
+    def embed_query(self, text: str) -> list[float]:
+        cached, missing_texts = self._lookup("query", [text])
+        if missing_texts:
+            embedding = self.underlying_embeddings.embed_query(text)
+            self._store("query", missing_texts, [embedding])
+            return embedding
+
+        return cached[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        cached, missing_texts = self._lookup("document", texts)
+        if not missing_texts:
+            return cached
+
+        missing_embeddings = await self.underlying_embeddings.aembed_documents(
+            missing_texts
+        )
+        # Waiting for the file lock of another process must not block the event loop
+        await asyncio.to_thread(
+            self._store, "document", missing_texts, missing_embeddings
+        )
+
+        return self._merge(texts, cached, missing_texts, missing_embeddings)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        cached, missing_texts = self._lookup("query", [text])
+        if missing_texts:
+            embedding = await self.underlying_embeddings.aembed_query(text)
+            await asyncio.to_thread(self._store, "query", missing_texts, [embedding])
+            return embedding
+
+        return cached[0]
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Return the counters of the cache.
+
+        Returns:
+            Number of cached embeddings in the shared cache file, hits, misses and the hit rate of this process
+        """
+        lookups = self.hits + self.misses
+        entries = 0 if self._keys is None else int(self._keys.any(axis=1).sum())
+
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _key(self, kind: Literal["document", "query"], text: str) -> bytes:
+        """
+        Create the content address of a text.
+
+        Queries and documents are embedded with different task types, so they are cached separately.
+
+        Args:
+            kind: Whether the text is embedded as a document or as a query
+            text: Text to embed
+
+        Returns:
+            Digest of the kind and the text
+        """
+        return hashlib.sha256(f"{kind}\x00{text}".encode("utf-8")).digest()
+
+    def _find_row(self, key: bytes) -> int | None:
+        """
+        Find the row of a key in the shared key file, e.g. a row written by another process.
+
+        Args:
+            key: Digest of the text
+
+        Returns:
+            Row of the matrix that holds the key, or None
+        """
+        rows = np.flatnonzero(
+            (self._keys == np.frombuffer(key, dtype=np.uint8)).all(axis=1)
+        )
+        return int(rows[0]) if len(rows) else None
+
+    def _read_row(self, key: bytes, slot: int) -> list[float] | None:
+        """
+        Read the embedding of a row if the row still holds the key.
+
+        Another process may replace the row at any time, so the key is checked before and after the read.
+
+        Args:
+            key: Digest of the text
+            slot: Row of the matrix
+
+        Returns:
+            Embedding of the text, or None if the row holds another text
+        """
+        if self._keys[slot].tobytes() != key:
+            return None
+        embedding = self._matrix[slot].tolist()
+        if self._keys[slot].tobytes() != key:
+            return None
+
+        return embedding
+
+    def _lookup(
+        self, kind: Literal["document", "query"], texts: list[str]
+    ) -> tuple[list[list[float] | None], list[str]]:
+        """
+        Read cached embeddings.
+
+        Args:
+            kind: Whether the texts are embedded as documents or as queries
+            texts: Texts to embed
+
+        Returns:
+            Embeddings in the order of the texts (None if not cached) and the distinct texts that are not cached
+        """
+        embeddings = list()
+        missing_texts = list()
+
+        with self._lock:
+            for text in texts:
+                key = self._key(kind, text)
+                embedding = None
+
+                if self._keys is not None:
+                    slot = self._slots.get(key)
+                    if slot is None:
+                        slot = self._find_row(key)
+                    if slot is not None:
+                        embedding = self._read_row(key, slot)
+
+                if embedding is None:
+                    self._slots.pop(key, None)
+                    embeddings.append(None)
+                    missing_texts.append(text)
+                    continue
+
+                self._slots[key] = slot
+                self._slots.move_to_end(key)
+                embeddings.append(embedding)
+
+            self.hits += len(texts) - len(missing_texts)
+            self.misses += len(missing_texts)
+
+        return embeddings, list(dict.fromkeys(missing_texts))
+
+    @staticmethod
+    def _merge(
+        texts: list[str],
+        cached: list[list[float] | None],
+        missing_texts: list[str],
+        missing_embeddings: list[list[float]],
+    ) -> list[list[float]]:
+        """
+        Fill the gaps of the cached embeddings with the newly created embeddings.
+
+        Args:
+            texts: Texts to embed
+            cached: Cached embeddings in the order of the texts (None if not cached)
+            missing_texts: Distinct texts that were not cached
+            missing_embeddings: Newly created embeddings of the missing texts
+
+        Returns:
+            Embeddings in the order of the texts
+        """
+        created = dict(zip(missing_texts, missing_embeddings))
+
+        return [
+            embedding if embedding is not None else created[text]
+            for text, embedding in zip(texts, cached)
+        ]
+
+    def _free_row(self) -> int:
+        """
+        Choose the row for a new embedding. Must be called while holding the file lock.
+
+        Returns:
+            An empty row, otherwise the row of the least recently used embedding of this process
+        """
+        empty_rows = np.flatnonzero(~self._keys.any(axis=1))
+        if len(empty_rows):
+            return int(empty_rows[0])
+
+        # Rows known to this process may have been replaced by another process in the meantime
+        while self._slots:
+            key, slot = self._slots.popitem(last=False)
+            if self._keys[slot].tobytes() == key:
+                return slot
+
+        # Every row was written by other processes
+        return int(np.random.randint(self.max_entries))
+
+    def _store(
+        self,
+        kind: Literal["document", "query"],
+        texts: list[str],
+        embeddings: list[list[float]],
+    ):
+        """
+        Write embeddings to the cache files.
+
+        The rows are written to the memory maps only. The operating system writes them back to disk,
+        and other processes see them right away.
+
+        Args:
+            kind: Whether the texts were embedded as documents or as queries
+            texts: Embedded texts
+            embeddings: Embeddings of the texts
+        """
+        with self._lock, self._file_lock():
+            if (
+                self._matrix is None
+                or self._dimension != len(embeddings[0])
+                or self._replaced()
+            ):
+                self._open(len(embeddings[0]))
+
+            for text, embedding in zip(texts, embeddings):
+                key = self._key(kind, text)
+                slot = self._find_row(key)
+                if slot is None:
+                    slot = self._free_row()
+                    # Clear the key first, so the row is never read with a half-written embedding
+                    self._keys[slot] = 0
+                    self._matrix[slot] = np.asarray(embedding, dtype=np.float32)
+                    self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+
+                self._slots[key] = slot
+                self._slots.move_to_end(key)
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the lock file of the model, so only one process at a time opens or writes the cache files"""
+        with open(self._lock_path, mode="a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _replaced(self) -> bool:
+        """
+        Check whether another process replaced the cache files since they were opened.
+
+        Returns:
+            Whether the memory-mapped files are no longer the cache files of the model
+        """
+        try:
+            return os.stat(self._keys_path).st_ino != self._keys_inode
+        except FileNotFoundError:
+            return True
+
+    def _open(self, dimension: int | None = None):
+        """
+        Open the cache files of the model. Must be called while holding the file lock.
+
+        Files written with the current settings are opened as they are, whichever process wrote them.
+        They are only recreated if a dimension is given and the files are missing or were written with other settings.
+
+        Args:
+            dimension: Dimension of the embeddings to store. If None, missing files are not created.
+        """
+        try:
+            with open(self._header_path, mode="r", encoding="utf-8") as f:
+                header = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            header = dict()
+
+        header_dimension = header.get("dimension")
+        fits = (
+            header.get("max_entries") == self.max_entries
+            and bool(header_dimension)
+            and (dimension is None or header_dimension == dimension)
+            and self._matrix_path.exists()
+            and self._keys_path.exists()
+            and self._matrix_path.stat().st_size
+            == self.max_entries * header_dimension * 4
+            and self._keys_path.stat().st_size == self.max_entries * KEY_BYTES
+        )
+
+        if not fits:
+            if dimension is None:
+                return None
+
+            # The header is written last, so other processes never open half-created files
+            self._header_path.unlink(missing_ok=True)
+            # Truncating a file that another process has memory-mapped would crash it (SIGBUS) on its next access,
+            # so new files are created and renamed over the old ones, which stay valid until they are unmapped
+            for path, size in (
+                (self._matrix_path, self.max_entries * dimension * 4),
+                (self._keys_path, self.max_entries * KEY_BYTES),
+            ):
+                with tempfile.NamedTemporaryFile(
+                    dir=path.parent, prefix=f"{path.name}.", delete=False
+                ) as f:
+                    f.truncate(size)
+                os.replace(f.name, path)
+            with tempfile.NamedTemporaryFile(
+                mode="w",
+                encoding="utf-8",
+                dir=self._header_path.parent,
+                prefix=f"{self._header_path.name}.",
+                delete=False,
+            ) as f:
+                json.dump(
+                    {
+                        "model": self.model,
+                        "dimension": dimension,
+                        "max_entries": self.max_entries,
+                    },
+                    f,
+                )
+            os.replace(f.name, self._header_path)
+            header_dimension = dimension
+
+        self._dimension = header_dimension
+        self._slots.clear()
+        self._matrix = np.memmap(
+            self._matrix_path,
+            dtype=np.float32,
+            mode="r+",
+            shape=(self.max_entries, header_dimension),
+        )
+        self._keys = np.memmap(
+            self._keys_path,
+            dtype=np.uint8,
+            mode="r+",
+            shape=(self.max_entries, KEY_BYTES),
+        )
+        self._keys_inode = os.stat(self._keys_path).st_ino
@@ -0,0 +1,92 @@
+"""
+Module for the adaptive vector retriever.
+
+Instead of always returning a fixed number of documents, this retriever fetches a pool of candidates
+and keeps only the leading documents that are clearly relevant, within a token budget.
+"""
+
+# Python Standard Library imports
+from typing import Any
+
+# Third-party Library imports
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from langchain_core.callbacks import (
+    CallbackManagerForRetrieverRun,
+    AsyncCallbackManagerForRetrieverRun,
+)
+
+# Custom Library imports
+from sc2editor.llm.token_budget import estimate_tokens
+
+
+class AdaptiveVectorRetriever(BaseRetriever):
+    """Retriever that cuts the candidates off at a score threshold or score gap and caps them by a token budget."""
+
+    vector_store: VectorStore
+    """Vector store searched with scores"""
+    candidate_k: int = 50
+    """Number of candidates fetched from the vector store"""
+    score_threshold: float = 0.5
+    """Minimum score of a returned document"""
+    score_gap: float = 0.15
+    """A drop in score larger than this between two consecutive candidates ends the result"""
+    token_budget: int = 4000
+    """Maximum estimated tokens of the returned documents"""
+    min_k: int = 1
+    """Number of leading candidates returned regardless of the score cut-off, if they fit in the budget"""
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs: Any
+    ) -> list[Document]:
+        docs_and_scores = self.vector_store.similarity_search_with_score(
+            query, k=self.candidate_k, **kwargs
+        )
+        return self._select(docs_and_scores)
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        **kwargs: Any,
+    ) -> list[Document]:
+        docs_and_scores = await self.vector_store.asimilarity_search_with_score(
+            query, k=self.candidate_k, **kwargs
+        )
+        return self._select(docs_and_scores)
+
+    def _select(self, docs_and_scores: list[tuple[Document, float]]) -> list[Document]:
+        """
+        Keep the leading candidates before the score cut-off that fit in the token budget.
+
+        Args:
+            docs_and_scores: Candidates with their scores, most similar first
+
+        Returns:
+            Selected documents, most similar first
+        """
+        selected_docs = list()
+        remaining_tokens = self.token_budget
+        previous_score = None
+
+        for idx, (doc, score) in enumerate(docs_and_scores):
+            if idx >= self.min_k and (
+                score < self.score_threshold
+                or (
+                    previous_score is not None
+                    and previous_score - score > self.score_gap
+                )
+            ):
+                break
+            previous_score = score
+
+            tokens = estimate_tokens(doc.page_content)
+            if tokens > remaining_tokens:
+                break
+            remaining_tokens -= tokens
+
+            selected_docs.append(doc)
+
+        return selected_docs
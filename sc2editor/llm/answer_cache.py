@@ -0,0 +1,222 @@
+"""
+Module for the semantic answer cache.
+
+This module stores streamed answers together with the embedding of the question that produced them,
+so that a sufficiently similar question can be answered again without running the LLM pipeline.
+"""
+
+# Python Standard Library imports
+import time
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+
+# Third-party Library imports
+import numpy as np
+from langchain_core.messages import BaseMessage
+
+
+def normalize_question(question: str) -> str:
+    """
+    Function to normalize a question before it is embedded.
+
+    Args:
+        question: Current prompt
+
+    Returns:
+        Lower-cased question with runs of whitespace collapsed
+    """
+    return " ".join(question.lower().split())
+
+
+def history_fingerprint(history: list[BaseMessage], turns: int) -> str:
+    """
+    Function to create a short fingerprint of the most recent conversation history.
+
+    Answers are only shared between questions whose recent history has the same fingerprint,
+    so that a follow-up question is never answered with the answer to a standalone question.
+
+    Args:
+        history: Conversation history before the current prompt
+        turns: Number of most recent messages included in the fingerprint
+
+    Returns:
+        Hex digest of the normalized recent messages
+    """
+    recent_history = history[-turns:] if turns > 0 else list()
+    digest = hashlib.sha256()
+
+    for msg in recent_history:
+        digest.update(msg.type.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(normalize_question(str(msg.content)).encode("utf-8"))
+        digest.update(b"\x00")
+
+    return digest.hexdigest()[:16]
+
+
+@dataclass(slots=True)
+class CachedAnswer:
+    """An answer stored in the semantic answer cache."""
+
+    fingerprint: str
+    embedding: np.ndarray
+    chunks: list[str]
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """LRU cache of streamed answers keyed by question embedding similarity, with a TTL per entry."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl: int | float = 3600.0,
+    ):
+        """
+        Initialize an empty semantic answer cache.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity between two questions to reuse an answer
+            max_entries: Maximum number of answers kept. The least recently used answer is evicted first.
+            ttl: Time to live of an answer in seconds
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: OrderedDict[int, CachedAnswer] = OrderedDict()
+        self._next_key = 0
+        # Incremented by clear(), so answers generated before a clear are not stored after it
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, embedding: list[float], fingerprint: str) -> list[str] | None:
+        """
+        Find the answer of the most similar cached question with the same history fingerprint.
+
+        Args:
+            embedding: Embedding of the normalized question
+            fingerprint: Fingerprint of the recent conversation history
+
+        Returns:
+            Streamed chunks of the cached answer, or None if no cached question is similar enough
+        """
+        self._expire()
+
+        candidate_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.fingerprint == fingerprint
+        ]
+        if not candidate_keys:
+            self.misses += 1
+            return None
+
+        candidate_matrix = np.stack(
+            [self._entries[key].embedding for key in candidate_keys]
+        )
+        similarities = candidate_matrix @ self._unit_vector(embedding)
+        best_idx = int(np.argmax(similarities))
+
+        if similarities[best_idx] < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        best_key = candidate_keys[best_idx]
+        self._entries.move_to_end(best_key)
+        self.hits += 1
+
+        return list(self._entries[best_key].chunks)
+
+    def store(
+        self,
+        embedding: list[float],
+        fingerprint: str,
+        chunks: list[str],
+        generation: int | None = None,
+    ):
+        """
+        Store the streamed chunks of an answer.
+
+        Args:
+            embedding: Embedding of the normalized question
+            fingerprint: Fingerprint of the recent conversation history
+            chunks: Streamed chunks of the answer
+            generation: Generation of the cache when the answer started streaming. If the cache was cleared since, the answer is not stored.
+        """
+        if generation is not None and generation != self.generation:
+            return None
+
+        self._entries[self._next_key] = CachedAnswer(
+            fingerprint=fingerprint,
+            embedding=self._unit_vector(embedding),
+            chunks=list(chunks),
+            created_at=time.monotonic(),
+        )
+        self._next_key += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove every cached answer, e.g. after the graph database was re-ingested"""
+        self._entries.clear()
+        self.generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Return the counters of the cache.
+
+        Returns:
+            Number of entries, hits, misses, evictions, invalidations and the hit rate
+        """
+        lookups = self.hits + self.misses
+
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _expire(self):
+        """Remove answers older than the time to live"""
+        expired_before = time.monotonic() - self.ttl
+        expired_keys = [
+            key
+            for key, entry in self._entries.items()
+            if entry.created_at < expired_before
+        ]
+
+        for key in expired_keys:
+            del self._entries[key]
+        self.evictions += len(expired_keys)
+
+    @staticmethod
+    def _unit_vector(embedding: list[float]) -> np.ndarray:
+        """
+        Convert an embedding to a float32 unit vector so that a dot product is the cosine similarity.
+
+        Args:
+            embedding: Embedding vector
+
+        Returns:
+            Normalized embedding vector
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm else vector
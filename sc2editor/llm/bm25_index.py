@@ -0,0 +1,198 @@
+"""
+Module for the local keyword index.
+
+This module builds an inverted BM25 index over the texts of the Document nodes,
+so the keyword part of a hybrid search is answered in memory instead of by the Neo4j full-text index.
+Postings are stored in flat NumPy arrays (one slice per term), which are saved to and loaded from a snapshot file.
+Texts are split with the same tokenizer as the entity matcher, so 'Marines' in a prompt matches 'marine' in a document.
+"""
+
+# Python Standard Library imports
+import os
+import tempfile
+from pathlib import Path
+from collections import Counter
+
+# Third-party Library imports
+import numpy as np
+
+# Custom Library imports
+from sc2editor.llm.entity_matcher import STOPWORDS, tokenize
+
+
+class BM25Index:
+    """Inverted BM25 index over a fixed list of documents."""
+
+    def __init__(
+        self,
+        vocabulary: list[str],
+        offsets: np.ndarray,
+        document_ids: np.ndarray,
+        term_frequencies: np.ndarray,
+        document_lengths: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        """
+        Initialize the index from its postings. Use build() or load() to create one.
+
+        Args:
+            vocabulary: Indexed terms
+            offsets: Start of the postings of each term in document_ids and term_frequencies, plus the total length
+            document_ids: Document of each posting
+            term_frequencies: Number of occurrences of the term in the document of each posting
+            document_lengths: Number of words of each document
+            k1: Term frequency saturation
+            b: Length normalization
+        """
+        self._term_index = {term: idx for idx, term in enumerate(vocabulary)}
+        self._offsets = offsets
+        self._document_ids = document_ids
+        self._term_frequencies = term_frequencies
+        self._document_lengths = document_lengths
+        self.k1 = k1
+
+        document_count = len(document_lengths)
+        document_frequencies = np.diff(offsets).astype(np.float32)
+        self._inverse_document_frequencies = np.log(
+            1
+            + (document_count - document_frequencies + 0.5)
+            / (document_frequencies + 0.5)
+        )
+        average_length = float(document_lengths.mean()) if document_count else 1.0
+        self._length_norms = k1 * (
+            1 - b + b * document_lengths / max(average_length, 1.0)
+        )
+
+    def __len__(self) -> int:
+        return len(self._document_lengths)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._term_index)
+
+    @classmethod
+    def build(cls, texts: list[str]) -> "BM25Index":
+        """
+        Build the index over the texts.
+
+        Args:
+            texts: Text of each document
+
+        Returns:
+            BM25 index whose document ids are the positions of the texts
+        """
+        postings: dict[str, list[tuple[int, int]]] = dict()
+        document_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for document_id, text in enumerate(texts):
+            words = tokenize(text)
+            document_lengths[document_id] = len(words)
+            for term, count in Counter(
+                word for word in words if word not in STOPWORDS
+            ).items():
+                postings.setdefault(term, list()).append((document_id, count))
+
+        vocabulary = sorted(postings)
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in vocabulary])
+        document_ids = np.fromiter(
+            (document_id for term in vocabulary for document_id, _ in postings[term]),
+            dtype=np.int32,
+            count=offsets[-1],
+        )
+        term_frequencies = np.fromiter(
+            (count for term in vocabulary for _, count in postings[term]),
+            dtype=np.float32,
+            count=offsets[-1],
+        )
+
+        return cls(
+            vocabulary, offsets, document_ids, term_frequencies, document_lengths
+        )
+
+    def save(self, path: str | Path):
+        """
+        Save the postings to a file, replaced atomically.
+
+        Args:
+            path: Path of the .npz snapshot file
+        """
+        path = Path(path)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, prefix=path.name + ".", delete=False
+        ) as f:
+            np.savez(
+                f,
+                vocabulary=np.array(list(self._term_index), dtype=str),
+                offsets=self._offsets,
+                document_ids=self._document_ids,
+                term_frequencies=self._term_frequencies,
+                document_lengths=self._document_lengths,
+            )
+        os.replace(f.name, path)
+
+    @classmethod
+    def load(cls, path: str | Path, document_count: int) -> "BM25Index | None":
+        """
+        Load the postings from a file if it was saved for the same number of documents.
+
+        Args:
+            path: Path of the .npz snapshot file
+            document_count: Number of documents the index must cover
+
+        Returns:
+            BM25 index, or None if the file is missing or does not match
+        """
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                if len(arrays["document_lengths"]) != document_count:
+                    return None
+                return cls(
+                    arrays["vocabulary"].tolist(),
+                    arrays["offsets"],
+                    arrays["document_ids"],
+                    arrays["term_frequencies"],
+                    arrays["document_lengths"],
+                )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def search(self, query: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the documents with the highest BM25 score for the query.
+
+        Args:
+            query: Search query
+            k: Maximum number of documents
+
+        Returns:
+            Document ids, best first, and their BM25 scores. Documents without any query term are not returned.
+        """
+        term_ids = [
+            self._term_index[term]
+            for term in dict.fromkeys(tokenize(query))
+            if term not in STOPWORDS and term in self._term_index
+        ]
+        if not term_ids or k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = np.zeros(len(self._document_lengths), dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            document_ids = self._document_ids[start:end]
+            term_frequencies = self._term_frequencies[start:end]
+            # A document appears once in the postings of a term, so the fancy-indexed addition is safe
+            scores[document_ids] += (
+                self._inverse_document_frequencies[term_id]
+                * term_frequencies
+                * (self.k1 + 1)
+                / (term_frequencies + self._length_norms[document_ids])
+            )
+
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return candidates.astype(np.int64), scores[candidates]
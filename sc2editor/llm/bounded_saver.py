@@ -0,0 +1,70 @@
+"""
+Module for the bounded in-memory checkpointer.
+
+The state of a conversation is only needed while its request runs, since the application deletes it afterwards.
+This module keeps the checkpoints of a bounded number of threads, so threads that are never deleted,
+e.g. because the client disconnected before cleanup, cannot grow the memory of the server without limit.
+"""
+
+# Python Standard Library imports
+from collections import OrderedDict
+from typing import Any
+
+# Third-party Library imports
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import Checkpoint, CheckpointMetadata, ChannelVersions
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """InMemorySaver that keeps the checkpoints of at most max_threads threads, evicting the least recently written first."""
+
+    def __init__(self, max_threads: int = 256):
+        """
+        Initialize an empty checkpointer.
+
+        Args:
+            max_threads: Maximum number of threads whose checkpoints are kept
+        """
+        super().__init__()
+        self.max_threads = max_threads
+        self.evictions = 0
+        self._threads: OrderedDict[str, None] = OrderedDict()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and evict the least recently written threads beyond max_threads"""
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+
+        thread_id = config["configurable"]["thread_id"]
+        self._threads[thread_id] = None
+        self._threads.move_to_end(thread_id)
+        while len(self._threads) > self.max_threads:
+            evicted_thread_id, _ = self._threads.popitem(last=False)
+            super().delete_thread(evicted_thread_id)
+            self.evictions += 1
+
+        return next_config
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID"""
+        self._threads.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the counters of the checkpointer.
+
+        Returns:
+            Number of threads with checkpoints, the maximum number of threads and the number of evicted threads
+        """
+        return {
+            "threads": len(self._threads),
+            "max_threads": self.max_threads,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,240 @@
+"""
+Module for the token-budgeted conversation history.
+
+The most recent messages of a conversation are sent to the LLM verbatim, as long as they fit in a token budget,
+and the older messages are replaced with a summary. Summaries are cached under the fingerprint of the messages
+they summarize, so the next turn of the same conversation only summarizes the messages that left the window since.
+Each prompt can further cut the history to its own token budget, oldest messages first, leaving a marker where it cut.
+"""
+
+# Python Standard Library imports
+import hashlib
+from collections import OrderedDict
+
+# Third-party Library imports
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+
+# Custom Library imports
+from sc2editor.llm.token_budget import CHARS_PER_TOKEN, estimate_tokens
+
+
+def format_message(msg: BaseMessage) -> str:
+    """
+    Function to format a message as a line of the conversation history.
+
+    Args:
+        msg: Message of the conversation history
+
+    Returns:
+        Message prefixed with its speaker
+    """
+    if isinstance(msg, HumanMessage):
+        return f"- Human: {msg.content}"
+    elif isinstance(msg, AIMessage):
+        return f"- AI: {msg.content}"
+    elif isinstance(msg, SystemMessage):
+        return f"- System: {msg.content}"
+    else:
+        return f"- Unknown: {msg.content}"
+
+
+def recent_window_start(lines: list[str], token_budget: int) -> int:
+    """
+    Function to find the first line of the most recent lines that fit in a token budget.
+
+    The last line, which is the current prompt, is always kept even if it exceeds the budget on its own.
+
+    Args:
+        lines: Formatted messages of the conversation history, oldest first
+        token_budget: Maximum estimated tokens of the kept lines
+
+    Returns:
+        Index of the first kept line
+    """
+    start = len(lines)
+    tokens = 0
+
+    while start > 0:
+        tokens += estimate_tokens(lines[start - 1]) + 1
+        if tokens > token_budget and start < len(lines):
+            break
+        start -= 1
+
+    return start
+
+
+def cut_marker(count: int) -> str:
+    """
+    Function to create the marker that replaces the messages cut from the conversation history.
+
+    Args:
+        count: Number of cut messages
+
+    Returns:
+        Marker text
+    """
+    return f"[{count} earlier messages of the conversation were cut to fit the token budget]"
+
+
+def truncate_lines(lines: list[str], token_budget: int) -> str:
+    """
+    Function to join the most recent formatted messages that fit in a token budget.
+
+    Args:
+        lines: Formatted messages of the conversation history, oldest first
+        token_budget: Maximum estimated tokens of the kept lines
+
+    Returns:
+        Conversation history converted to text, starting with a marker if older lines were cut
+    """
+    start = recent_window_start(lines, token_budget)
+    if start == 0:
+        return "\n".join(lines)
+
+    return "\n".join([f"- {cut_marker(start)}"] + lines[start:])
+
+
+def truncate_messages(
+    messages: list[BaseMessage], token_budget: int
+) -> list[BaseMessage]:
+    """
+    Function to keep the most recent messages that fit in a token budget.
+
+    Args:
+        messages: Conversation history, oldest first
+        token_budget: Maximum estimated tokens of the kept messages
+
+    Returns:
+        Kept messages, starting with a system message marking the cut if older messages were cut
+    """
+    start = recent_window_start([format_message(msg) for msg in messages], token_budget)
+    if start == 0:
+        return messages
+
+    return [SystemMessage(cut_marker(start))] + messages[start:]
+
+
+def cut_message(msg: BaseMessage, token_budget: int) -> BaseMessage:
+    """
+    Function to cut the end of a message that exceeds a token budget.
+
+    Args:
+        msg: Message of the conversation history
+        token_budget: Maximum estimated tokens of the message
+
+    Returns:
+        The message itself if it fits, otherwise a copy whose content ends with a marker where it was cut
+    """
+    content = str(msg.content)
+    if estimate_tokens(content) <= token_budget:
+        return msg
+
+    kept_content = content[: token_budget * CHARS_PER_TOKEN]
+    return msg.model_copy(
+        update={
+            "content": f"{kept_content}\n[{len(content) - len(kept_content)} characters of this message were cut to fit the token budget]"
+        }
+    )
+
+
+def prefix_fingerprints(messages: list[BaseMessage]) -> list[str]:
+    """
+    Function to fingerprint every prefix of a conversation history.
+
+    Args:
+        messages: Conversation history, oldest first
+
+    Returns:
+        Fingerprints whose i-th item identifies messages[: i + 1]
+    """
+    digest = hashlib.sha256()
+    fingerprints = list()
+
+    for msg in messages:
+        digest.update(msg.type.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(str(msg.content).encode("utf-8"))
+        digest.update(b"\x00")
+        fingerprints.append(digest.copy().hexdigest())
+
+    return fingerprints
+
+
+class HistorySummaryCache:
+    """LRU cache of conversation summaries, keyed by the fingerprint of the summarized messages."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize an empty summary cache.
+
+        Args:
+            max_entries: Maximum number of summaries kept. The least recently used summary is evicted first.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, fingerprints: list[str]) -> tuple[int, str] | None:
+        """
+        Return the summary of the longest summarized prefix of a conversation.
+
+        Args:
+            fingerprints: Prefix fingerprints of the messages to summarize, as returned by prefix_fingerprints
+
+        Returns:
+            Number of messages the summary covers and the summary, or None if no prefix was summarized
+        """
+        for idx in range(len(fingerprints) - 1, -1, -1):
+            summary = self._entries.get(fingerprints[idx])
+            if summary is None:
+                continue
+
+            self._entries.move_to_end(fingerprints[idx])
+            if idx == len(fingerprints) - 1:
+                self.hits += 1
+            else:
+                self.partial_hits += 1
+            return idx + 1, summary
+
+        self.misses += 1
+        return None
+
+    def store(self, fingerprint: str, summary: str):
+        """
+        Store the summary of a prefix of a conversation.
+
+        Args:
+            fingerprint: Fingerprint of the last summarized message, as returned by prefix_fingerprints
+            summary: Summary of the messages up to and including that message
+        """
+        self._entries[fingerprint] = summary
+        self._entries.move_to_end(fingerprint)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Return the counters of the cache.
+
+        Returns:
+            Number of entries, full hits, partial hits that only summarized the newer messages, misses, evictions and the hit rate
+        """
+        lookups = self.hits + self.partial_hits + self.misses
+
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.partial_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
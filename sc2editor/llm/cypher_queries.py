@@ -0,0 +1,209 @@
+# CYPHER QUERIES
+# Statistics of Neo4j database
+# All statistics in one round trip, together with the graph version they were counted at
+# Counting all nodes, the nodes of one label and all relationships is answered by the count store without scanning the graph
+# The __GraphVersion__ bookkeeping node is not part of the graph, so it is subtracted from the node count
+GRAPH_STATISTICS_QUERY = """
+CALL { MATCH (n) RETURN count(n) AS AllNodes }
+CALL { MATCH (v:__GraphVersion__) RETURN count(v) AS VersionNodes }
+CALL { MATCH ()-[r]->() RETURN count(r) AS TotalRelationships }
+CALL { MATCH (d:Document) WHERE d.embedding IS NOT NULL RETURN count(d) AS EmbeddingText }
+OPTIONAL MATCH (v:__GraphVersion__)
+RETURN AllNodes - VersionNodes AS TotalNodes, TotalRelationships, EmbeddingText, coalesce(v.version, 0) AS GraphVersion;
+"""
+
+# Ids of all entity nodes, used to build the local entity matcher
+ENTITY_IDS_QUERY = """
+MATCH (n:__Entity__)
+WHERE n.id IS NOT NULL
+RETURN n.id AS id;
+"""
+
+# Texts, metadata and embeddings of all embedded documents, used to build the local vector index
+# The metadata is the same as the one returned by Neo4jVector
+DOCUMENT_EMBEDDINGS_QUERY = """
+MATCH (d:Document)
+WHERE d.embedding IS NOT NULL
+RETURN d.text AS text, d {.*, text: Null, embedding: Null, id: Null} AS metadata, d.embedding AS embedding;
+"""
+
+# Nodes and relationships of the graph retrieval, used to build the in-memory graph snapshot
+# Only nodes with an id and at least one relationship other than MENTIONS can appear in the keyword lookups
+GRAPH_SNAPSHOT_NODES_QUERY = """
+MATCH (n)
+WHERE n.id IS NOT NULL AND EXISTS { (n)-[r]-() WHERE type(r) <> 'MENTIONS' }
+RETURN elementId(n) AS element_id, n.id AS id, n.text AS text, COUNT { (n)--() } AS degree;
+"""
+
+GRAPH_SNAPSHOT_RELATIONSHIPS_QUERY = """
+MATCH (source)-[r]->(target)
+WHERE type(r) <> 'MENTIONS' AND source.id IS NOT NULL AND target.id IS NOT NULL
+RETURN elementId(source) AS source, elementId(target) AS target, type(r) AS type;
+"""
+
+# Version of the graph database, increased every time the graph or its embeddings are (re-)ingested
+GRAPH_VERSION_QUERY = """
+OPTIONAL MATCH (v:__GraphVersion__)
+RETURN coalesce(v.version, 0) AS GraphVersion;
+"""
+
+BUMP_GRAPH_VERSION_QUERY = """
+MERGE (v:__GraphVersion__)
+SET v.version = coalesce(v.version, 0) + 1, v.updated_at = datetime()
+RETURN v.version AS GraphVersion;
+"""
+
+# Full-text index over the id and text properties of entity and document nodes
+# The english analyzer lower-cases and stems, so 'Units' also matches 'unit'
+FULLTEXT_INDEX_NAME = "node_id_text"
+
+CREATE_FULLTEXT_INDEX_QUERY = f"""
+CREATE FULLTEXT INDEX {FULLTEXT_INDEX_NAME} IF NOT EXISTS
+FOR (n:__Entity__|Document) ON EACH [n.id, n.text]
+OPTIONS {{indexConfig: {{`fulltext.analyzer`: 'english'}}}};
+"""
+
+
+FULLTEXT_INDEX_ONLINE_QUERY = """
+SHOW FULLTEXT INDEXES
+YIELD name, state
+WHERE name = $index_name AND state = 'ONLINE'
+RETURN count(*) > 0 AS IndexOnline;
+"""
+
+# Vector and keyword indexes of the Document embeddings, created by Neo4jVector.from_existing_graph
+VECTOR_INDEX_NAME = "vector"
+KEYWORD_INDEX_NAME = "keyword"
+
+VECTOR_INDEX_DIMENSIONS_QUERY = """
+SHOW VECTOR INDEXES
+YIELD name, options
+WHERE name = $index_name
+RETURN options.indexConfig['vector.dimensions'] AS EmbeddingDimensions;
+"""
+
+# Same text and metadata as the retrieval query built by Neo4jVector.from_existing_graph for the text property
+DOCUMENT_RETRIEVAL_QUERY = """
+RETURN reduce(str='', k IN ['text'] | str + '\\n' + k + ': ' + coalesce(node[k], '')) AS text,
+node {.*, `embedding`: Null, id: Null, `text`: Null} AS metadata, score
+"""
+
+# Keyword graph lookups
+# Every keyword gets its own LIMIT inside the subquery, so all keywords are looked up in one round trip
+# The full-text lookup matches whole words (and prefixes of single-word keywords, see lucene_keyword_query)
+# of __Entity__ and Document nodes only, while the CONTAINS lookup matches any substring of any node.
+# Keywords without full-text hits are therefore looked up again with CONTAINS.
+KEYWORD_FULLTEXT_QUERY = """
+UNWIND $keywords AS keyword
+CALL {
+    WITH keyword
+    CALL db.index.fulltext.queryNodes($index_name, keyword.search) YIELD node, score
+    MATCH (node)-[r]-(neighbor)
+    WHERE type(r) <> 'MENTIONS'
+    RETURN CASE
+        WHEN startNode(r) = node
+        THEN node.id + ' - ' + type(r) + ' -> ' + neighbor.id
+        ELSE neighbor.id + ' - ' + type(r) + ' -> ' + node.id
+    END AS output, score
+    ORDER BY score DESC
+    LIMIT $keyword_limit
+}
+RETURN keyword.keyword AS keyword, collect(output) AS outputs;
+"""
+
+KEYWORD_CONTAINS_QUERY = """
+UNWIND $keywords AS keyword
+CALL {
+    WITH keyword
+    MATCH (node)
+    WHERE toLower(node.id) CONTAINS keyword.keyword OR toLower(node.text) CONTAINS keyword.keyword
+    MATCH (node)-[r]-(neighbor)
+    WHERE type(r) <> 'MENTIONS'
+    RETURN CASE
+        WHEN startNode(r) = node
+        THEN node.id + ' - ' + type(r) + ' -> ' + neighbor.id
+        ELSE neighbor.id + ' - ' + type(r) + ' -> ' + node.id
+    END AS output
+    LIMIT $keyword_limit
+}
+RETURN keyword.keyword AS keyword, collect(output) AS outputs;
+"""
+
+
+# Keyword graph lookups for ranked retrieval
+# Each candidate edge comes with the match score of its node and the degree of its neighbor, so that it can be ranked
+KEYWORD_FULLTEXT_RANKED_QUERY = """
+UNWIND $keywords AS keyword
+CALL {
+    WITH keyword
+    CALL db.index.fulltext.queryNodes($index_name, keyword.search) YIELD node, score
+    MATCH (node)-[r]-(neighbor)
+    WHERE type(r) <> 'MENTIONS'
+    RETURN CASE
+        WHEN startNode(r) = node
+        THEN node.id + ' - ' + type(r) + ' -> ' + neighbor.id
+        ELSE neighbor.id + ' - ' + type(r) + ' -> ' + node.id
+    END AS output, score, type(r) AS type, COUNT { (neighbor)--() } AS degree
+    ORDER BY score DESC
+    LIMIT $keyword_limit
+}
+RETURN keyword.keyword AS keyword, collect({output: output, score: score, type: type, degree: degree}) AS outputs;
+"""
+
+# An exact id match scores above a partial id match, which scores above a match in the text only
+KEYWORD_CONTAINS_RANKED_QUERY = """
+UNWIND $keywords AS keyword
+CALL {
+    WITH keyword
+    MATCH (node)
+    WHERE toLower(node.id) CONTAINS keyword.keyword OR toLower(node.text) CONTAINS keyword.keyword
+    WITH node, CASE
+        WHEN toLower(node.id) = keyword.keyword THEN 1.0
+        WHEN toLower(node.id) CONTAINS keyword.keyword THEN 0.75
+        ELSE 0.5
+    END AS score
+    MATCH (node)-[r]-(neighbor)
+    WHERE type(r) <> 'MENTIONS'
+    RETURN CASE
+        WHEN startNode(r) = node
+        THEN node.id + ' - ' + type(r) + ' -> ' + neighbor.id
+        ELSE neighbor.id + ' - ' + type(r) + ' -> ' + node.id
+    END AS output, score, type(r) AS type, COUNT { (neighbor)--() } AS degree
+    ORDER BY score DESC
+    LIMIT $keyword_limit
+}
+RETURN keyword.keyword AS keyword, collect({output: output, score: score, type: type, degree: degree}) AS outputs;
+"""
+
+
+def lucene_phrase(keyword: str) -> str:
+    """
+    Convert a keyword to a Lucene phrase query so that special characters in the keyword are matched literally.
+
+    Args:
+        keyword: Keyword to be searched in the full-text index
+
+    Returns:
+        Lucene phrase query
+    """
+    escaped_keyword = keyword.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped_keyword}"'
+
+
+def lucene_keyword_query(keyword: str) -> str:
+    """
+    Convert a keyword to the Lucene query of the keyword graph lookup.
+
+    The phrase is analyzed like the indexed text, so 'Units' matches 'unit'.
+    A single-word keyword is also matched as a prefix, so 'zerg' still finds 'Zergling' like the CONTAINS lookup.
+
+    Args:
+        keyword: Lower-cased keyword to be searched in the full-text index
+
+    Returns:
+        Lucene query
+    """
+    if keyword.isalnum():
+        return f"{lucene_phrase(keyword)} OR {keyword}*"
+
+    return lucene_phrase(keyword)
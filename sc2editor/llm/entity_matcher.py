@@ -0,0 +1,192 @@
+"""
+Module for local entity extraction.
+
+This module builds an Aho-Corasick automaton over the ids of the entity nodes in the graph database,
+so the entities mentioned in a prompt can be found without calling an LLM.
+Matching is done on case-folded words, and plural words are reduced to their singular form on both sides,
+so 'Marines' in a prompt matches the node 'Marine'.
+"""
+
+# Python Standard Library imports
+import re
+from collections import deque
+from typing import Iterable
+
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Node ids consisting only of these words are too common to be useful keywords
+STOPWORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "can",
+        "do",
+        "for",
+        "from",
+        "how",
+        "i",
+        "if",
+        "in",
+        "is",
+        "it",
+        "me",
+        "my",
+        "no",
+        "not",
+        "of",
+        "on",
+        "or",
+        "so",
+        "that",
+        "the",
+        "this",
+        "to",
+        "use",
+        "what",
+        "when",
+        "with",
+        "you",
+    }
+)
+
+
+def stem(word: str) -> str:
+    """
+    Function to reduce a case-folded English plural word to its singular form.
+
+    Args:
+        word: Case-folded word
+
+    Returns:
+        Singular form of the word, or the word itself if it does not look like a plural
+    """
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "xes", "zes", "ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Function to split a text into case-folded singular words.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Normalized words of the text
+    """
+    return [stem(word) for word in WORD_PATTERN.findall(text.casefold())]
+
+
+class EntityMatcher:
+    """Aho-Corasick automaton over the words of entity node ids."""
+
+    def __init__(self, entity_ids: Iterable[str]):
+        """
+        Build the automaton.
+
+        Args:
+            entity_ids: Ids of the entity nodes in the graph database
+        """
+        # Transitions, failure links and matched entities of every state. State 0 is the root.
+        self._goto: list[dict[str, int]] = [dict()]
+        self._fail: list[int] = [0]
+        # (number of words, entity id) of the entities ending in a state
+        self._outputs: list[list[tuple[int, str]]] = [list()]
+        self.entity_count = 0
+
+        for entity_id in entity_ids:
+            self._add(entity_id)
+        self._link()
+
+    def __len__(self) -> int:
+        return self.entity_count
+
+    def _add(self, entity_id: str):
+        """
+        Add the words of an entity id to the trie.
+
+        Args:
+            entity_id: Id of an entity node
+        """
+        words = tokenize(entity_id)
+        if not words or all(word in STOPWORDS for word in words):
+            return None
+
+        state = 0
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][word] = next_state
+                self._goto.append(dict())
+                self._fail.append(0)
+                self._outputs.append(list())
+            state = next_state
+
+        # Ids that differ only in case or number ('Unit', 'units') are the same keyword, the first one is kept
+        if not any(length == len(words) for length, _ in self._outputs[state]):
+            self._outputs[state].append((len(words), entity_id))
+            self.entity_count += 1
+
+    def _link(self):
+        """Create the failure links breadth-first and merge the outputs reachable through them"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail_state = self._fail[state]
+                while fail_state and word not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(word, 0)
+                self._outputs[next_state] = (
+                    self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                )
+
+    def extract(self, text: str) -> list[str]:
+        """
+        Find the entities mentioned in a text.
+
+        Where matches overlap, the longest one starting first is kept, so 'Trigger Editor' wins over 'Trigger'.
+
+        Args:
+            text: Text to search, e.g. the current prompt
+
+        Returns:
+            Matched entity ids in the order they appear in the text
+        """
+        matches = list()
+        state = 0
+
+        for end, word in enumerate(tokenize(text), start=1):
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+
+            for length, entity_id in self._outputs[state]:
+                matches.append((end - length, end, entity_id))
+
+        entities = list()
+        covered_until = 0
+        for start, end, entity_id in sorted(matches, key=lambda m: (m[0], m[0] - m[1])):
+            if start < covered_until:
+                continue
+            covered_until = end
+            if entity_id not in entities:
+                entities.append(entity_id)
+
+        return entities
@@ -0,0 +1,416 @@
+"""
+Module for the shared Gemini API client pool.
+
+ChatGoogleGenerativeAI and GoogleGenerativeAIEmbeddings each build their own gRPC client, so every chat model of
+the pipeline opens its own connection to the Gemini API, with its own TLS handshake and idle timeout.
+This module owns a small pool of keep-alive gRPC channels that every chat model and the embeddings share instead.
+A request goes to the channel with the fewest requests in flight, and a new channel is only opened while every
+open channel is busy, so sequential requests keep reusing one warm connection and max_connections bounds the rest.
+"""
+
+# Python Standard Library imports
+import os
+import asyncio
+import threading
+from importlib import metadata
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+# Third-party Library imports
+import grpc
+from google.auth import api_key as google_api_key
+from google.api_core.gapic_v1.client_info import ClientInfo
+from google.ai.generativelanguage_v1beta.services.generative_service import (
+    GenerativeServiceAsyncClient,
+    GenerativeServiceClient,
+)
+from google.ai.generativelanguage_v1beta.services.generative_service.transports import (
+    GenerativeServiceGrpcAsyncIOTransport,
+    GenerativeServiceGrpcTransport,
+)
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import Field, model_validator
+
+
+def client_info(component: str) -> ClientInfo:
+    """
+    Function to create the client info sent with the requests, like the clients built by langchain-google-genai.
+
+    Args:
+        component: Name of the LangChain component that sends the requests
+
+    Returns:
+        Client info whose user agent names the langchain-google-genai version and the component
+    """
+    try:
+        version = metadata.version("langchain-google-genai")
+    except metadata.PackageNotFoundError:
+        version = "0.0.0"
+
+    return ClientInfo(
+        client_library_version=f"{version}-{component}",
+        user_agent=f"langchain-google-genai/{version}-{component}",
+    )
+
+
+class ChannelStats:
+    """Request counters of one gRPC channel."""
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        # Synchronous requests are made on the threads of the embeddings executor
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def finish(self, *args):
+        with self._lock:
+            self.in_flight -= 1
+
+
+class _SyncUnaryUnaryCounter(grpc.UnaryUnaryClientInterceptor):
+    """Counts the unary calls of a synchronous channel, e.g. embed_content."""
+
+    def __init__(self, stats: ChannelStats):
+        self.stats = stats
+
+    def intercept_unary_unary(self, continuation, client_call_details, request):
+        self.stats.start()
+        try:
+            return continuation(client_call_details, request)
+        finally:
+            self.stats.finish()
+
+
+class _ApiKeyPlugin(grpc.AuthMetadataPlugin):
+    """Adds the API key to the metadata of every call."""
+
+    def __init__(self, credentials: google_api_key.Credentials):
+        self.credentials = credentials
+
+    def __call__(self, context, callback):
+        headers = dict()
+        self.credentials.apply(headers)
+        callback(tuple((key.lower(), value) for key, value in headers.items()), None)
+
+
+class GeminiClientPool:
+    """Shared keep-alive gRPC channels to the Gemini API, created on first use."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        max_connections: int = 4,
+        keepalive_time: int | float = 30.0,
+        keepalive_timeout: int | float = 10.0,
+        api_endpoint: str = "generativelanguage.googleapis.com:443",
+        use_tls: bool = True,
+    ):
+        """
+        Initialize the pool settings. No connection is made until a client is requested.
+
+        Args:
+            api_key: Gemini API key. If None, the GOOGLE_API_KEY environment variable is used.
+            max_connections: Maximum number of connections used by the async clients
+            keepalive_time: Interval in seconds of the keep-alive pings that keep idle connections open
+            keepalive_timeout: Time in seconds to wait for a keep-alive ping to be answered before the connection is closed
+            api_endpoint: Host and port of the Gemini API
+            use_tls: Whether to connect with TLS. Only a local stand-in server is reached without it.
+        """
+        self.api_key = api_key if api_key is not None else os.getenv("GOOGLE_API_KEY")
+        self.max_connections = max_connections
+        self.keepalive_time = keepalive_time
+        self.keepalive_timeout = keepalive_timeout
+        self.api_endpoint = api_endpoint
+        self.use_tls = use_tls
+
+        # gRPC async channels belong to the event loop they were created on
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._async_channels: list[grpc.aio.Channel] = list()
+        self._async_clients: list[GenerativeServiceAsyncClient] = list()
+        self._async_stats: list[ChannelStats] = list()
+        # Channels of a previous event loop, closed as soon as a new event loop uses the pool
+        self._stale_channels: list[grpc.aio.Channel] = list()
+        self._stale_close_task: asyncio.Task | None = None
+        self._sync_channel: grpc.Channel | None = None
+        self._sync_client: GenerativeServiceClient | None = None
+        self._sync_stats = ChannelStats()
+        self._sync_lock = threading.Lock()
+        self.channels_opened = 0
+
+    @property
+    def channel_options(self) -> list[tuple[str, Any]]:
+        """gRPC channel arguments of the pooled channels"""
+        return [
+            ("grpc.keepalive_time_ms", int(self.keepalive_time * 1000)),
+            ("grpc.keepalive_timeout_ms", int(self.keepalive_timeout * 1000)),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            # Otherwise gRPC may share one connection among channels to the same endpoint
+            ("grpc.use_local_subchannel_pool", 1),
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ]
+
+    def _channel_credentials(self) -> grpc.ChannelCredentials:
+        """TLS credentials that send the API key with every call"""
+        return grpc.composite_channel_credentials(
+            grpc.ssl_channel_credentials(),
+            grpc.metadata_call_credentials(
+                _ApiKeyPlugin(google_api_key.Credentials(self.api_key))
+            ),
+        )
+
+    def _open_async_channel(self):
+        """Open one more async channel and its client on the running event loop"""
+        if self.use_tls:
+            channel = grpc.aio.secure_channel(
+                self.api_endpoint,
+                self._channel_credentials(),
+                options=self.channel_options,
+            )
+        else:
+            channel = grpc.aio.insecure_channel(
+                self.api_endpoint, options=self.channel_options
+            )
+
+        self._async_channels.append(channel)
+        self._async_stats.append(ChannelStats())
+        self._async_clients.append(
+            GenerativeServiceAsyncClient(
+                transport=GenerativeServiceGrpcAsyncIOTransport(channel=channel),
+                client_info=client_info("ChatGoogleGenerativeAI"),
+            )
+        )
+        self.channels_opened += 1
+
+    def _least_busy(self) -> int | None:
+        """Return the index of the async channel to use, opening a new channel if every open channel is busy"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+
+        if self._loop is not loop:
+            # Channels of another event loop cannot be used, e.g. after asyncio.run() was called again
+            self._stale_channels.extend(self._async_channels)
+            self._async_channels.clear()
+            self._async_clients.clear()
+            self._async_stats.clear()
+            self._loop = loop
+            if self._stale_channels:
+                self._stale_close_task = loop.create_task(self._close_stale_channels())
+
+        if not self._async_clients:
+            self._open_async_channel()
+
+        idx = min(
+            range(len(self._async_stats)), key=lambda i: self._async_stats[i].in_flight
+        )
+        if (
+            self._async_stats[idx].in_flight > 0
+            and len(self._async_clients) < self.max_connections
+        ):
+            self._open_async_channel()
+            idx = len(self._async_clients) - 1
+
+        return idx
+
+    def async_client(self) -> GenerativeServiceAsyncClient | None:
+        """
+        Return the async client of the least busy channel, without counting a request on it.
+
+        Returns:
+            Async Gemini API client of the running event loop, or None outside an event loop
+        """
+        idx = self._least_busy()
+        return None if idx is None else self._async_clients[idx]
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[GenerativeServiceAsyncClient]:
+        """
+        Lease the async client of the least busy channel for one request, retries included.
+
+        The request is counted on the channel as soon as it is leased, so concurrent requests that are
+        leased before any of them is sent are still spread over the channels.
+
+        Yields:
+            Async Gemini API client of the running event loop
+        """
+        idx = self._least_busy()
+        client, stats = self._async_clients[idx], self._async_stats[idx]
+
+        stats.start()
+        try:
+            yield client
+        finally:
+            stats.finish()
+
+    def sync_client(self) -> GenerativeServiceClient:
+        """
+        Return the synchronous client, creating it on first use.
+
+        Returns:
+            Synchronous Gemini API client, safe to use from several threads
+        """
+        with self._sync_lock:
+            if self._sync_client is None:
+                if self.use_tls:
+                    channel = grpc.secure_channel(
+                        self.api_endpoint,
+                        self._channel_credentials(),
+                        options=self.channel_options,
+                    )
+                else:
+                    channel = grpc.insecure_channel(
+                        self.api_endpoint, options=self.channel_options
+                    )
+                self._sync_channel = channel
+                self._sync_client = GenerativeServiceClient(
+                    transport=GenerativeServiceGrpcTransport(
+                        channel=grpc.intercept_channel(
+                            channel, _SyncUnaryUnaryCounter(self._sync_stats)
+                        )
+                    ),
+                    client_info=client_info("GoogleGenerativeAIEmbeddings"),
+                )
+                self.channels_opened += 1
+
+        return self._sync_client
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the state of the channels that were opened.
+
+        Returns:
+            Maximum and opened connections, and the connectivity state, total requests and requests in flight of each channel
+        """
+        channels = [
+            {
+                "state": channel.get_state(try_to_connect=False).name,
+                "requests": stats.requests,
+                "in_flight": stats.in_flight,
+            }
+            for channel, stats in zip(self._async_channels, self._async_stats)
+        ]
+
+        metrics = {
+            "max_connections": self.max_connections,
+            "channels_opened": self.channels_opened,
+            "async": {
+                "channels": channels,
+                "requests": sum(channel["requests"] for channel in channels),
+                "in_flight": sum(channel["in_flight"] for channel in channels),
+            },
+        }
+        if self._sync_client is not None:
+            metrics["sync"] = {
+                "requests": self._sync_stats.requests,
+                "in_flight": self._sync_stats.in_flight,
+            }
+
+        return metrics
+
+    def close(self):
+        """Close the synchronous channel. The async channels can only be closed from a coroutine, see aclose()"""
+        with self._sync_lock:
+            if self._sync_channel is not None:
+                self._sync_channel.close()
+                self._sync_channel = None
+                self._sync_client = None
+
+    async def _close_stale_channels(self):
+        """Close the channels of previous event loops"""
+        channels = list(self._stale_channels)
+        self._stale_channels.clear()
+        await asyncio.gather(
+            *(channel.close() for channel in channels), return_exceptions=True
+        )
+
+    async def aclose(self):
+        """Close every channel, including the channels of previous event loops"""
+        if self._loop is asyncio.get_running_loop():
+            await asyncio.gather(
+                *(channel.close() for channel in self._async_channels),
+                return_exceptions=True,
+            )
+        else:
+            self._stale_channels.extend(self._async_channels)
+        if (
+            self._stale_close_task is not None
+            and self._stale_close_task.get_loop() is asyncio.get_running_loop()
+        ):
+            await self._stale_close_task
+        self._stale_close_task = None
+        await self._close_stale_channels()
+        self._async_channels.clear()
+        self._async_clients.clear()
+        self._async_stats.clear()
+        self._loop = None
+
+        self.close()
+
+
+class _LeasedClient:
+    """Client pool of a leased model copy, which always returns the leased client."""
+
+    def __init__(self, client: GenerativeServiceAsyncClient):
+        self.client = client
+
+    def async_client(self) -> GenerativeServiceAsyncClient:
+        return self.client
+
+
+class PooledChatGoogleGenerativeAI(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI whose requests go through the channels of a GeminiClientPool."""
+
+    client_pool: Any = Field(default=None, exclude=True)
+
+    @model_validator(mode="after")
+    def use_client_pool(self):
+        """Replace the client built for this model with the client of the pool"""
+        if self.client_pool is not None:
+            self.client = self.client_pool.sync_client()
+        return self
+
+    # ChatGoogleGenerativeAI sends its async requests with the client of this property.
+    # It is the only hook into langchain-google-genai, see tests/test_gemini_pool.py
+    @property
+    def async_client(self) -> GenerativeServiceAsyncClient | None:
+        if self.client_pool is None:
+            return super().async_client
+        return self.client_pool.async_client()
+
+    def _leased_copy(self, client: GenerativeServiceAsyncClient):
+        """Shallow copy of this model that sends its requests with a leased client"""
+        return self.model_copy(update={"client_pool": _LeasedClient(client)})
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        # The timeout of the model is otherwise not sent with the request
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        if self.client_pool is None:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+        async with self.client_pool.lease() as client:
+            return await super(
+                PooledChatGoogleGenerativeAI, self._leased_copy(client)
+            )._agenerate(messages, stop, run_manager, **kwargs)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        if self.client_pool is None:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+            return
+
+        async with self.client_pool.lease() as client:
+            async for chunk in super(
+                PooledChatGoogleGenerativeAI, self._leased_copy(client)
+            )._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
@@ -0,0 +1,204 @@
+"""
+Module for the graph query cache.
+
+This module caches the edges returned by the keyword graph lookups, keyed by keyword,
+so the keywords that come back on most requests ('Trigger', 'Unit', ...) are not looked up again every time.
+A cached result that cannot answer a lookup, e.g. one fetched with a smaller limit, is loaded again and replaced.
+Concurrent misses of the same key are coalesced into one query, and the whole cache is cleared
+when the graph version written by the ingestion scripts changes.
+"""
+
+# Python Standard Library imports
+import time
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+# Custom Library imports
+from sc2editor.llm.metrics import RunningStat
+
+
+@dataclass(slots=True)
+class CachedResult:
+    """A lookup result stored in the graph query cache."""
+
+    value: Any
+    created_at: float
+
+
+class GraphQueryCache:
+    """Async-safe LRU cache of lookup results with a TTL per entry and coalescing of concurrent misses."""
+
+    def __init__(self, max_entries: int = 1024, ttl: int | float = 300.0):
+        """
+        Initialize an empty graph query cache.
+
+        Args:
+            max_entries: Maximum number of results kept. The least recently used result is evicted first.
+            ttl: Time to live of a result in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries: OrderedDict[Hashable, CachedResult] = OrderedDict()
+        # Futures of the keys being loaded, awaited by concurrent lookups of the same keys
+        self._pending: dict[Hashable, asyncio.Future] = dict()
+        # Increased by clear(), so results loaded from the previous graph are not stored
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self.key_query_seconds_stat = RunningStat()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_many(
+        self,
+        keys: list[Hashable],
+        load: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+        usable: Callable[[Any], bool] | None = None,
+    ) -> dict[Hashable, Any]:
+        """
+        Return the results of the keys, loading the missing ones in one call.
+
+        Args:
+            keys: Keys to look up
+            load: Coroutine function that loads the results of a list of keys in one query
+            usable: Whether a cached or concurrently loaded result answers this lookup. If None, every result does.
+                Results that do not are loaded again with this load and replace the cached ones.
+
+        Returns:
+            A dictionary mapping each key to its result, in key order
+        """
+        now = time.monotonic()
+        results = dict()
+        missing_keys = list()
+        pending_futures = dict()
+
+        for key in dict.fromkeys(keys):
+            entry = self._entries.get(key)
+            if entry is not None and usable is not None and not usable(entry.value):
+                # Counted as a miss below, but the entry is replaced, not evicted
+                del self._entries[key]
+                entry = None
+
+            if entry is not None and now - entry.created_at < self.ttl:
+                self._entries.move_to_end(key)
+                results[key] = entry.value
+                self.hits += 1
+                self.saved_seconds += self.key_query_seconds_stat.stats()["mean"] or 0.0
+            elif key in self._pending:
+                pending_futures[key] = self._pending[key]
+                self.coalesced += 1
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                missing_keys.append(key)
+                self.misses += 1
+
+        if missing_keys:
+            results.update(await self._load(missing_keys, load))
+
+        reload_keys = list()
+        for key, future in pending_futures.items():
+            # Shielded, so a waiter that is cancelled does not cancel the lookup shared with others
+            results[key] = await asyncio.shield(future)
+            if usable is not None and not usable(results[key]):
+                reload_keys.append(key)
+
+        if reload_keys:
+            results.update(await self._load(reload_keys, load))
+
+        return {key: results[key] for key in dict.fromkeys(keys)}
+
+    async def _load(
+        self,
+        keys: list[Hashable],
+        load: Callable[[list[Hashable]], Awaitable[dict[Hashable, Any]]],
+    ) -> dict[Hashable, Any]:
+        """
+        Load the results of missing keys, sharing them with concurrent lookups of the same keys.
+
+        Args:
+            keys: Keys that are neither cached nor being loaded
+            load: Coroutine function that loads the results of a list of keys in one query
+
+        Returns:
+            A dictionary mapping each key to its result
+        """
+        loop = asyncio.get_running_loop()
+        futures = {key: loop.create_future() for key in keys}
+        self._pending.update(futures)
+        generation = self._generation
+
+        start = time.perf_counter()
+        try:
+            loaded = await load(keys)
+        except BaseException as e:
+            error = (
+                RuntimeError("The shared graph lookup was cancelled.")
+                if isinstance(e, asyncio.CancelledError)
+                else e
+            )
+            for key, future in futures.items():
+                future.set_exception(error)
+                # Marks the exception as retrieved, since there may be no other lookup waiting for it
+                future.exception()
+            raise
+        finally:
+            for key, future in futures.items():
+                if self._pending.get(key) is future:
+                    del self._pending[key]
+
+        elapsed = time.perf_counter() - start
+        self.key_query_seconds_stat.add(elapsed / len(keys))
+
+        created_at = time.monotonic()
+        for key, future in futures.items():
+            future.set_result(loaded[key])
+            if generation == self._generation:
+                self._entries[key] = CachedResult(
+                    value=loaded[key], created_at=created_at
+                )
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return loaded
+
+    def clear(self):
+        """Remove every cached result, e.g. after the graph database was re-ingested"""
+        self._entries.clear()
+        # Lookups already running finish for their own callers, but new lookups do not wait for them
+        self._pending.clear()
+        self._generation += 1
+        self.invalidations += 1
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Return the counters of the cache.
+
+        Returns:
+            Number of entries, hits, misses, coalesced misses, evictions, invalidations, the hit rate,
+            and the query time saved by the hits, estimated from the mean query time per key
+        """
+        lookups = self.hits + self.misses + self.coalesced
+
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "saved_query_seconds": self.saved_seconds,
+        }
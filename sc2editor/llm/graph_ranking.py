@@ -0,0 +1,79 @@
+"""
+Module for ranking graph data under a token budget.
+
+Candidate edges around the nodes matching the keywords are ranked by how well their node matched the keyword,
+by the priority of their relationship type, and by the degree of their neighbor.
+An edge to a neighbor connected to almost everything says little about the keyword, so hubs are ranked down.
+"""
+
+# Python Standard Library imports
+from math import log2
+from typing import Any
+
+# Custom Library imports
+from sc2editor.llm.token_budget import estimate_tokens
+
+
+def edge_relevance(
+    match_score: float,
+    degree: int,
+    edge_type: str,
+    edge_type_priority: dict[str, float],
+) -> float:
+    """
+    Function to compute the relevance of a candidate edge.
+
+    Args:
+        match_score: Match score of the node normalized to [0, 1] per keyword
+        degree: Degree of the neighbor node
+        edge_type: Relationship type of the edge
+        edge_type_priority: Weight per relationship type. Types that are not listed have a weight of 1.
+
+    Returns:
+        Relevance of the edge. The higher, the more relevant.
+    """
+    return match_score * edge_type_priority.get(edge_type, 1.0) / log2(2 + degree)
+
+
+def rank_graph_edges(
+    keyword_edges: dict[str, list[dict[str, Any]]],
+    edge_type_priority: dict[str, float],
+    token_budget: int,
+) -> list[str]:
+    """
+    Function to select the most relevant edges of all keywords that fit in the token budget.
+
+    Args:
+        keyword_edges: Candidate edges of each keyword with their 'output', 'score', 'type' and 'degree'
+        edge_type_priority: Weight per relationship type
+        token_budget: Maximum estimated number of tokens of the selected edges
+
+    Returns:
+        'node - TYPE -> neighbor' rows of the selected edges, most relevant first
+    """
+    # An edge found through several keywords keeps its highest relevance
+    relevance_by_output = dict()
+    for edges in keyword_edges.values():
+        # Full-text scores are not comparable between keywords, so they are normalized per keyword
+        max_score = max((edge["score"] for edge in edges), default=0.0)
+        for edge in edges:
+            match_score = edge["score"] / max_score if max_score > 0 else 0.0
+            relevance = edge_relevance(
+                match_score, edge["degree"], edge["type"], edge_type_priority
+            )
+            if relevance > relevance_by_output.get(edge["output"], -1.0):
+                relevance_by_output[edge["output"]] = relevance
+
+    selected_outputs = list()
+    remaining_tokens = token_budget
+    for output in sorted(
+        relevance_by_output, key=relevance_by_output.__getitem__, reverse=True
+    ):
+        # One line per edge, so the new line is counted as well
+        tokens = estimate_tokens(output + "\n")
+        if tokens > remaining_tokens:
+            continue
+        selected_outputs.append(output)
+        remaining_tokens -= tokens
+
+    return selected_outputs
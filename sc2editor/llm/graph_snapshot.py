@@ -0,0 +1,307 @@
+"""
+Module for the in-memory graph snapshot.
+
+This module keeps every relationship of the graph database except MENTIONS in a compressed sparse row (CSR) adjacency,
+so the 'node - TYPE -> neighbor' expansion of graph retrieval is answered in memory instead of by a Cypher query.
+Nodes are numbered from 0, the neighbors of node i are neighbors[offsets[i]:offsets[i + 1]],
+and relationship types are interned to small integer codes.
+
+Nodes are matched like the CONTAINS lookup of cypher_queries: the lower-cased keyword must be contained in
+the lower-cased id or text of the node. An exact id match scores 1.0, a partial id match 0.75 and a text match 0.5.
+"""
+
+# Python Standard Library imports
+from typing import Any
+
+# Third-party Library imports
+import numpy as np
+
+
+# Score multiplier of the edges found one more hop away from the matched node
+HOP_SCORE_DECAY = 0.5
+
+
+def build_haystack(values: list[str]) -> tuple[str, np.ndarray]:
+    """
+    Function to join lower-cased values into one string, so a keyword is found in all of them with str.find.
+
+    Args:
+        values: Value of each node
+
+    Returns:
+        Joined string and the start offset of each value in it
+    """
+    values = [value.lower().replace("\n", " ") for value in values]
+    starts = np.zeros(len(values), dtype=np.int64)
+    if values:
+        starts[1:] = np.cumsum([len(value) + 1 for value in values[:-1]])
+
+    return "\n".join(values), starts
+
+
+def find_in_haystack(haystack: str, starts: np.ndarray, keyword: str) -> np.ndarray:
+    """
+    Function to find the values of a haystack that contain the keyword.
+
+    Args:
+        haystack: String created by build_haystack
+        starts: Start offset of each value in the haystack
+        keyword: Lower-cased keyword
+
+    Returns:
+        Sorted indices of the values containing the keyword
+    """
+    # A keyword spanning a separator would match across two values
+    if not keyword or "\n" in keyword:
+        return np.zeros(0, dtype=np.int64)
+
+    positions = list()
+    position = haystack.find(keyword)
+    while position != -1:
+        positions.append(position)
+        position = haystack.find(keyword, position + 1)
+
+    return np.unique(np.searchsorted(starts, positions, side="right") - 1)
+
+
+class GraphSnapshot:
+    """Read-only CSR adjacency of the non-MENTIONS relationships of the graph database."""
+
+    def __init__(
+        self,
+        node_ids: list[str],
+        node_texts: list[str],
+        degrees: np.ndarray,
+        offsets: np.ndarray,
+        neighbors: np.ndarray,
+        type_codes: np.ndarray,
+        outgoing: np.ndarray,
+        type_names: list[str],
+        version: int | None = None,
+    ):
+        """
+        Initialize the snapshot from its arrays. Use build() to create one from query results.
+
+        Args:
+            node_ids: id property of each node
+            node_texts: text property of each node, or an empty string
+            degrees: Number of relationships of each node, MENTIONS included
+            offsets: Start of the edges of each node in neighbors, type_codes and outgoing, plus the total length
+            neighbors: Neighbor node of each edge
+            type_codes: Relationship type code of each edge
+            outgoing: Whether each edge starts at its node
+            type_names: Relationship type of each code
+            version: Graph version the snapshot was loaded from
+        """
+        self.node_ids = node_ids
+        self.degrees = degrees
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.type_codes = type_codes
+        self.outgoing = outgoing
+        self.type_names = type_names
+        self.version = version
+
+        self._lowered_ids = [node_id.lower() for node_id in node_ids]
+        self._id_haystack, self._id_starts = build_haystack(node_ids)
+        self._text_haystack, self._text_starts = build_haystack(node_texts)
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def relationship_count(self) -> int:
+        # Every relationship is stored at both of its nodes
+        return len(self.neighbors) // 2
+
+    @classmethod
+    def build(
+        cls,
+        nodes: list[dict[str, Any]],
+        relationships: list[dict[str, Any]],
+        version: int | None = None,
+    ) -> "GraphSnapshot":
+        """
+        Build the snapshot from the results of the graph snapshot queries.
+
+        Args:
+            nodes: Records with 'element_id', 'id', 'text' and 'degree' of each node
+            relationships: Records with 'source', 'target' and 'type' of each relationship
+            version: Graph version the records were loaded from
+
+        Returns:
+            Graph snapshot
+        """
+        node_index = {node["element_id"]: idx for idx, node in enumerate(nodes)}
+        # Relationships to nodes without an id are skipped, like the null rows of the Cypher lookup
+        relationships = [
+            relationship
+            for relationship in relationships
+            if relationship["source"] in node_index
+            and relationship["target"] in node_index
+        ]
+
+        sources = np.fromiter(
+            (node_index[relationship["source"]] for relationship in relationships),
+            dtype=np.int32,
+            count=len(relationships),
+        )
+        targets = np.fromiter(
+            (node_index[relationship["target"]] for relationship in relationships),
+            dtype=np.int32,
+            count=len(relationships),
+        )
+        type_names, relationship_type_codes = np.unique(
+            np.array(
+                [relationship["type"] for relationship in relationships], dtype=str
+            ),
+            return_inverse=True,
+        )
+        relationship_type_codes = relationship_type_codes.astype(
+            np.uint8 if len(type_names) <= 256 else np.uint16
+        )
+
+        # The lookup follows relationships in both directions, so each one is stored at both of its nodes
+        owners = np.concatenate([sources, targets])
+        order = np.argsort(owners, kind="stable")
+        offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(owners, minlength=len(nodes)))
+
+        return cls(
+            node_ids=[str(node["id"]) for node in nodes],
+            node_texts=[str(node["text"] or "") for node in nodes],
+            degrees=np.array([node["degree"] for node in nodes], dtype=np.int32),
+            offsets=offsets,
+            neighbors=np.concatenate([targets, sources])[order],
+            type_codes=np.concatenate([relationship_type_codes] * 2)[order],
+            outgoing=np.concatenate(
+                [
+                    np.ones(len(relationships), dtype=bool),
+                    np.zeros(len(relationships), dtype=bool),
+                ]
+            )[order],
+            type_names=type_names.tolist(),
+            version=version,
+        )
+
+    def match(self, keyword: str) -> list[tuple[int, float]]:
+        """
+        Find the nodes whose id or text contains the keyword.
+
+        Args:
+            keyword: Lower-cased keyword
+
+        Returns:
+            Matched nodes with their match score, best first
+        """
+        id_matches = find_in_haystack(self._id_haystack, self._id_starts, keyword)
+        text_matches = find_in_haystack(self._text_haystack, self._text_starts, keyword)
+
+        scores = {int(idx): 0.5 for idx in text_matches}
+        for idx in id_matches.tolist():
+            scores[idx] = 1.0 if self._lowered_ids[idx] == keyword else 0.75
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def expand(
+        self, keyword: str, limit: int, ranked: bool = False, hops: int = 1
+    ) -> list[str] | list[dict[str, Any]]:
+        """
+        Collect the edges around the nodes matching a keyword.
+
+        Args:
+            keyword: Lower-cased keyword
+            limit: Maximum number of edges
+            ranked: Whether to return the edges with their match score, relationship type and neighbor degree
+            hops: Number of hops to expand from the matched nodes.
+                Edges found one more hop away score HOP_SCORE_DECAY times the score of the node they were reached from.
+
+        Returns:
+            'node - TYPE -> neighbor' rows, or dictionaries with 'output', 'score', 'type' and 'degree' if ranked,
+            best matching nodes first
+        """
+        edges = list()
+        frontier = self.match(keyword)
+        visited = {idx for idx, _ in frontier}
+        expanded = set()
+
+        for hop in range(hops):
+            next_frontier = list()
+            for node, score in frontier:
+                start, end = self.offsets[node], self.offsets[node + 1]
+                for neighbor, type_code, outgoing in zip(
+                    self.neighbors[start:end].tolist(),
+                    self.type_codes[start:end].tolist(),
+                    self.outgoing[start:end].tolist(),
+                ):
+                    # Further hops do not return the edges back to the nodes expanded before
+                    if hop > 0 and neighbor in expanded:
+                        continue
+
+                    edge_type = self.type_names[type_code]
+                    source, target = (node, neighbor) if outgoing else (neighbor, node)
+                    output = f"{self.node_ids[source]} - {edge_type} -> {self.node_ids[target]}"
+                    edges.append(
+                        {
+                            "output": output,
+                            "score": score,
+                            "type": edge_type,
+                            "degree": int(self.degrees[neighbor]),
+                        }
+                        if ranked
+                        else output
+                    )
+                    if len(edges) >= limit:
+                        return edges
+
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        next_frontier.append((neighbor, score * HOP_SCORE_DECAY))
+            expanded.update(node for node, _ in frontier)
+            frontier = next_frontier
+
+        return edges
+
+    def expand_keywords(
+        self,
+        keywords: list[str],
+        keyword_limit: int,
+        ranked: bool = False,
+        hops: int = 1,
+    ) -> dict[str, list[str] | list[dict[str, Any]]]:
+        """
+        Collect the edges around the nodes matching each keyword, like the keyword graph lookup queries.
+
+        Args:
+            keywords: Lower-cased keywords
+            keyword_limit: Maximum number of edges per keyword
+            ranked: Whether to return the edges with their match score, relationship type and neighbor degree
+            hops: Number of hops to expand from the matched nodes
+
+        Returns:
+            A dictionary mapping each keyword to its edges, in keyword order
+        """
+        return {
+            keyword: self.expand(keyword, keyword_limit, ranked=ranked, hops=hops)
+            for keyword in keywords
+        }
+
+    def memory_usage(self) -> int:
+        """
+        Return the bytes held by the adjacency arrays, without the node id and text strings.
+
+        Returns:
+            Bytes of the degree, offset, neighbor, type code and direction arrays
+        """
+        return sum(
+            array.nbytes
+            for array in (
+                self.degrees,
+                self.offsets,
+                self.neighbors,
+                self.type_codes,
+                self.outgoing,
+                self._id_starts,
+                self._text_starts,
+            )
+        )
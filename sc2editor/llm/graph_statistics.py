@@ -0,0 +1,93 @@
+"""
+Module for the cached graph statistics.
+
+This module counts the nodes, relationships and embedded documents of the graph database in one query,
+and saves the result to a JSON file together with the graph version it was counted at.
+The ingestion scripts write the file after every ingestion, so SC2EditorLLM can load the statistics
+at startup instead of counting them again, as long as the graph version still matches.
+"""
+
+# Python Standard Library imports
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+# Third-party Library imports
+from langchain_neo4j import Neo4jGraph, Neo4jVector
+
+# Custom Library imports
+from sc2editor.llm.cypher_queries import GRAPH_STATISTICS_QUERY
+
+
+logger = logging.getLogger(__name__)
+
+# Keys of a statistics record, as returned by GRAPH_STATISTICS_QUERY
+GRAPH_STATISTICS_KEYS = (
+    "TotalNodes",
+    "TotalRelationships",
+    "EmbeddingText",
+    "GraphVersion",
+)
+
+
+def query_graph_statistics(graph: Neo4jGraph | Neo4jVector) -> dict[str, int]:
+    """
+    Function to count the nodes, relationships and embedded documents of the graph database.
+
+    Args:
+        graph: Neo4j Database, or a vector store connected to it
+
+    Returns:
+        Statistics record with the graph version the counts belong to
+    """
+    return graph.query(GRAPH_STATISTICS_QUERY)[0]
+
+
+def save_graph_statistics(path: str | Path, statistics: dict[str, int]):
+    """
+    Function to save a statistics record to a JSON file, replaced atomically.
+
+    Args:
+        path: Path of the statistics file
+        statistics: Statistics record returned by GRAPH_STATISTICS_QUERY
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, mode="w", encoding="utf-8") as f:
+        json.dump({key: statistics[key] for key in GRAPH_STATISTICS_KEYS}, f)
+    os.replace(temporary_path, path)
+
+
+def load_graph_statistics(
+    path: str | Path, graph_version: int
+) -> dict[str, Any] | None:
+    """
+    Function to load a statistics record if it was counted at the current graph version.
+
+    Args:
+        path: Path of the statistics file
+        graph_version: Current graph version
+
+    Returns:
+        Statistics record, or None if the file is missing, unreadable or was written for another graph version
+    """
+    try:
+        with open(path, mode="r", encoding="utf-8") as f:
+            statistics = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read the graph statistics file {path}: {e}")
+        return None
+
+    if not isinstance(statistics, dict) or any(
+        key not in statistics for key in GRAPH_STATISTICS_KEYS
+    ):
+        return None
+    if statistics["GraphVersion"] != graph_version:
+        return None
+
+    return statistics
@@ -0,0 +1,617 @@
+"""
+Module for the in-process vector index.
+
+This module keeps the embeddings of all Document nodes in a contiguous NumPy matrix,
+so vector searches are answered with a dot product in memory instead of a round trip to Neo4j.
+The matrix can be saved to a snapshot file and memory-mapped from it on the next start.
+
+To hold the index in every worker with less memory, the searched matrix can be stored as float16,
+or as int8 with a scale per row, and its dimensions can be truncated.
+The shortlist found on the compact matrix can then be re-scored against the full-precision embeddings,
+of which only the shortlisted rows are read from the memory-mapped snapshot.
+
+In 'hybrid' search the index also keeps a BM25 index over the document texts,
+and the vector and keyword rankings are fused with reciprocal rank fusion,
+so a hybrid search costs no round trip to Neo4j either.
+"""
+
+# Python Standard Library imports
+import os
+import json
+import asyncio
+import tempfile
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Any, Iterable, Literal
+
+# Third-party Library imports
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+# Custom Library imports
+from sc2editor.llm.bm25_index import BM25Index
+
+
+# Number of rows of a compact matrix converted to float32 at a time while searching
+SEARCH_BLOCK_ROWS = 4096
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Function to scale every row of a matrix to unit length, so that a dot product is the cosine similarity.
+
+    Args:
+        matrix: float32 matrix
+
+    Returns:
+        New matrix of unit rows
+    """
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def reciprocal_rank_fusion(
+    rankings: list[np.ndarray], weights: list[float], k: int = 60
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Function to fuse several rankings of the same documents with reciprocal rank fusion.
+
+    Each document scores the sum of weight / (k + rank) over the rankings it appears in.
+
+    Args:
+        rankings: Document rows of each ranking, best first
+        weights: Weight of each ranking
+        k: Rank offset. Larger values flatten the difference between the top ranks.
+
+    Returns:
+        Fused document rows, best first, and their fused scores
+    """
+    fused_scores = dict()
+    for ranking, weight in zip(rankings, weights):
+        for rank, idx in enumerate(ranking.tolist(), start=1):
+            fused_scores[idx] = fused_scores.get(idx, 0.0) + weight / (k + rank)
+
+    # Stable sort, so documents with the same score keep the order of the first ranking
+    ordered = sorted(fused_scores.items(), key=lambda item: -item[1])
+    return (
+        np.array([idx for idx, _ in ordered], dtype=np.int64),
+        np.array([score for _, score in ordered], dtype=np.float32),
+    )
+
+
+@dataclass(slots=True, frozen=True)
+class IndexedDocuments:
+    """Documents of the local vector index, replaced as a whole so a search never sees a mix of old and new ones."""
+
+    search_matrix: np.ndarray
+    scales: np.ndarray | None
+    full_matrix: np.ndarray | None
+    keyword_index: BM25Index | None
+    texts: list[str]
+    metadatas: list[dict[str, Any]]
+    version: int | None
+
+
+class LocalVectorIndex(VectorStore):
+    """Read-only vector store over the Document embeddings of the graph database, searched in memory."""
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        precision: Literal["float32", "float16", "int8"] = "float32",
+        dimensions: int | None = None,
+        rescore_factor: int = 0,
+        search_type: Literal["vector", "hybrid"] = "vector",
+        rrf_k: int = 60,
+        vector_weight: float = 1.0,
+        keyword_weight: float = 1.0,
+    ):
+        """
+        Initialize an empty index. Documents are added with load() or load_snapshot().
+
+        Args:
+            embedding: Embeddings used to embed the queries. It must be the model the documents were embedded with.
+            precision: Precision of the searched matrix
+            dimensions: Number of leading dimensions of the searched matrix. If None, all dimensions are kept.
+            rescore_factor: If positive, k * rescore_factor documents are shortlisted on the searched matrix
+                and re-scored with the full-precision embeddings. If 0, the full-precision embeddings are not kept.
+            search_type: 'vector' searches the embeddings only,
+                'hybrid' also searches a BM25 index of the texts and fuses both rankings
+            rrf_k: Rank offset of the reciprocal rank fusion
+            vector_weight: Weight of the vector ranking in the reciprocal rank fusion
+            keyword_weight: Weight of the keyword ranking in the reciprocal rank fusion
+        """
+        self._embedding = embedding
+        self.precision = precision
+        self.dimensions = dimensions
+        self.rescore_factor = rescore_factor
+        self.search_type = search_type
+        self.rrf_k = rrf_k
+        self.vector_weight = vector_weight
+        self.keyword_weight = keyword_weight
+        self._documents = IndexedDocuments(
+            search_matrix=np.zeros((0, 0), dtype=np.float32),
+            scales=None,
+            full_matrix=None,
+            keyword_index=None,
+            texts=list(),
+            metadatas=list(),
+            version=None,
+        )
+
+    def __len__(self) -> int:
+        return len(self._documents.texts)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def version(self) -> int | None:
+        return self._documents.version
+
+    @property
+    def keyword_index(self) -> BM25Index | None:
+        return self._documents.keyword_index
+
+    def load(
+        self,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        embeddings: list[list[float]],
+        version: int | None = None,
+        snapshot_dir: str | Path | None = None,
+    ):
+        """
+        Replace the documents of the index.
+
+        Args:
+            texts: Text of each document
+            metadatas: Metadata of each document
+            embeddings: Embedding of each document
+            version: Graph version the documents were loaded from
+            snapshot_dir: If given, the documents are saved to a snapshot there,
+                and the full-precision embeddings are memory-mapped from it instead of being kept in memory
+        """
+        texts = list(texts)
+        metadatas = list(metadatas)
+        full_matrix = normalize_rows(
+            np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        )
+        keyword_index = BM25Index.build(texts) if self.search_type == "hybrid" else None
+
+        if snapshot_dir is not None:
+            self._save_snapshot(
+                snapshot_dir, full_matrix, keyword_index, texts, metadatas, version
+            )
+            full_matrix = np.memmap(
+                Path(snapshot_dir) / "documents.f32",
+                dtype=np.float32,
+                mode="r",
+                shape=full_matrix.shape,
+            )
+
+        self._documents = self._index(
+            full_matrix, keyword_index, texts, metadatas, version
+        )
+
+    def _index(
+        self,
+        full_matrix: np.ndarray,
+        keyword_index: BM25Index | None,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        version: int | None,
+    ) -> IndexedDocuments:
+        """
+        Build the searched matrix from the full-precision embeddings.
+
+        Args:
+            full_matrix: Unit float32 embedding of each document, in memory or memory-mapped
+            keyword_index: BM25 index of the texts, or None in 'vector' search
+            texts: Text of each document
+            metadatas: Metadata of each document
+            version: Graph version the documents were loaded from
+
+        Returns:
+            Documents of the index
+        """
+        search_matrix = full_matrix
+        if self.dimensions is not None and self.dimensions < full_matrix.shape[1]:
+            # Truncated embeddings are renormalized, so their dot product is still a cosine similarity
+            search_matrix = normalize_rows(full_matrix[:, : self.dimensions])
+
+        scales = None
+        if self.precision == "float16":
+            search_matrix = search_matrix.astype(np.float16)
+        elif self.precision == "int8":
+            # Symmetric quantisation with one scale per row, so every row uses the full int8 range
+            max_values = np.abs(search_matrix).max(axis=1)
+            scales = (np.where(max_values > 0, max_values, 1.0) / 127).astype(
+                np.float32
+            )
+            search_matrix = np.round(search_matrix / scales[:, None]).astype(np.int8)
+
+        keep_full_matrix = search_matrix is full_matrix or self.rescore_factor > 0
+        return IndexedDocuments(
+            search_matrix=search_matrix,
+            scales=scales,
+            full_matrix=full_matrix if keep_full_matrix else None,
+            keyword_index=keyword_index,
+            texts=texts,
+            metadatas=metadatas,
+            version=version,
+        )
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Return the bytes held by the matrices of the index.
+
+        Returns:
+            Bytes of the searched matrix with its scales, and bytes of the full-precision embeddings held in memory.
+            Memory-mapped full-precision embeddings are counted as 0, since only the shortlisted rows are read.
+        """
+        documents = self._documents
+
+        search_matrix_bytes = documents.search_matrix.nbytes
+        if documents.scales is not None:
+            search_matrix_bytes += documents.scales.nbytes
+
+        full_matrix_bytes = 0
+        if (
+            documents.full_matrix is not None
+            and documents.full_matrix is not documents.search_matrix
+            and not isinstance(documents.full_matrix, np.memmap)
+        ):
+            full_matrix_bytes = documents.full_matrix.nbytes
+
+        return {
+            "search_matrix_bytes": search_matrix_bytes,
+            "full_matrix_bytes": full_matrix_bytes,
+        }
+
+    @staticmethod
+    def _save_snapshot(
+        snapshot_dir: str | Path,
+        full_matrix: np.ndarray,
+        keyword_index: BM25Index | None,
+        texts: list[str],
+        metadatas: list[dict[str, Any]],
+        version: int | None,
+    ):
+        """
+        Save the full-precision documents to a snapshot that can be memory-mapped on the next start.
+
+        Args:
+            snapshot_dir: Directory of the snapshot files
+            full_matrix: Unit float32 embedding of each document
+            keyword_index: BM25 index of the texts, or None in 'vector' search
+            texts: Text of each document
+            metadatas: Metadata of each document
+            version: Graph version the documents were loaded from
+        """
+        snapshot_dir = Path(snapshot_dir)
+        snapshot_dir.mkdir(parents=True, exist_ok=True)
+        matrix_path = snapshot_dir / "documents.f32"
+        index_path = snapshot_dir / "documents.json"
+
+        # The matrix and the keyword index are written before the index, and each file is replaced atomically.
+        # Every write has its own temporary file, so workers saving a snapshot at the same time do not collide.
+        with tempfile.NamedTemporaryFile(
+            dir=snapshot_dir, prefix="documents.f32.", delete=False
+        ) as f:
+            full_matrix.astype(np.float32).tofile(f)
+        os.replace(f.name, matrix_path)
+        keyword_index_path = snapshot_dir / "documents.bm25.npz"
+        if keyword_index is not None:
+            keyword_index.save(keyword_index_path)
+        else:
+            # A keyword index of an older graph must not be loaded with this snapshot
+            keyword_index_path.unlink(missing_ok=True)
+
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            dir=snapshot_dir,
+            prefix="documents.json.",
+            delete=False,
+        ) as f:
+            json.dump(
+                {
+                    "version": version,
+                    "shape": list(full_matrix.shape),
+                    "texts": texts,
+                    "metadatas": metadatas,
+                },
+                f,
+                ensure_ascii=False,
+                default=str,
+            )
+        os.replace(f.name, index_path)
+
+    def load_snapshot(
+        self, snapshot_dir: str | Path, version: int | None, document_count: int
+    ) -> bool:
+        """
+        Memory-map the documents from a snapshot if it was saved from the same graph.
+
+        Args:
+            snapshot_dir: Directory of the snapshot files
+            version: Current graph version
+            document_count: Current number of Document nodes with an embedding
+
+        Returns:
+            Whether the snapshot was loaded
+        """
+        matrix_path = Path(snapshot_dir) / "documents.f32"
+        index_path = Path(snapshot_dir) / "documents.json"
+        if not (matrix_path.exists() and index_path.exists()):
+            return False
+
+        try:
+            with open(index_path, mode="r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+
+        rows, dimension = index["shape"]
+        if (
+            index["version"] != version
+            or rows != document_count
+            or rows == 0
+            or matrix_path.stat().st_size != rows * dimension * 4
+        ):
+            return False
+
+        full_matrix = np.memmap(
+            matrix_path, dtype=np.float32, mode="r", shape=(rows, dimension)
+        )
+
+        keyword_index = None
+        if self.search_type == "hybrid":
+            keyword_index_path = Path(snapshot_dir) / "documents.bm25.npz"
+            keyword_index = BM25Index.load(keyword_index_path, rows)
+            if keyword_index is None:
+                # Snapshots saved in 'vector' search have no keyword index yet
+                keyword_index = BM25Index.build(index["texts"])
+                keyword_index.save(keyword_index_path)
+
+        self._documents = self._index(
+            full_matrix, keyword_index, index["texts"], index["metadatas"], version
+        )
+
+        return True
+
+    @staticmethod
+    def _search_similarities(
+        documents: IndexedDocuments, queries: np.ndarray
+    ) -> np.ndarray:
+        """
+        Compute the cosine similarity between each query and each document on the searched matrix.
+
+        Args:
+            documents: Documents of the index
+            queries: Unit query embeddings with all dimensions
+
+        Returns:
+            Similarity matrix of shape (queries, documents)
+        """
+        search_matrix = documents.search_matrix
+        if search_matrix.shape[1] < queries.shape[1]:
+            queries = normalize_rows(queries[:, : search_matrix.shape[1]])
+
+        if search_matrix.dtype == np.float32:
+            similarities = queries @ search_matrix.T
+        else:
+            # Converting block by block bounds the temporary float32 copy of a compact matrix
+            similarities = np.empty(
+                (len(queries), len(search_matrix)), dtype=np.float32
+            )
+            for start in range(0, len(search_matrix), SEARCH_BLOCK_ROWS):
+                block = search_matrix[start : start + SEARCH_BLOCK_ROWS]
+                similarities[:, start : start + len(block)] = (
+                    queries @ block.astype(np.float32).T
+                )
+
+        if documents.scales is not None:
+            similarities *= documents.scales[None, :]
+
+        return similarities
+
+    def search_by_vectors(
+        self, query_embeddings: list[list[float]], k: int = 4
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the rows of the most similar documents of several query embeddings in one batched dot product.
+
+        Args:
+            query_embeddings: Embedding of each query
+            k: Number of documents per query
+
+        Returns:
+            Row indices and cosine similarities of the documents of each query, most similar first
+        """
+        documents = self._documents
+        k = min(k, len(documents.texts))
+        queries = normalize_rows(
+            np.asarray(query_embeddings, dtype=np.float32).reshape(
+                len(query_embeddings), -1
+            )
+        )
+        if k <= 0:
+            return (
+                np.zeros((len(queries), 0), dtype=np.int64),
+                np.zeros((len(queries), 0), dtype=np.float32),
+            )
+
+        similarities = self._search_similarities(documents, queries)
+
+        rescore = (
+            self.rescore_factor > 0
+            and documents.full_matrix is not None
+            and documents.full_matrix is not documents.search_matrix
+        )
+        shortlist_size = (
+            min(k * self.rescore_factor, len(documents.texts)) if rescore else k
+        )
+        shortlists = np.argpartition(-similarities, shortlist_size - 1, axis=1)[
+            :, :shortlist_size
+        ]
+
+        top_indices = np.empty((len(queries), k), dtype=np.int64)
+        top_similarities = np.empty((len(queries), k), dtype=np.float32)
+        for query_idx, shortlist in enumerate(shortlists):
+            if rescore:
+                # Sorted rows are read from the memory-mapped snapshot in file order
+                shortlist = np.sort(shortlist)
+                shortlist_similarities = (
+                    documents.full_matrix[shortlist] @ queries[query_idx]
+                )
+            else:
+                shortlist_similarities = similarities[query_idx, shortlist]
+
+            order = np.argsort(-shortlist_similarities, kind="stable")[:k]
+            top_indices[query_idx] = shortlist[order]
+            top_similarities[query_idx] = shortlist_similarities[order]
+
+        return top_indices, top_similarities
+
+    def similarity_search_with_score_by_vectors(
+        self, query_embeddings: list[list[float]], k: int = 4
+    ) -> list[list[tuple[Document, float]]]:
+        """
+        Find the most similar documents of several query embeddings in one batched dot product.
+
+        Scores are normalized like the vector part of the Neo4jVector hybrid search,
+        so the thresholds of AdaptiveVectorRetriever mean the same with either vector store:
+        the cosine similarity is mapped to [0, 1] and divided by the best score of the query.
+
+        Args:
+            query_embeddings: Embedding of each query
+            k: Number of documents per query
+
+        Returns:
+            Documents with their scores for each query, most similar first
+        """
+        documents = self._documents
+        top_indices, top_similarities = self.search_by_vectors(query_embeddings, k)
+
+        return [
+            self._to_documents(documents, indices, (1.0 + similarities) / 2.0)
+            for indices, similarities in zip(top_indices, top_similarities)
+        ]
+
+    def hybrid_search_with_score(
+        self, query: str, query_embedding: list[float], k: int = 4
+    ) -> list[tuple[Document, float]]:
+        """
+        Find the most relevant documents by fusing the vector and BM25 rankings with reciprocal rank fusion.
+
+        Each ranking contributes its k best documents. Fused scores are divided by the best one,
+        so the best document scores 1 like in the other searches.
+
+        Args:
+            query: Search query
+            query_embedding: Embedding of the query
+            k: Number of documents
+
+        Returns:
+            Documents with their scores, most relevant first
+        """
+        documents = self._documents
+        if documents.keyword_index is None:
+            return self.similarity_search_with_score_by_vectors([query_embedding], k)[0]
+
+        vector_indices, _ = self.search_by_vectors([query_embedding], k)
+        keyword_indices, _ = documents.keyword_index.search(query, k)
+        indices, scores = reciprocal_rank_fusion(
+            [vector_indices[0], keyword_indices],
+            [self.vector_weight, self.keyword_weight],
+            k=self.rrf_k,
+        )
+
+        return self._to_documents(documents, indices[:k], scores[:k])
+
+    @staticmethod
+    def _to_documents(
+        documents: IndexedDocuments, indices: np.ndarray, scores: np.ndarray
+    ) -> list[tuple[Document, float]]:
+        """
+        Create the Documents of the found rows, with their scores divided by the best score.
+
+        Args:
+            documents: Documents of the index the rows were found in
+            indices: Found rows, best first
+            scores: Non-negative score of each row
+
+        Returns:
+            Documents with their normalized scores
+        """
+        best_score = float(scores[0]) if len(scores) and scores[0] > 0 else 1.0
+
+        return [
+            (
+                Document(
+                    # Same page content as the DOCUMENT_RETRIEVAL_QUERY of the Neo4jVector store
+                    page_content=f"\ntext: {documents.texts[idx]}",
+                    metadata=dict(documents.metadatas[idx]),
+                ),
+                score / best_score,
+            )
+            for idx, score in zip(indices.tolist(), scores.tolist())
+        ]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        query_embedding = self._embedding.embed_query(query)
+        if self.search_type == "hybrid":
+            return self.hybrid_search_with_score(query, query_embedding, k)
+        return self.similarity_search_with_score_by_vectors([query_embedding], k)[0]
+
+    async def asimilarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        query_embedding = await self._embedding.aembed_query(query)
+        # NumPy releases the GIL, so searches of concurrent requests run on several cores
+        if self.search_type == "hybrid":
+            return await asyncio.to_thread(
+                self.hybrid_search_with_score, query, query_embedding, k
+            )
+        results = await asyncio.to_thread(
+            self.similarity_search_with_score_by_vectors, [query_embedding], k
+        )
+        return results[0]
+
+    def similarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    async def asimilarity_search(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in await self.asimilarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: Iterable[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        **kwargs: Any,
+    ) -> "LocalVectorIndex":
+        texts = list(texts)
+        index = cls(embedding, **kwargs)
+        index.load(
+            texts,
+            metadatas or [dict() for _ in texts],
+            embedding.embed_documents(texts),
+        )
+
+        return index
@@ -0,0 +1,158 @@
+"""
+Module for lightweight in-process metrics of SC2EditorLLM.
+
+The metrics are kept in memory and reported through SC2EditorLLM.get_metrics(), e.g. on the health endpoint.
+"""
+
+# Python Standard Library imports
+import time
+import logging
+from uuid import UUID
+from collections import deque
+from typing import Any
+
+# Third-party Library imports
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+logger = logging.getLogger(__name__)
+
+
+class RunningStat:
+    """Count, mean, minimum, maximum and last value of a series of observations."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.last = None
+
+    def add(self, value: int | float):
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.last = value
+
+    def stats(self) -> dict[str, int | float | None]:
+        """
+        Return the summary of the observations.
+
+        Returns:
+            Number of observations, their mean, minimum, maximum and the last one
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.minimum,
+            "max": self.maximum,
+            "last": self.last,
+        }
+
+
+class ModelLatencyRecorder(BaseCallbackHandler):
+    """Callback handler that records the latency of the calls of one chat model."""
+
+    # The handler only reads the clock, so it runs on the event loop instead of in an executor
+    run_inline = True
+
+    def __init__(self, node: str, model: str, max_recent_calls: int = 20):
+        """
+        Initialize a recorder without observations.
+
+        Args:
+            node: Name of the node that calls the chat model
+            model: Name of the chat model the recorder is attached to
+            max_recent_calls: Number of most recent calls kept with the thread id of their request
+        """
+        self.node = node
+        self.model = model
+        self.errors = 0
+        self.latency_ms_stat = RunningStat()
+        self.first_token_ms_stat = RunningStat()
+        self.recent_calls: deque[dict[str, Any]] = deque(maxlen=max_recent_calls)
+        self._started_at: dict[UUID, float] = dict()
+        self._thread_ids: dict[UUID, str | None] = dict()
+        self._streaming: set[UUID] = set()
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs,
+    ):
+        self._started_at[run_id] = time.perf_counter()
+        # LangGraph passes the thread id of the request in the metadata
+        self._thread_ids[run_id] = (metadata or dict()).get("thread_id")
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs):
+        # Only the first token of a streamed call is recorded
+        started_at = self._started_at.get(run_id)
+        if started_at is not None and run_id not in self._streaming:
+            self._streaming.add(run_id)
+            self.first_token_ms_stat.add((time.perf_counter() - started_at) * 1000)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs):
+        started_at = self._started_at.pop(run_id, None)
+        self._streaming.discard(run_id)
+        if started_at is None:
+            return None
+
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        self.latency_ms_stat.add(latency_ms)
+        self._record_call(run_id, latency_ms=round(latency_ms, 1), error=None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs):
+        self._started_at.pop(run_id, None)
+        self._streaming.discard(run_id)
+        self.errors += 1
+        self._record_call(run_id, latency_ms=None, error=type(error).__name__)
+
+    def _record_call(self, run_id: UUID, latency_ms: float | None, error: str | None):
+        """
+        Record the model used for one call of a request.
+
+        Args:
+            run_id: Run id of the call
+            latency_ms: Latency of the call in milliseconds, or None if it failed
+            error: Name of the exception of a failed call, or None
+        """
+        thread_id = self._thread_ids.pop(run_id, None)
+        self.recent_calls.append(
+            {
+                "thread_id": thread_id,
+                "model": self.model,
+                "latency_ms": latency_ms,
+                "error": error,
+            }
+        )
+        logger.debug(
+            f"{self.node} called {self.model} for thread {thread_id}: "
+            f"{error or f'{latency_ms} ms'}"
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the observations of the recorder.
+
+        Returns:
+            Model name, latency of the calls, latency to the first token of streamed calls, number of failed calls
+            and the most recent calls with the thread id of their request
+        """
+        return {
+            "model": self.model,
+            "latency_ms": self.latency_ms_stat.stats(),
+            "first_token_ms": self.first_token_ms_stat.stats(),
+            "errors": self.errors,
+            "recent_calls": list(self.recent_calls),
+        }
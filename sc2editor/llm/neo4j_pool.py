@@ -0,0 +1,322 @@
+"""
+Module for the shared Neo4j connection pool.
+
+This module owns the Neo4j drivers of the application, so that graph retrieval, vector retrieval
+and the Cypher queries issued while serving requests share one tuned connection pool instead of one pool each.
+The synchronous driver is wrapped in a Neo4jGraph, which Neo4jVector reuses through its graph argument.
+The async driver used by the non-blocking query backend cannot share a pool with it, so it gets the same settings.
+
+Both drivers are instrumented, so the metrics tell whether requests are waiting on the database pool or elsewhere.
+The Neo4j driver does not expose pool statistics, so every query and session first takes one of as many slots
+as the pool has connections, through the public execute_query and session methods only.
+A query holding a slot always finds a free connection, so the time spent waiting for a slot is the acquisition wait.
+"""
+
+# Python Standard Library imports
+import time
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+# Third-party Library imports
+from langchain_neo4j import Neo4jGraph
+from neo4j import AsyncGraphDatabase, AsyncDriver, AsyncSession, Driver, Session
+from neo4j.exceptions import ClientError
+
+# Custom Library imports
+from sc2editor.llm.metrics import RunningStat
+
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMonitor:
+    """Acquisition wait times and utilisation of the connection slots of one Neo4j driver."""
+
+    def __init__(self, max_size: int, acquisition_timeout: int | float):
+        """
+        Initialize the counters.
+
+        Args:
+            max_size: Maximum number of connections of the pool, and so the number of slots
+            acquisition_timeout: Maximum time in seconds a query waits for a slot
+        """
+        self.max_size = max_size
+        self.acquisition_timeout = acquisition_timeout
+        self.acquisition_ms_stat = RunningStat()
+        self.acquisition_errors = 0
+        self.in_use = 0
+        # Synchronous queries take their slots on the threads of the query executor
+        self._lock = threading.Lock()
+
+    def record_acquisition(self, start: float, acquired: bool):
+        """
+        Record the wait for a slot.
+
+        Args:
+            start: perf_counter() when the query started to wait
+            acquired: Whether the query got a slot before the acquisition timeout
+        """
+        with self._lock:
+            self.acquisition_ms_stat.add((time.perf_counter() - start) * 1000)
+            if acquired:
+                self.in_use += 1
+            else:
+                self.acquisition_errors += 1
+
+    def record_release(self):
+        """Record that a query gave its slot back"""
+        with self._lock:
+            self.in_use -= 1
+
+    def timeout_error(self) -> ClientError:
+        """Create the error the Neo4j driver raises when no connection becomes free in time"""
+        return ClientError(
+            "failed to obtain a connection from the pool within "
+            f"{self.acquisition_timeout!r}s (timeout)"
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the utilisation of the pool and the acquisition wait times.
+
+        Returns:
+            Maximum size from the pool settings, connections in use, utilisation (in use / maximum size),
+            acquisition wait times in ms and the number of failed acquisitions, i.e. acquisition timeouts
+        """
+        with self._lock:
+            return {
+                "max_size": self.max_size,
+                "in_use": self.in_use,
+                "utilisation": self.in_use / self.max_size if self.max_size else 0.0,
+                "acquisition_ms": self.acquisition_ms_stat.stats(),
+                "acquisition_errors": self.acquisition_errors,
+            }
+
+
+class MonitoredDriver:
+    """Synchronous Neo4j driver whose queries and sessions each hold a connection slot of the monitor."""
+
+    def __init__(self, driver: Driver, monitor: PoolMonitor):
+        """
+        Wrap a driver.
+
+        Args:
+            driver: Neo4j driver
+            monitor: Monitor with the pool settings of the driver
+        """
+        self.driver = driver
+        self.monitor = monitor
+        self._slots = threading.BoundedSemaphore(monitor.max_size)
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything but queries and sessions, e.g. close() and verify_connectivity(), goes to the driver as it is
+        return getattr(self.driver, name)
+
+    @contextmanager
+    def _connection_slot(self) -> Iterator[None]:
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.monitor.acquisition_timeout)
+        self.monitor.record_acquisition(start, acquired)
+        if not acquired:
+            raise self.monitor.timeout_error()
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+            self.monitor.record_release()
+
+    def execute_query(self, *args, **kwargs) -> Any:
+        with self._connection_slot():
+            return self.driver.execute_query(*args, **kwargs)
+
+    @contextmanager
+    def session(self, **config) -> Iterator[Session]:
+        with self._connection_slot(), self.driver.session(**config) as session:
+            yield session
+
+
+class MonitoredAsyncDriver:
+    """Async Neo4j driver whose queries and sessions each hold a connection slot of the monitor."""
+
+    def __init__(self, driver: AsyncDriver, monitor: PoolMonitor):
+        """
+        Wrap a driver.
+
+        Args:
+            driver: Async Neo4j driver
+            monitor: Monitor with the pool settings of the driver
+        """
+        self.driver = driver
+        self.monitor = monitor
+        self._slots = asyncio.BoundedSemaphore(monitor.max_size)
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything but queries and sessions, e.g. close() and verify_connectivity(), goes to the driver as it is
+        return getattr(self.driver, name)
+
+    @asynccontextmanager
+    async def _connection_slot(self) -> AsyncIterator[None]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), timeout=self.monitor.acquisition_timeout
+            )
+        except asyncio.TimeoutError:
+            self.monitor.record_acquisition(start, acquired=False)
+            raise self.monitor.timeout_error() from None
+        self.monitor.record_acquisition(start, acquired=True)
+
+        try:
+            yield
+        finally:
+            self._slots.release()
+            self.monitor.record_release()
+
+    async def execute_query(self, *args, **kwargs) -> Any:
+        async with self._connection_slot():
+            return await self.driver.execute_query(*args, **kwargs)
+
+    @asynccontextmanager
+    async def session(self, **config) -> AsyncIterator[AsyncSession]:
+        async with self._connection_slot(), self.driver.session(**config) as session:
+            yield session
+
+
+class Neo4jConnectionPool:
+    """Shared Neo4j drivers of the application, created on first use with the same pool settings."""
+
+    def __init__(
+        self,
+        uri: str,
+        username: str,
+        password: str,
+        max_connection_pool_size: int = 100,
+        connection_acquisition_timeout: int | float = 60.0,
+        max_connection_lifetime: int | float = 3600.0,
+        connection_timeout: int | float = 30.0,
+        liveness_check_timeout: int | float | None = None,
+        keep_alive: bool = True,
+    ):
+        """
+        Initialize the pool settings. No connection is made until connect() or connect_async() is called.
+
+        Args:
+            uri: Neo4j database URI
+            username: Neo4j username
+            password: Neo4j password
+            max_connection_pool_size: Maximum number of connections of each driver
+            connection_acquisition_timeout: Maximum time in seconds a query waits for a free connection
+            max_connection_lifetime: Connections older than this many seconds are closed instead of reused
+            connection_timeout: Maximum time in seconds to open a new connection
+            liveness_check_timeout: Idle connections older than this many seconds are checked before reuse. If None, they are not checked.
+            keep_alive: Whether to enable TCP keep-alive
+        """
+        self.uri = uri
+        self.username = username
+        self.password = password
+        self.max_connection_pool_size = max_connection_pool_size
+        self.connection_acquisition_timeout = connection_acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
+        self.connection_timeout = connection_timeout
+        self.liveness_check_timeout = liveness_check_timeout
+        self.keep_alive = keep_alive
+
+        self.graph: Neo4jGraph | None = None
+        self.async_driver: MonitoredAsyncDriver | None = None
+        self._graph_monitor: PoolMonitor | None = None
+        self._async_monitor: PoolMonitor | None = None
+
+    @property
+    def driver_config(self) -> dict[str, Any]:
+        """Keyword arguments of the pool settings for GraphDatabase.driver and AsyncGraphDatabase.driver"""
+        return {
+            "max_connection_pool_size": self.max_connection_pool_size,
+            "connection_acquisition_timeout": self.connection_acquisition_timeout,
+            "max_connection_lifetime": self.max_connection_lifetime,
+            "connection_timeout": self.connection_timeout,
+            "liveness_check_timeout": self.liveness_check_timeout,
+            "keep_alive": self.keep_alive,
+        }
+
+    def connect(self) -> Neo4jGraph:
+        """
+        Return the Neo4jGraph of the shared synchronous driver, creating it on first use.
+
+        Returns:
+            Neo4jGraph to be passed to Neo4jVector as its graph, so both use the same pool
+        """
+        if self.graph is None:
+            self.graph = Neo4jGraph(
+                self.uri,
+                self.username,
+                self.password,
+                driver_config=self.driver_config,
+                # The schema is not used, and sampling it with APOC slows down startup on a large graph
+                refresh_schema=False,
+            )
+            self._graph_monitor = PoolMonitor(
+                self.max_connection_pool_size, self.connection_acquisition_timeout
+            )
+            # Neo4jVector queries through the driver of the graph, so both are monitored
+            self.graph._driver = MonitoredDriver(
+                self.graph._driver, self._graph_monitor
+            )
+
+        return self.graph
+
+    def connect_async(self) -> MonitoredAsyncDriver:
+        """
+        Return the shared async driver, creating it on first use.
+
+        Returns:
+            Async Neo4j driver
+        """
+        if self.async_driver is None:
+            self._async_monitor = PoolMonitor(
+                self.max_connection_pool_size, self.connection_acquisition_timeout
+            )
+            self.async_driver = MonitoredAsyncDriver(
+                AsyncGraphDatabase.driver(
+                    self.uri,
+                    auth=(self.username, self.password),
+                    **self.driver_config,
+                ),
+                self._async_monitor,
+            )
+
+        return self.async_driver
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Return the statistics of the pools that were created.
+
+        Returns:
+            Pool statistics of the synchronous and async drivers
+        """
+        metrics = dict()
+        if self._graph_monitor is not None:
+            metrics["sync"] = self._graph_monitor.stats()
+        if self._async_monitor is not None:
+            metrics["async"] = self._async_monitor.stats()
+
+        return metrics
+
+    def close(self):
+        """Close the synchronous driver. The async driver can only be closed from a coroutine, see aclose()"""
+        if self.graph is not None:
+            self.graph.close()
+            self.graph = None
+            self._graph_monitor = None
+
+    async def aclose(self):
+        """Close both drivers"""
+        if self.async_driver is not None:
+            await self.async_driver.close()
+            self.async_driver = None
+            self._async_monitor = None
+
+        self.close()
@@ -0,0 +1,166 @@
+"""
+Module for the local reranker.
+
+This module scores retrieved graph triples and vector chunks against the retriever query on the CPU,
+so that only the most relevant ones are sent to the context cleanup LLM call.
+Items are scored with BM25 over the retrieved items, optionally blended with the cosine similarity of their embeddings.
+"""
+
+# Third-party Library imports
+import numpy as np
+
+# Custom Library imports
+from sc2editor.llm.entity_matcher import STOPWORDS, tokenize
+from sc2editor.llm.token_budget import estimate_tokens
+
+
+def bm25_scores(
+    query: str, items: list[str], k1: float = 1.5, b: float = 0.75
+) -> np.ndarray:
+    """
+    Function to compute the BM25 score of each item for the query.
+
+    The inverse document frequencies are computed over the items themselves, since they are the corpus being reranked.
+
+    Args:
+        query: Retriever query
+        items: Retrieved graph triples and vector chunks
+        k1: Term frequency saturation
+        b: Length normalization
+
+    Returns:
+        BM25 score of each item
+    """
+    query_terms = list(
+        dict.fromkeys(term for term in tokenize(query) if term not in STOPWORDS)
+    )
+    if not query_terms or not items:
+        return np.zeros(len(items), dtype=np.float32)
+
+    term_index = {term: idx for idx, term in enumerate(query_terms)}
+    term_frequencies = np.zeros((len(items), len(query_terms)), dtype=np.float32)
+    item_lengths = np.zeros(len(items), dtype=np.float32)
+
+    for item_idx, item in enumerate(items):
+        item_terms = tokenize(item)
+        item_lengths[item_idx] = len(item_terms)
+        for term in item_terms:
+            term_idx = term_index.get(term)
+            if term_idx is not None:
+                term_frequencies[item_idx, term_idx] += 1
+
+    document_frequencies = (term_frequencies > 0).sum(axis=0)
+    inverse_document_frequencies = np.log(
+        1 + (len(items) - document_frequencies + 0.5) / (document_frequencies + 0.5)
+    )
+    length_norms = k1 * (1 - b + b * item_lengths / max(item_lengths.mean(), 1.0))
+
+    saturated_frequencies = (
+        term_frequencies * (k1 + 1) / (term_frequencies + length_norms[:, None])
+    )
+    return saturated_frequencies @ inverse_document_frequencies
+
+
+def cosine_similarities(
+    query_embedding: list[float], item_embeddings: list[list[float]]
+) -> np.ndarray:
+    """
+    Function to compute the cosine similarity between the query and each item.
+
+    Args:
+        query_embedding: Embedding of the retriever query
+        item_embeddings: Embedding of each item
+
+    Returns:
+        Cosine similarity of each item
+    """
+    query_vector = np.asarray(query_embedding, dtype=np.float32)
+    item_matrix = np.asarray(item_embeddings, dtype=np.float32)
+
+    norms = np.linalg.norm(item_matrix, axis=1) * np.linalg.norm(query_vector)
+    return (item_matrix @ query_vector) / np.where(norms > 0, norms, 1.0)
+
+
+class LocalReranker:
+    """Reranker that keeps the retrieved items most relevant to the query within a token budget."""
+
+    def __init__(self, token_budget: int, embedding_weight: float = 0.0):
+        """
+        Initialize the reranker.
+
+        Args:
+            token_budget: Maximum estimated tokens of the kept items
+            embedding_weight: Weight of the cosine similarity in the score, from 0 (BM25 only) to 1 (embeddings only)
+        """
+        self.token_budget = token_budget
+        self.embedding_weight = embedding_weight
+
+    def score(
+        self,
+        query: str,
+        items: list[str],
+        query_embedding: list[float] | None = None,
+        item_embeddings: list[list[float]] | None = None,
+    ) -> np.ndarray:
+        """
+        Score the items against the query.
+
+        Args:
+            query: Retriever query
+            items: Retrieved graph triples and vector chunks
+            query_embedding: Embedding of the query. If None, only BM25 is used.
+            item_embeddings: Embedding of each item. If None, only BM25 is used.
+
+        Returns:
+            Score of each item between 0 and 1
+        """
+        scores = bm25_scores(query, items)
+        if scores.size and scores.max() > 0:
+            scores = scores / scores.max()
+
+        if (
+            self.embedding_weight > 0
+            and query_embedding is not None
+            and item_embeddings is not None
+        ):
+            similarities = np.clip(
+                cosine_similarities(query_embedding, item_embeddings), 0.0, 1.0
+            )
+            scores = (
+                1 - self.embedding_weight
+            ) * scores + self.embedding_weight * similarities
+
+        return scores
+
+    def rerank(
+        self,
+        query: str,
+        items: list[str],
+        query_embedding: list[float] | None = None,
+        item_embeddings: list[list[float]] | None = None,
+    ) -> list[int]:
+        """
+        Select the most relevant items that fit in the token budget.
+
+        Args:
+            query: Retriever query
+            items: Retrieved graph triples and vector chunks
+            query_embedding: Embedding of the query. If None, only BM25 is used.
+            item_embeddings: Embedding of each item. If None, only BM25 is used.
+
+        Returns:
+            Indices of the kept items, most relevant first
+        """
+        scores = self.score(query, items, query_embedding, item_embeddings)
+
+        kept_indices = list()
+        remaining_tokens = self.token_budget
+        # Stable sort, so items with the same score keep their retrieval order
+        for idx in np.argsort(-scores, kind="stable").tolist():
+            tokens = estimate_tokens(items[idx])
+            if tokens > remaining_tokens:
+                continue
+            kept_indices.append(idx)
+            remaining_tokens -= tokens
+
+        return kept_indices
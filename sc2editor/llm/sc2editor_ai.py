@@ -7,28 +7,108 @@ Note that after finishing the LLM answer, you must initialize the graph state wi
 """
 
 # Python Standard Library imports
+import time
+import asyncio
+import logging
 from math import floor
-from typing import Annotated, Literal, TypedDict, AsyncIterator, Any
+from functools import partial
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Annotated,
+    Literal,
+    TypedDict,
+    AsyncIterator,
+    Any,
+    Awaitable,
+    Iterable,
+)
 
 # Third-party Library imports
 from pydantic import BaseModel, Field
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
+from langchain_core.messages import (
+    BaseMessage,
+    SystemMessage,
+    AIMessageChunk,
+)
 from langgraph.graph import StateGraph, START, END
+from langgraph.channels import UntrackedValue
 from langgraph.checkpoint.memory import InMemorySaver
-from langchain_neo4j import Neo4jGraph, Neo4jVector
+from langchain_neo4j import Neo4jVector
+from neo4j import RoutingControl
+from neo4j.exceptions import ClientError
 
 # Custom Library imports
+from sc2editor.embeddings import CachedEmbeddings
 from sc2editor.llm.system_prompts import (
     ROUTER_SYSTEM_PROMPT,
+    FRONT_END_SYSTEM_PROMPT,
     ENTITY_EXTRACTION_SYSTEM_PROMPT,
     RETRIEVER_QUERY_SYSTEM_PROMPT,
     CONTEXT_CLEANUP_SYSTEM_PROMPT,
     ANSWER_JUDGMENT_SYSTEM_PROMPT,
+    CONTEXT_JUDGMENT_SYSTEM_PROMPT,
+    HISTORY_SUMMARY_SYSTEM_PROMPT,
     SC2_EDITOR_AI_SYSTEM_PROMPT,
     DISALLOW_PROMPT,
 )
+from sc2editor.llm.entity_matcher import EntityMatcher
+from sc2editor.llm.graph_ranking import rank_graph_edges
+from sc2editor.llm.graph_snapshot import GraphSnapshot
+from sc2editor.llm.graph_query_cache import GraphQueryCache
+from sc2editor.llm.neo4j_pool import MonitoredAsyncDriver, Neo4jConnectionPool
+from sc2editor.llm.gemini_pool import GeminiClientPool, PooledChatGoogleGenerativeAI
+from sc2editor.llm.bounded_saver import BoundedInMemorySaver
+from sc2editor.llm.conversation_history import (
+    HistorySummaryCache,
+    format_message,
+    recent_window_start,
+    truncate_lines,
+    truncate_messages,
+    cut_message,
+    prefix_fingerprints,
+)
+from sc2editor.llm.graph_statistics import (
+    query_graph_statistics,
+    save_graph_statistics,
+    load_graph_statistics,
+)
+from sc2editor.llm.adaptive_retriever import AdaptiveVectorRetriever
+from sc2editor.llm.local_vector_index import LocalVectorIndex
+from sc2editor.llm.token_budget import estimate_tokens
+from sc2editor.llm.metrics import RunningStat, ModelLatencyRecorder
+from sc2editor.llm.reranker import LocalReranker
+from sc2editor.llm.answer_cache import (
+    SemanticAnswerCache,
+    normalize_question,
+    history_fingerprint,
+)
+from sc2editor.llm.cypher_queries import (
+    GRAPH_VERSION_QUERY,
+    ENTITY_IDS_QUERY,
+    DOCUMENT_EMBEDDINGS_QUERY,
+    GRAPH_SNAPSHOT_NODES_QUERY,
+    GRAPH_SNAPSHOT_RELATIONSHIPS_QUERY,
+    GRAPH_STATISTICS_QUERY,
+    FULLTEXT_INDEX_NAME,
+    FULLTEXT_INDEX_ONLINE_QUERY,
+    VECTOR_INDEX_NAME,
+    KEYWORD_INDEX_NAME,
+    VECTOR_INDEX_DIMENSIONS_QUERY,
+    DOCUMENT_RETRIEVAL_QUERY,
+    KEYWORD_FULLTEXT_QUERY,
+    KEYWORD_CONTAINS_QUERY,
+    KEYWORD_FULLTEXT_RANKED_QUERY,
+    KEYWORD_CONTAINS_RANKED_QUERY,
+    lucene_keyword_query,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class Router(BaseModel):
@@ -48,6 +128,18 @@ class Entities(BaseModel):
     )
 
 
+class RouterEntities(BaseModel):
+    """A model that determines whether to allow or disallow prompts and extracts key concepts from the current prompt."""
+
+    prompt_status: Literal["allow", "disallow"] = Field(
+        description="Status indicating whether the prompt is allowed or not allowed."
+    )
+    keywords: list[str] = Field(
+        default_factory=list,
+        description="A list of key concepts or keywords mentioned in the current prompt.",
+    )
+
+
 class AnswerJudgment(BaseModel):
     """A model that determines whether an answer is possible based on the conversation history up to this point and the given context."""
 
@@ -56,22 +148,91 @@ class AnswerJudgment(BaseModel):
     )
 
 
+class ContextJudgment(BaseModel):
+    """A model that organizes the context and determines whether an answer is possible based on it."""
+
+    context: str = Field(
+        description="The given context with everything not necessary for the answer removed, organized in the correct order."
+    )
+    answer_status: Literal["yes", "no"] = Field(
+        description="Status to check whether or not an answer can be given with the organized context."
+    )
+
+
 class State(TypedDict):
     messages: Annotated[
         list[BaseMessage],
         "The conversation history up to this point, including the current prompt.",
     ]
+    formatted_messages: Annotated[
+        dict[str, str],
+        "The conversation history formatted once per request within the history token budget of each node, keyed by node name",
+        UntrackedValue,
+    ]
     prompt_status: Literal["allow", "disallow"]
     keywords: Annotated[
         list[str], "A list of key concepts or keywords mentioned in the prompt."
     ]
-    graph_context: Annotated[str, "Graph Data retrieved from graph retriever"]
-    vector_context: Annotated[str, "Vector Data retrieved from vector retriever"]
-    context: Annotated[str, "Reference to use in answer"]
+    # The retrieval payloads are the largest values of the state and are only needed while a request runs,
+    # so they are kept in untracked channels that are never written to checkpoints
+    graph_context: Annotated[
+        str, "Graph Data retrieved from graph retriever", UntrackedValue
+    ]
+    vector_context: Annotated[
+        str, "Vector Data retrieved from vector retriever", UntrackedValue
+    ]
+    context: Annotated[str, "Reference to use in answer", UntrackedValue]
     retriever_attempt_count: Annotated[int, "The number of retriever attempts."]
     retriever_query: Annotated[str, "Query information needed for answering"]
     answer_allow_status: Literal["yes", "no"]
     answer: Annotated[str, "Answers to prompt"]
+    prefetched_vector_documents: Annotated[
+        list[Document],
+        "Vector Data searched with the raw prompt while the router was running",
+        UntrackedValue,
+    ]
+
+
+# Nodes that call a chat model, including the summarization of the conversation history in history_node
+MODEL_NODES = (
+    "history_node",
+    "router_node",
+    "disallow_node",
+    "entity_extract_node",
+    "front_end_node",
+    "retriever_query_node",
+    "context_cleanup_node",
+    "answer_judgment_node",
+    "context_judgment_node",
+    "answer_node",
+)
+
+# Nodes that send the conversation history to the LLM as text
+TEXT_HISTORY_NODES = (
+    "router_node",
+    "front_end_node",
+    "retriever_query_node",
+    "context_cleanup_node",
+    "answer_judgment_node",
+    "context_judgment_node",
+)
+
+
+def normalize_keywords(keywords: list[str]) -> list[str]:
+    """
+    Function to lower-case the keywords and remove empty or duplicate keywords while keeping their order.
+
+    Args:
+        keywords: Keywords extracted from the prompt
+
+    Returns:
+        Distinct keywords as they are looked up in the graph
+    """
+    return list(
+        dict.fromkeys(
+            keyword.strip().lower() for keyword in keywords if keyword.strip()
+        )
+    )
 
 
 class SC2EditorLLM:
@@ -84,9 +245,70 @@ class SC2EditorLLM:
         neo4j_password: str,
         model: str,
         embedding: str,
+        embedding_cache_enabled: bool = False,
+        embedding_cache_dir: str | Path = "cache/embeddings",
+        embedding_cache_max_entries: int = 20000,
+        local_vector_index_enabled: bool = False,
+        local_vector_index_snapshot: bool = True,
+        local_vector_index_dir: str | Path = "cache/vector_index",
+        local_vector_index_precision: Literal["float32", "float16", "int8"] = "float32",
+        local_vector_index_dimensions: int | None = None,
+        local_vector_index_rescore_factor: int = 0,
+        local_vector_index_search_type: Literal["vector", "hybrid"] = "hybrid",
+        local_vector_index_rrf_k: int = 60,
+        local_vector_index_vector_weight: float = 1.0,
+        local_vector_index_keyword_weight: float = 1.0,
         maximum_information_acquisition_rate: int | float = 0.15,
         maximum_retriever_attempts: int = 2,
         timeout: int | float = 30.0,
+        front_end_mode: Literal["sequential", "speculative", "fused"] = "sequential",
+        entity_extraction_mode: Literal["llm", "local", "hybrid"] = "llm",
+        context_judgment_mode: Literal["separate", "fused"] = "separate",
+        speculative_vector_search: bool = False,
+        graph_retrieval_timeout: int | float = 10.0,
+        vector_retrieval_timeout: int | float = 10.0,
+        graph_retrieval_mode: Literal["proportional", "ranked"] = "proportional",
+        graph_context_token_budget: int = 2000,
+        graph_candidate_limit: int = 200,
+        graph_edge_type_priority: dict[str, float] | None = None,
+        graph_snapshot_enabled: bool = False,
+        graph_snapshot_hops: int = 1,
+        graph_query_cache_enabled: bool = True,
+        graph_query_cache_max_entries: int = 1024,
+        graph_query_cache_ttl: int | float = 300.0,
+        vector_retrieval_mode: Literal["proportional", "adaptive"] = "proportional",
+        vector_candidate_k: int = 50,
+        vector_score_threshold: float = 0.5,
+        vector_score_gap: float = 0.15,
+        vector_context_token_budget: int = 4000,
+        reranker_enabled: bool = False,
+        reranker_token_budget: int = 3000,
+        reranker_embedding_weight: float = 0.0,
+        context_cleanup_skip_tokens: int = 0,
+        graph_query_backend: Literal["async_driver", "executor"] = "async_driver",
+        graph_query_concurrency: int = 8,
+        answer_cache_enabled: bool = False,
+        answer_cache_similarity_threshold: float = 0.95,
+        answer_cache_max_entries: int = 256,
+        answer_cache_ttl: int | float = 3600.0,
+        answer_cache_history_turns: int = 2,
+        answer_cache_embedding_timeout: int | float = 1.0,
+        graph_version_check_interval: int | float = 60.0,
+        graph_statistics_cache_enabled: bool = False,
+        graph_statistics_file: str | Path = "cache/graph_statistics.json",
+        vector_index_embedding_check: bool = True,
+        checkpointer_mode: Literal["memory", "bounded", "none"] = "memory",
+        checkpointer_max_threads: int = 256,
+        history_token_budget: int = 0,
+        history_summary_cache_max_entries: int = 1024,
+        history_node_token_budgets: dict[str, int] | None = None,
+        max_prompt_tokens: int = 0,
+        max_history_message_tokens: int = 0,
+        node_models: dict[str, str] | None = None,
+        node_timeouts: dict[str, int | float] | None = None,
+        neo4j_pool: Neo4jConnectionPool | None = None,
+        gemini_pool: GeminiClientPool | None = None,
+        auto_initialize: bool = True,
     ):
         """
         Initialize the SC2EditorLLM with database connections and models.
@@ -97,26 +319,203 @@ class SC2EditorLLM:
             neo4j_password: The password of Neo4j Database account
             model: Gemini LLM Model
             embedding: Gemini Embedding Model
+            embedding_cache_enabled: Whether to keep query and document embeddings in a persistent on-disk cache
+            embedding_cache_dir: Directory of the embedding cache
+            embedding_cache_max_entries: Maximum number of cached embeddings
+            local_vector_index_enabled: Whether to answer vector searches from an in-process index instead of Neo4j
+            local_vector_index_snapshot: Whether to save the local vector index to a snapshot file and memory-map it on the next start
+            local_vector_index_dir: Directory of the local vector index snapshot
+            local_vector_index_precision: Precision of the embeddings searched by the local vector index
+            local_vector_index_dimensions: Number of leading embedding dimensions searched by the local vector index. If None, all dimensions are searched.
+            local_vector_index_rescore_factor: If positive, the local vector index re-scores k * local_vector_index_rescore_factor candidates with the full-precision embeddings
+            local_vector_index_search_type: 'hybrid' fuses the local vector search with a local BM25 search like the Neo4j hybrid search, 'vector' searches the embeddings only
+            local_vector_index_rrf_k: Rank offset of the reciprocal rank fusion of the local hybrid search
+            local_vector_index_vector_weight: Weight of the vector ranking in the local hybrid search
+            local_vector_index_keyword_weight: Weight of the BM25 ranking in the local hybrid search
             maximum_information_acquisition_rate: Maximum information rate obtained from retriever (Values ​​from 0 to 1)
             maximum_retriever_attempts: Maximum of retriever attempts
             timeout: Timeout for LLM requests in seconds
+            front_end_mode: How router and entity extraction are run ('sequential', 'speculative' or 'fused')
+            entity_extraction_mode: How keywords are extracted ('llm', 'local' or 'hybrid'). 'hybrid' calls the LLM only when the local matcher finds nothing
+            context_judgment_mode: How context cleanup and answer judgment are run ('separate' or 'fused')
+            speculative_vector_search: Whether to also start the first vector search with the router in speculative mode
+            graph_retrieval_timeout: Timeout for the graph retrieval leg in seconds
+            vector_retrieval_timeout: Timeout for the vector retrieval leg in seconds
+            graph_retrieval_mode: How much graph data is retrieved ('proportional' to the database size or 'ranked' within a token budget)
+            graph_context_token_budget: In ranked mode, estimated tokens of graph data on the last retriever attempt
+            graph_candidate_limit: In ranked mode, maximum number of candidate edges fetched per keyword
+            graph_edge_type_priority: In ranked mode, weight per relationship type
+            graph_snapshot_enabled: Whether to answer the keyword graph lookups from an in-memory snapshot of the graph instead of Neo4j
+            graph_snapshot_hops: Number of hops the in-memory graph snapshot expands from the matched nodes
+            graph_query_cache_enabled: Whether to cache the results of the keyword graph lookup queries until the graph version changes
+            graph_query_cache_max_entries: Maximum number of cached keyword lookup results
+            graph_query_cache_ttl: Time to live of a cached keyword lookup result in seconds
+            vector_retrieval_mode: How many documents a vector search returns ('proportional' to the number of documents or 'adaptive')
+            vector_candidate_k: In adaptive mode, number of candidate documents fetched per vector search
+            vector_score_threshold: In adaptive mode, minimum score of a returned document
+            vector_score_gap: In adaptive mode, a drop in score larger than this between consecutive candidates ends the result
+            vector_context_token_budget: In adaptive mode, maximum estimated tokens of the documents of a vector search
+            reranker_enabled: Whether to rerank the retrieved graph triples and vector chunks locally before context cleanup
+            reranker_token_budget: Maximum estimated tokens of the reranked items of a retriever attempt
+            reranker_embedding_weight: Weight of the embedding cosine similarity in the reranker score (0 is BM25 only)
+            context_cleanup_skip_tokens: Context of at most this many estimated tokens is not sent to context cleanup (0 always cleans up)
+            graph_query_backend: How Cypher queries are kept off the event loop ('async_driver' or 'executor')
+            graph_query_concurrency: Maximum number of Cypher queries running at the same time
+            answer_cache_enabled: Whether to replay cached answers for questions similar to ones already answered
+            answer_cache_similarity_threshold: Minimum cosine similarity between two questions to replay a cached answer
+            answer_cache_max_entries: Maximum number of cached answers
+            answer_cache_ttl: Time to live of a cached answer in seconds
+            answer_cache_history_turns: Number of most recent history messages that must match to replay a cached answer
+            answer_cache_embedding_timeout: Timeout for embedding the question in seconds. A slower embedding skips the answer cache.
+            graph_version_check_interval: Minimum interval in seconds between checks whether the graph database was re-ingested
+            graph_statistics_cache_enabled: Whether to load the graph statistics from the file written at ingestion time instead of counting them at startup
+            graph_statistics_file: Path of the graph statistics file
+            vector_index_embedding_check: Whether to embed the Documents without an embedding when attaching to the Neo4j vector index at startup
+            checkpointer_mode: How the graph state is checkpointed. 'memory' keeps every step until delete_thread_id, 'bounded' keeps
+                the final state of at most checkpointer_max_threads threads, and 'none' runs the graph without a checkpointer.
+            checkpointer_max_threads: In bounded mode, maximum number of threads whose state is kept
+            history_token_budget: Estimated tokens of the most recent messages sent verbatim in the conversation history.
+                Older messages are replaced with a summary. If 0, the whole conversation history is sent verbatim.
+            history_summary_cache_max_entries: Maximum number of cached conversation summaries
+            history_node_token_budgets: Estimated tokens of conversation history sent by each node, keyed by node name. The oldest messages are cut first.
+                'history_node' limits the messages summarized at once. Nodes that are not listed send the whole history.
+            max_prompt_tokens: Current prompts of more estimated tokens are rejected before any LLM call (0 is unlimited)
+            max_history_message_tokens: History messages of more estimated tokens are cut to this before any LLM call (0 is unlimited)
+            node_models: Gemini LLM Model of each node, keyed by node name. Nodes that are not listed use model.
+            node_timeouts: Timeout for the LLM requests of each node in seconds, keyed by node name. Nodes that are not listed use timeout.
+            neo4j_pool: Shared Neo4j connection pool. If None, a pool with the default settings is created and closed with this instance.
+            gemini_pool: Shared Gemini API client pool used by every chat model and the embeddings. If None, a pool with the default settings is created and closed with this instance.
+            auto_initialize: Whether to initialize synchronously on construction. Set it to False to call ainitialize() later.
         """
         self.neo4j_uri = neo4j_uri
         self.neo4j_username = neo4j_username
         self.neo4j_password = neo4j_password
         self.model = model
         self.embedding = embedding
+        self.embedding_cache_enabled = embedding_cache_enabled
+        self.embedding_cache_dir = embedding_cache_dir
+        self.embedding_cache_max_entries = embedding_cache_max_entries
+        self.local_vector_index_enabled = local_vector_index_enabled
+        self.local_vector_index_snapshot = local_vector_index_snapshot
+        self.local_vector_index_dir = local_vector_index_dir
+        self.local_vector_index_precision = local_vector_index_precision
+        self.local_vector_index_dimensions = local_vector_index_dimensions
+        self.local_vector_index_rescore_factor = local_vector_index_rescore_factor
+        self.local_vector_index_search_type = local_vector_index_search_type
+        self.local_vector_index_rrf_k = local_vector_index_rrf_k
+        self.local_vector_index_vector_weight = local_vector_index_vector_weight
+        self.local_vector_index_keyword_weight = local_vector_index_keyword_weight
         self.maximum_information_acquisition_rate = maximum_information_acquisition_rate
         self.maximum_retriever_attempts = maximum_retriever_attempts
         self.timeout = timeout
+        self.front_end_mode = front_end_mode
+        self.entity_extraction_mode = entity_extraction_mode
+        self.context_judgment_mode = context_judgment_mode
+        self.speculative_vector_search = speculative_vector_search
+        self.graph_retrieval_timeout = graph_retrieval_timeout
+        self.vector_retrieval_timeout = vector_retrieval_timeout
+        self.graph_retrieval_mode = graph_retrieval_mode
+        self.graph_context_token_budget = graph_context_token_budget
+        self.graph_candidate_limit = graph_candidate_limit
+        self.graph_edge_type_priority = graph_edge_type_priority or dict()
+        self.graph_snapshot_enabled = graph_snapshot_enabled
+        self.graph_snapshot_hops = graph_snapshot_hops
+        self.graph_query_cache = (
+            GraphQueryCache(
+                max_entries=graph_query_cache_max_entries, ttl=graph_query_cache_ttl
+            )
+            if graph_query_cache_enabled
+            else None
+        )
+        self.vector_retrieval_mode = vector_retrieval_mode
+        self.vector_candidate_k = vector_candidate_k
+        self.vector_score_threshold = vector_score_threshold
+        self.vector_score_gap = vector_score_gap
+        self.vector_context_token_budget = vector_context_token_budget
+        self.reranker = (
+            LocalReranker(reranker_token_budget, reranker_embedding_weight)
+            if reranker_enabled
+            else None
+        )
+        self.context_cleanup_skip_tokens = context_cleanup_skip_tokens
+        self.graph_query_backend = graph_query_backend
+        self.graph_query_concurrency = graph_query_concurrency
+        self.answer_cache_history_turns = answer_cache_history_turns
+        self.answer_cache_embedding_timeout = answer_cache_embedding_timeout
+        self.graph_version_check_interval = graph_version_check_interval
+        self.graph_statistics_cache_enabled = graph_statistics_cache_enabled
+        self.graph_statistics_file = graph_statistics_file
+        self.vector_index_embedding_check = vector_index_embedding_check
+        self.checkpointer_mode = checkpointer_mode
+        self.checkpointer_max_threads = checkpointer_max_threads
+        self.history_token_budget = history_token_budget
+        self.history_summary_cache = HistorySummaryCache(
+            max_entries=history_summary_cache_max_entries
+        )
+        self.history_summary_failures = 0
+        self.history_node_token_budgets = history_node_token_budgets or dict()
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_history_message_tokens = max_history_message_tokens
+        self.rejected_requests = 0
+        self.compacted_requests = 0
+        self.node_models = node_models or dict()
+        self.node_timeouts = node_timeouts or dict()
+        for node in {*self.node_models, *self.node_timeouts} - set(MODEL_NODES):
+            logger.warning(
+                f"Ignored the model settings of {node}, which does not call a chat model"
+            )
+        self.model_latency_recorders: dict[str, ModelLatencyRecorder] = dict()
+        self.history_tokens_stat = RunningStat()
+
+        # Semantic answer cache in front of the graph
+        self.answer_cache = (
+            SemanticAnswerCache(
+                similarity_threshold=answer_cache_similarity_threshold,
+                max_entries=answer_cache_max_entries,
+                ttl=answer_cache_ttl,
+            )
+            if answer_cache_enabled
+            else None
+        )
+        # Metadata of the last answer_node chunk streamed by the graph, the shape of the metadata of replayed answers
+        self._answer_chunk_metadata: dict[str, Any] = {"langgraph_node": "answer_node"}
+        self.graph_version = None
+        self.vector_k_stat = RunningStat()
+        self.vector_tokens_stat = RunningStat()
+        self.reranker_input_tokens_stat = RunningStat()
+        self.reranker_output_tokens_stat = RunningStat()
+        self.context_cleanup_skipped = 0
+        self.entity_matcher = None
+        self.graph_snapshot = None
+        self.local_vector_index = None
+        self._background_tasks = set()
+        self._graph_version_checked_at = float("-inf")
+        self._graph_version_lock = asyncio.Lock()
 
         # Initialize connections
+        self._owns_neo4j_pool = neo4j_pool is None
+        self.neo4j_pool = neo4j_pool or Neo4jConnectionPool(
+            neo4j_uri, neo4j_username, neo4j_password
+        )
+        self._owns_gemini_pool = gemini_pool is None
+        self.gemini_pool = gemini_pool or GeminiClientPool()
         self.neo4j_graph = None
+        self.neo4j_async_driver: MonitoredAsyncDriver | None = None
+        self._graph_query_executor: ThreadPoolExecutor | None = None
+        self._graph_query_semaphore: asyncio.Semaphore | None = None
+        self.fulltext_index_available = False
+        self.embedding_dimensions: int | None = None
+        self.statistics_source: Literal["file", "query"] | None = None
+        self.startup_timings: dict[str, float] = dict()
+        self._chains_created = False
+        self.embeddings = None
         self.vector_retriever = None
+        self.checkpointer = None
         self.graph = None
         self._is_initialized = False
 
-        self.initialize()
+        if auto_initialize:
+            self.initialize()
 
     def __enter__(self):
         """Context manager entry"""
@@ -130,12 +529,12 @@ class SC2EditorLLM:
 
     async def __aenter__(self):
         """Async context manager entry"""
-        self.initialize()
+        await self.ainitialize()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        self.close()
+        await self.aclose()
         return None
 
     def initialize(self):
@@ -143,47 +542,365 @@ class SC2EditorLLM:
         if self._is_initialized:
             return None
 
-        # Initialize Neo4j graph connection
-        self.neo4j_graph = Neo4jGraph(
-            self.neo4j_uri, self.neo4j_username, self.neo4j_password
-        )
+        self.startup_timings = dict()
+        start = time.perf_counter()
+
+        with self._startup_phase("connections"):
+            self._create_connections()
 
         # Retrieving statistics from a Neo4j database
-        self._neo4j_statistics()
+        with self._startup_phase("statistics"):
+            self._neo4j_statistics()
+
+        with self._startup_phase("chains"):
+            self._create_chains()
+
+        if self.entity_extraction_mode != "llm":
+            with self._startup_phase("entity_matcher"):
+                entity_ids = [
+                    el["id"] for el in self.neo4j_graph.query(ENTITY_IDS_QUERY)
+                ]
+                self.entity_matcher = EntityMatcher(entity_ids)
+
+        if self.graph_snapshot_enabled:
+            with self._startup_phase("graph_snapshot"):
+                try:
+                    self.graph_snapshot = GraphSnapshot.build(
+                        self.neo4j_graph.query(GRAPH_SNAPSHOT_NODES_QUERY),
+                        self.neo4j_graph.query(GRAPH_SNAPSHOT_RELATIONSHIPS_QUERY),
+                        version=self.graph_version,
+                    )
+                except Exception as e:
+                    logger.warning(
+                        f"Could not load the graph snapshot, using Cypher lookups: {e}"
+                    )
+
+        with self._startup_phase("vector_retriever"):
+            self._create_vector_retriever()
+
+        with self._startup_phase("state_graph"):
+            self._build_graph()
+
+        self.startup_timings["total"] = (time.perf_counter() - start) * 1000
+        self._is_initialized = True
+        self._log_startup_timings()
+
+    async def ainitialize(self):
+        """
+        Initialize database connections and build the graph without blocking the event loop.
+
+        Phases that do not depend on each other run concurrently. The chains are created while the database is queried,
+        the entity matcher is built while the statistics are loaded, and the graph snapshot
+        and the vector retriever are built together once the graph version is known.
+        """
+        if self._is_initialized:
+            return None
+
+        self.startup_timings = dict()
+        start = time.perf_counter()
+
+        async def load_graph_snapshot():
+            try:
+                await self._load_graph_snapshot()
+            except Exception as e:
+                logger.warning(
+                    f"Could not load the graph snapshot, using Cypher lookups: {e}"
+                )
+
+        tasks = list()
+        try:
+            # The Gemini clients do not depend on the database
+            tasks.append(
+                asyncio.create_task(
+                    self._timed_startup_phase(
+                        "chains", asyncio.to_thread(self._create_chains)
+                    )
+                )
+            )
+
+            # Neo4jGraph verifies the connection synchronously
+            await self._timed_startup_phase(
+                "connections", asyncio.to_thread(self._create_connections)
+            )
+
+            if self.entity_extraction_mode != "llm":
+                tasks.append(
+                    asyncio.create_task(
+                        self._timed_startup_phase(
+                            "entity_matcher", self._load_entity_matcher()
+                        )
+                    )
+                )
+
+            # Retrieving statistics from a Neo4j database
+            await self._timed_startup_phase("statistics", self._aneo4j_statistics())
+
+            # The graph snapshot and the local vector index are tagged with the graph version
+            if self.graph_snapshot_enabled:
+                tasks.append(
+                    asyncio.create_task(
+                        self._timed_startup_phase(
+                            "graph_snapshot", load_graph_snapshot()
+                        )
+                    )
+                )
+            # Neo4jVector checks the vector index synchronously
+            tasks.append(
+                asyncio.create_task(
+                    self._timed_startup_phase(
+                        "vector_retriever",
+                        asyncio.to_thread(self._create_vector_retriever),
+                    )
+                )
+            )
+
+            await asyncio.gather(*tasks)
+        except BaseException:
+            await self._cancel_tasks(tasks)
+            raise
+
+        with self._startup_phase("state_graph"):
+            self._build_graph()
+
+        self.startup_timings["total"] = (time.perf_counter() - start) * 1000
+        self._is_initialized = True
+        self._log_startup_timings()
+
+    @contextmanager
+    def _startup_phase(self, phase: str):
+        """
+        Record the wall time of a startup phase in startup_timings.
+
+        Args:
+            phase: Name of the phase
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[phase] = (time.perf_counter() - start) * 1000
+
+    async def _timed_startup_phase(self, phase: str, awaitable: Awaitable[Any]) -> Any:
+        """
+        Await a startup phase and record its wall time in startup_timings.
+
+        Args:
+            phase: Name of the phase
+            awaitable: Work of the phase
+
+        Returns:
+            Result of the awaitable
+        """
+        with self._startup_phase(phase):
+            return await awaitable
+
+    def _log_startup_timings(self):
+        """Log the wall time of each startup phase. Phases run by ainitialize overlap, so they do not add up to the total."""
+        phases = ", ".join(
+            f"{phase} {milliseconds:.0f} ms"
+            for phase, milliseconds in self.startup_timings.items()
+            if phase != "total"
+        )
+        logger.info(
+            f"Initialized SC2EditorLLM in {self.startup_timings['total']:.0f} ms "
+            f"(statistics from {self.statistics_source}): {phases}"
+        )
+
+    def _create_connections(self):
+        """Create the Neo4j graph connection and the non-blocking Cypher query backend"""
+        # Graph and vector retrieval share the driver of the pool
+        self.neo4j_graph = self.neo4j_pool.connect()
+
+        # Cypher queries issued while serving requests must not block the event loop
+        if self.graph_query_backend == "async_driver":
+            self.neo4j_async_driver = self.neo4j_pool.connect_async()
+        else:
+            self._graph_query_executor = ThreadPoolExecutor(
+                max_workers=self.graph_query_concurrency,
+                thread_name_prefix="neo4j-query",
+            )
+        self._graph_query_semaphore = asyncio.Semaphore(self.graph_query_concurrency)
+
+    def _create_vector_retriever(self):
+        """Create the embeddings and the vector retriever"""
+        self.embeddings = GoogleGenerativeAIEmbeddings(
+            model=self.embedding, google_api_key=self.gemini_pool.api_key
+        )
+        self.embeddings.client = self.gemini_pool.sync_client()
+        if self.embedding_cache_enabled:
+            self.embeddings = CachedEmbeddings(
+                self.embeddings,
+                model=self.embedding,
+                cache_dir=self.embedding_cache_dir,
+                max_entries=self.embedding_cache_max_entries,
+            )
+        vector_store = None
+        # Documents without an embedding are embedded before the local vector index loads the embeddings
+        if self.vector_index_embedding_check:
+            vector_store = self._create_neo4j_vector()
+
+        # Vector searches are answered in memory when the documents could be loaded, otherwise by Neo4j
+        if self.local_vector_index_enabled:
+            try:
+                self.local_vector_index = LocalVectorIndex(
+                    self.embeddings,
+                    precision=self.local_vector_index_precision,
+                    dimensions=self.local_vector_index_dimensions,
+                    rescore_factor=self.local_vector_index_rescore_factor,
+                    search_type=self.local_vector_index_search_type,
+                    rrf_k=self.local_vector_index_rrf_k,
+                    vector_weight=self.local_vector_index_vector_weight,
+                    keyword_weight=self.local_vector_index_keyword_weight,
+                )
+                self._load_local_vector_index(use_snapshot=True)
+                vector_store = self.local_vector_index
+            except Exception as e:
+                logger.warning(
+                    f"Could not build the local vector index, using Neo4j vector search: {e}"
+                )
+                self.local_vector_index = None
+        if vector_store is None:
+            vector_store = self._create_neo4j_vector()
 
         # Initialize vector retriever
-        # Since embedding_text is small in size, add a ratio
-        additional_ratio = 0
-        k = floor(
-            self.embedding_text_count
-            * (self.maximum_information_acquisition_rate + additional_ratio)
-        )
-        self.vector_retriever = Neo4jVector.from_existing_graph(
-            GoogleGenerativeAIEmbeddings(model=self.embedding),
+        if self.vector_retrieval_mode == "adaptive":
+            # The number of documents depends on their scores, not on the size of the corpus
+            self.vector_retriever = AdaptiveVectorRetriever(
+                vector_store=vector_store,
+                candidate_k=self.vector_candidate_k,
+                score_threshold=self.vector_score_threshold,
+                score_gap=self.vector_score_gap,
+                token_budget=self.vector_context_token_budget,
+            )
+        else:
+            # Since embedding_text is small in size, add a ratio
+            additional_ratio = 0
+            k = floor(
+                self.embedding_text_count
+                * (self.maximum_information_acquisition_rate + additional_ratio)
+            )
+            self.vector_retriever = vector_store.as_retriever(search_kwargs={"k": k})
+
+    def _create_neo4j_vector(self) -> Neo4jVector:
+        """
+        Attach to the vector and keyword indexes of the Document embeddings in Neo4j.
+
+        Returns:
+            Neo4j vector store
+        """
+        # Passing the dimensions of the existing vector index saves embedding a probe text to measure them
+        if self.vector_index_embedding_check:
+            # Creates the indexes if they are missing and embeds the Documents without an embedding
+            return Neo4jVector.from_existing_graph(
+                self.embeddings,
+                search_type="hybrid",
+                node_label="Document",
+                text_node_properties=["text"],
+                embedding_node_property="embedding",
+                index_name=VECTOR_INDEX_NAME,
+                keyword_index_name=KEYWORD_INDEX_NAME,
+                embedding_dimension=self.embedding_dimensions,
+                graph=self.neo4j_graph,
+            )
+
+        return Neo4jVector.from_existing_index(
+            self.embeddings,
+            index_name=VECTOR_INDEX_NAME,
+            keyword_index_name=KEYWORD_INDEX_NAME,
             search_type="hybrid",
-            node_label="Document",
-            text_node_properties=["text"],
-            embedding_node_property="embedding",
-            url=self.neo4j_uri,
-            username=self.neo4j_username,
-            password=self.neo4j_password,
-        ).as_retriever(search_kwargs={"k": k})
-
-        # Build the state graph
+            embedding_dimension=self.embedding_dimensions,
+            retrieval_query=DOCUMENT_RETRIEVAL_QUERY,
+            graph=self.neo4j_graph,
+        )
+
+    def _build_graph(self):
+        """Build and compile the state graph"""
         self.builder = self._create_graph()
         self.graph = self.builder.compile(checkpointer=self.checkpointer)
-        self._is_initialized = True
+
+    def _load_local_vector_index(self, use_snapshot: bool):
+        """
+        Load the Document embeddings into the local vector index.
+
+        Args:
+            use_snapshot: Whether a snapshot saved from the current graph version may be memory-mapped instead
+        """
+        if (
+            use_snapshot
+            and self.local_vector_index_snapshot
+            and self.local_vector_index.load_snapshot(
+                self.local_vector_index_dir,
+                self.graph_version,
+                self.embedding_text_count,
+            )
+        ):
+            logger.info(
+                f"Memory-mapped {len(self.local_vector_index)} documents from the vector index snapshot."
+            )
+            return None
+
+        response = self.neo4j_graph.query(DOCUMENT_EMBEDDINGS_QUERY)
+        if not response:
+            raise ValueError("There is no embedded document in the graph database.")
+
+        self.local_vector_index.load(
+            texts=[el["text"] for el in response],
+            metadatas=[
+                {
+                    key: value
+                    for key, value in el["metadata"].items()
+                    if value is not None
+                }
+                for el in response
+            ],
+            embeddings=[el["embedding"] for el in response],
+            version=self.graph_version,
+            snapshot_dir=self.local_vector_index_dir
+            if self.local_vector_index_snapshot
+            else None,
+        )
+        logger.info(
+            f"Loaded {len(self.local_vector_index)} documents into the local vector index."
+        )
+
+    async def _refresh_local_vector_index(self):
+        """Reload the local vector index, keeping the previous documents if that fails"""
+        try:
+            await asyncio.to_thread(self._load_local_vector_index, use_snapshot=False)
+        except Exception as e:
+            logger.warning(f"Could not reload the local vector index: {e}")
 
     def close(self):
         """Close database connections and cleanup resources"""
-        if self.neo4j_graph:
-            self.neo4j_graph.close()
-            self.neo4j_graph = None
+        # A pool injected by the application is closed by the application
+        if self._owns_neo4j_pool:
+            self.neo4j_pool.close()
+        if self._owns_gemini_pool:
+            self.gemini_pool.close()
+        self.neo4j_graph = None
+
+        # The async driver can only be closed from a coroutine, see aclose()
+        self.neo4j_async_driver = None
+        if self._graph_query_executor:
+            self._graph_query_executor.shutdown(wait=False, cancel_futures=True)
+            self._graph_query_executor = None
 
         self.vector_retriever = None
         self.graph = None
         self._is_initialized = False
 
+    async def aclose(self):
+        """Close database connections including the async Neo4j driver and cleanup resources"""
+        await self._cancel_tasks(self._background_tasks)
+
+        if self._owns_neo4j_pool:
+            await self.neo4j_pool.aclose()
+        if self._owns_gemini_pool:
+            await self.gemini_pool.aclose()
+        self.neo4j_async_driver = None
+
+        self.close()
+
     def _ensure_initialized(self):
         """Ensure the system is initialized before use"""
         if not self._is_initialized:
@@ -203,37 +920,214 @@ class SC2EditorLLM:
 
     def _neo4j_statistics(self):
         """Method to get statistics such as total number of nodes, total number of relationships, number of embedded texts, etc. in Neo4j database"""
-        # Query total number of nodes
-        node_count_query = """
-        MATCH (n)
-        RETURN count(n) AS TotalNodes;
+        statistics = None
+        if self.graph_statistics_cache_enabled:
+            graph_version = self.neo4j_graph.query(GRAPH_VERSION_QUERY)[0][
+                "GraphVersion"
+            ]
+            statistics = load_graph_statistics(
+                self.graph_statistics_file, graph_version
+            )
+
+        if statistics is None:
+            statistics = query_graph_statistics(self.neo4j_graph)
+            self._set_statistics(statistics, source="query")
+            self._save_graph_statistics(statistics)
+        else:
+            self._set_statistics(statistics, source="file")
+
+        fulltext_index_result = self.neo4j_graph.query(
+            FULLTEXT_INDEX_ONLINE_QUERY, {"index_name": FULLTEXT_INDEX_NAME}
+        )[0]
+        self.fulltext_index_available = fulltext_index_result["IndexOnline"]
+
+        vector_index_result = self.neo4j_graph.query(
+            VECTOR_INDEX_DIMENSIONS_QUERY, {"index_name": VECTOR_INDEX_NAME}
+        )
+        self.embedding_dimensions = (
+            vector_index_result[0]["EmbeddingDimensions"]
+            if vector_index_result
+            else None
+        )
+
+    async def _aneo4j_statistics(self):
+        """Asynchronous version of _neo4j_statistics that runs the queries concurrently through the non-blocking query backend"""
+        # Without the statistics file, the statistics are counted in the same round trip as the index checks
+        (
+            statistics_result,
+            fulltext_index_result,
+            vector_index_result,
+        ) = await asyncio.gather(
+            self._aquery(
+                GRAPH_VERSION_QUERY
+                if self.graph_statistics_cache_enabled
+                else GRAPH_STATISTICS_QUERY
+            ),
+            self._aquery(
+                FULLTEXT_INDEX_ONLINE_QUERY, {"index_name": FULLTEXT_INDEX_NAME}
+            ),
+            self._aquery(
+                VECTOR_INDEX_DIMENSIONS_QUERY, {"index_name": VECTOR_INDEX_NAME}
+            ),
+        )
+
+        statistics = None
+        if self.graph_statistics_cache_enabled:
+            statistics = await asyncio.to_thread(
+                load_graph_statistics,
+                self.graph_statistics_file,
+                statistics_result[0]["GraphVersion"],
+            )
+            if statistics is None:
+                statistics_result = await self._aquery(GRAPH_STATISTICS_QUERY)
+
+        if statistics is None:
+            statistics = statistics_result[0]
+            self._set_statistics(statistics, source="query")
+            await asyncio.to_thread(self._save_graph_statistics, statistics)
+        else:
+            self._set_statistics(statistics, source="file")
+
+        self.fulltext_index_available = fulltext_index_result[0]["IndexOnline"]
+        self.embedding_dimensions = (
+            vector_index_result[0]["EmbeddingDimensions"]
+            if vector_index_result
+            else None
+        )
+
+    def _set_statistics(
+        self, statistics: dict[str, int], source: Literal["file", "query"]
+    ):
+        """
+        Set the statistics of the Neo4j database.
+
+        Args:
+            statistics: Statistics record returned by GRAPH_STATISTICS_QUERY
+            source: Whether the statistics were loaded from the statistics file or counted by a query
+        """
+        self.node_count = statistics["TotalNodes"]
+        self.relationship_count = statistics["TotalRelationships"]
+        self.embedding_text_count = statistics["EmbeddingText"]
+        self.graph_version = statistics["GraphVersion"]
+        self.statistics_source = source
+
+    def _save_graph_statistics(self, statistics: dict[str, int]):
+        """
+        Save statistics counted at startup, so the next start can load them even if the ingestion scripts did not.
+
+        Args:
+            statistics: Statistics record returned by GRAPH_STATISTICS_QUERY
+        """
+        if not self.graph_statistics_cache_enabled:
+            return None
+
+        try:
+            save_graph_statistics(self.graph_statistics_file, statistics)
+        except OSError as e:
+            logger.warning(f"Could not save the graph statistics file: {e}")
+
+    async def _load_entity_matcher(self):
+        """Load the ids of all entity nodes and build the local entity matcher from them"""
+        response = await self._aquery(ENTITY_IDS_QUERY)
+
+        # Building the automaton over every node id takes a while on a large graph
+        self.entity_matcher = await asyncio.to_thread(
+            EntityMatcher, [el["id"] for el in response]
+        )
+        logger.info(
+            f"Built the local entity matcher over {len(self.entity_matcher)} entities."
+        )
+
+    async def _refresh_entity_matcher(self):
+        """Rebuild the local entity matcher, keeping the previous one if that fails"""
+        try:
+            await self._load_entity_matcher()
+        except Exception as e:
+            logger.warning(f"Could not rebuild the local entity matcher: {e}")
+
+    async def _load_graph_snapshot(self):
+        """Load the nodes and relationships of the graph retrieval and build the in-memory graph snapshot from them"""
+        graph_version = self.graph_version
+        nodes, relationships = await asyncio.gather(
+            self._aquery(GRAPH_SNAPSHOT_NODES_QUERY),
+            self._aquery(GRAPH_SNAPSHOT_RELATIONSHIPS_QUERY),
+        )
+
+        self.graph_snapshot = await asyncio.to_thread(
+            GraphSnapshot.build, nodes, relationships, graph_version
+        )
+        logger.info(
+            f"Built the graph snapshot over {len(self.graph_snapshot)} nodes "
+            f"and {self.graph_snapshot.relationship_count} relationships."
+        )
+
+    async def _refresh_graph_snapshot(self):
+        """Rebuild the in-memory graph snapshot, keeping the previous one if that fails"""
+        try:
+            await self._load_graph_snapshot()
+        except Exception as e:
+            logger.warning(f"Could not rebuild the graph snapshot: {e}")
+
+    async def _aquery(
+        self, query: str, params: dict[str, Any] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Run a read-only Cypher query without blocking the event loop.
+
+        Depending on graph_query_backend, the query runs on the async Neo4j driver or on a bounded thread pool.
+        In both cases, at most graph_query_concurrency queries run at the same time.
+
+        Args:
+            query: Cypher query
+            params: Query parameters
+
+        Returns:
+            Query result records as a list of dictionaries, the same as Neo4jGraph.query
         """
-        node_result = self.neo4j_graph.query(node_count_query)[0]
-        self.node_count = node_result["TotalNodes"]
+        params = params or dict()
+
+        async with self._graph_query_semaphore:
+            if self.neo4j_async_driver:
+                records, _, _ = await self.neo4j_async_driver.execute_query(
+                    query, params, routing_=RoutingControl.READ
+                )
+                return [record.data() for record in records]
+
+            return await asyncio.get_running_loop().run_in_executor(
+                self._graph_query_executor,
+                partial(self.neo4j_graph.query, query, params),
+            )
 
-        # Query the total number of relationships
-        relationship_count_query = """
-        MATCH ()-[r]->()
-        RETURN count(r) AS TotalRelationships;
+    def _create_chat_model(
+        self, node: str, temperature: float
+    ) -> PooledChatGoogleGenerativeAI:
         """
-        relationship_result = self.neo4j_graph.query(relationship_count_query)[0]
-        self.relationship_count = relationship_result["TotalRelationships"]
+        Create the chat model of a node with the model and timeout configured for it, sharing the Gemini client pool.
+
+        Args:
+            node: Name of the node that calls the model
+            temperature: Sampling temperature of the model
 
-        # Query the total number of embedding texts
-        embedding_text_count_query = """
-        MATCH (d:Document)
-        WHERE d.embedding IS NOT NULL
-        RETURN count(d) AS EmbeddingText;
+        Returns:
+            Chat model whose calls are recorded in the metrics of the node
         """
-        embedding_text_result = self.neo4j_graph.query(embedding_text_count_query)[0]
-        self.embedding_text_count = embedding_text_result["EmbeddingText"]
+        model = self.node_models.get(node, self.model)
+        recorder = ModelLatencyRecorder(node, model)
+        self.model_latency_recorders[node] = recorder
+
+        return PooledChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            timeout=self.node_timeouts.get(node, self.timeout),
+            callbacks=[recorder],
+            google_api_key=self.gemini_pool.api_key,
+            client_pool=self.gemini_pool,
+        )
 
     def _create_chains(self):
         """Configures and creates all the chains to be used in the graph"""
         # router_node
-        router_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0, timeout=self.timeout
-        )
+        router_model = self._create_chat_model("router_node", temperature=0)
         router_prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", ROUTER_SYSTEM_PROMPT),
@@ -249,13 +1143,13 @@ class SC2EditorLLM:
         )
 
         # disallow_node
-        self._disallow_node_chain = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0.3, timeout=self.timeout
+        self._disallow_node_chain = self._create_chat_model(
+            "disallow_node", temperature=0.3
         )
 
         # entity_extract_node
-        entity_extract_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0, timeout=self.timeout
+        entity_extract_model = self._create_chat_model(
+            "entity_extract_node", temperature=0
         )
         entity_extract_prompt = ChatPromptTemplate.from_messages(
             [
@@ -272,9 +1166,26 @@ class SC2EditorLLM:
             | entity_extract_model.with_structured_output(Entities)
         )
 
+        # front_end_node (router_node and entity_extract_node in a single call)
+        front_end_model = self._create_chat_model("front_end_node", temperature=0)
+        front_end_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", FRONT_END_SYSTEM_PROMPT),
+                (
+                    "human",
+                    "Please decide whether to allow prompts based on the conversation history including the current prompt, and identify and extract named entities such as main concepts from the current prompt.\n\n"
+                    "Conversation History:\n{messages}\n\n"
+                    "Current Prompt:\n{message}",
+                ),
+            ]
+        )
+        self._front_end_node_chain = (
+            front_end_prompt | front_end_model.with_structured_output(RouterEntities)
+        )
+
         # retriever_query_node
-        retriever_query_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0.3, timeout=self.timeout
+        retriever_query_model = self._create_chat_model(
+            "retriever_query_node", temperature=0.3
         )
         retriever_query_prompt = ChatPromptTemplate.from_messages(
             [
@@ -292,8 +1203,8 @@ class SC2EditorLLM:
         )
 
         # context_cleanup_node
-        context_cleanup_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0, timeout=self.timeout
+        context_cleanup_model = self._create_chat_model(
+            "context_cleanup_node", temperature=0
         )
         context_cleanup_prompt = ChatPromptTemplate.from_messages(
             [
@@ -311,8 +1222,8 @@ class SC2EditorLLM:
         )
 
         # answer_judgment_node
-        answer_judgment_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0, timeout=self.timeout
+        answer_judgment_model = self._create_chat_model(
+            "answer_judgment_node", temperature=0
         )
         answer_judgment_prompt = ChatPromptTemplate.from_messages(
             [
@@ -330,10 +1241,28 @@ class SC2EditorLLM:
             | answer_judgment_model.with_structured_output(AnswerJudgment)
         )
 
-        # answer_node
-        answer_model = ChatGoogleGenerativeAI(
-            model=self.model, temperature=0.3, timeout=self.timeout
+        # context_judgment_node (context_cleanup_node and answer_judgment_node in a single call)
+        context_judgment_model = self._create_chat_model(
+            "context_judgment_node", temperature=0
         )
+        context_judgment_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", CONTEXT_JUDGMENT_SYSTEM_PROMPT),
+                (
+                    "human",
+                    "Based on the conversation history so far and your knowledge, please remove and organize any context that is not necessary for the answer, and decide whether or not you can answer based on the organized context.\n\n"
+                    "Conversation History:\n{messages}\n\n"
+                    "Context:\n{context}",
+                ),
+            ]
+        )
+        self._context_judgment_node_chain = (
+            context_judgment_prompt
+            | context_judgment_model.with_structured_output(ContextJudgment)
+        )
+
+        # answer_node
+        answer_model = self._create_chat_model("answer_node", temperature=0.3)
         answer_prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", SC2_EDITOR_AI_SYSTEM_PROMPT),
@@ -348,46 +1277,106 @@ class SC2EditorLLM:
         )
         self._answer_node_chain = answer_prompt | answer_model
 
+        # history_node
+        history_summary_model = self._create_chat_model("history_node", temperature=0)
+        history_summary_prompt = ChatPromptTemplate.from_messages(
+            [
+                ("system", HISTORY_SUMMARY_SYSTEM_PROMPT),
+                (
+                    "human",
+                    "Please extend the previous summary with the new messages.\n\n"
+                    "Previous Summary:\n{summary}\n\n"
+                    "New Messages:\n{messages}",
+                ),
+            ]
+        )
+        self._history_summary_chain = history_summary_prompt | history_summary_model
+        self._chains_created = True
+
     def _create_graph(self) -> StateGraph:
         """Configures and creates the StateGraph with all nodes and edges"""
-        # Create chains
-        self._create_chains()
+        # Create chains, unless ainitialize already created them concurrently with the other startup phases
+        if not self._chains_created:
+            self._create_chains()
 
         # Create StateGraph
         builder = StateGraph(State)
 
         # Add nodes
-        builder.add_node("router_node", self._router_node)
+        # The history node formats the conversation history once for every node that sends it as text
+        builder.add_node("history_node", self._history_node)
+        # In speculative mode, the router node also runs entity extraction concurrently
+        # In fused mode, a single front-end node replaces both of them
+        if self.front_end_mode == "speculative":
+            builder.add_node("router_node", self._speculative_router_node)
+        elif self.front_end_mode == "fused":
+            builder.add_node("front_end_node", self._front_end_node)
+        else:
+            builder.add_node("router_node", self._router_node)
+            builder.add_node("entity_extract_node", self._entity_extract_node)
         builder.add_node("disallow_node", self._disallow_node)
-        builder.add_node("entity_extract_node", self._entity_extract_node)
         builder.add_node("retriever_attempt_node", self._retriever_attempt_node)
         builder.add_node("retriever_query_node", self._retriever_query_node)
         builder.add_node("retriever_node", self._retriever_node)
-        builder.add_node("context_cleanup_node", self._context_cleanup_node)
-        builder.add_node("answer_judgment_node", self._answer_judgment_node)
+        # In fused mode, a single node cleans up the context and judges it
+        if self.context_judgment_mode == "fused":
+            builder.add_node("context_judgment_node", self._context_judgment_node)
+        else:
+            builder.add_node("context_cleanup_node", self._context_cleanup_node)
+            builder.add_node("answer_judgment_node", self._answer_judgment_node)
         builder.add_node("answer_node", self._answer_node)
 
         # Add edges
-        builder.add_edge(START, "router_node")
-        builder.add_conditional_edges("router_node", self._check_progress)
+        builder.add_edge(START, "history_node")
+        if self.front_end_mode == "speculative":
+            builder.add_edge("history_node", "router_node")
+            builder.add_conditional_edges("router_node", self._check_front_end_progress)
+        elif self.front_end_mode == "fused":
+            builder.add_edge("history_node", "front_end_node")
+            builder.add_conditional_edges(
+                "front_end_node", self._check_front_end_progress
+            )
+        else:
+            builder.add_edge("history_node", "router_node")
+            builder.add_conditional_edges("router_node", self._check_progress)
+            builder.add_edge("entity_extract_node", "retriever_attempt_node")
         builder.add_edge("disallow_node", END)
-        builder.add_edge("entity_extract_node", "retriever_attempt_node")
         builder.add_conditional_edges(
             "retriever_attempt_node", self._check_retriever_attempt
         )
         builder.add_edge("retriever_query_node", "retriever_node")
-        builder.add_edge("retriever_node", "context_cleanup_node")
-        builder.add_edge("context_cleanup_node", "answer_judgment_node")
-        builder.add_conditional_edges(
-            "answer_judgment_node", self._check_answer_judgment
-        )
+        if self.context_judgment_mode == "fused":
+            builder.add_edge("retriever_node", "context_judgment_node")
+            builder.add_conditional_edges(
+                "context_judgment_node", self._check_answer_judgment
+            )
+        else:
+            builder.add_edge("retriever_node", "context_cleanup_node")
+            builder.add_edge("context_cleanup_node", "answer_judgment_node")
+            builder.add_conditional_edges(
+                "answer_judgment_node", self._check_answer_judgment
+            )
         builder.add_edge("answer_node", END)
 
         # Create checkpointer
-        self.checkpointer = InMemorySaver()
+        self.checkpointer = self._create_checkpointer()
 
         return builder
 
+    def _create_checkpointer(self) -> InMemorySaver | None:
+        """
+        Create the checkpointer of the state graph according to checkpointer_mode.
+
+        Returns:
+            Checkpointer, or None if the graph runs without one
+        """
+        if self.checkpointer_mode == "none":
+            return None
+        if self.checkpointer_mode == "bounded":
+            return BoundedInMemorySaver(max_threads=self.checkpointer_max_threads)
+
+        return InMemorySaver()
+
     def _format_messages(self, messages: list[BaseMessage]) -> str:
         """
         Format messages for prompt templates
@@ -398,42 +1387,457 @@ class SC2EditorLLM:
         Returns:
             Conversation history converted to text
         """
-        formatted_messages = list()
+        return "\n".join(format_message(msg) for msg in messages)
 
-        for msg in messages:
-            if isinstance(msg, HumanMessage):
-                formatted_messages.append(f"- Human: {msg.content}")
-            elif isinstance(msg, AIMessage):
-                formatted_messages.append(f"- AI: {msg.content}")
-            elif isinstance(msg, SystemMessage):
-                formatted_messages.append(f"- System: {msg.content}")
-            else:
-                formatted_messages.append(f"- Unknown: {msg.content}")
+    def _truncate_history(self, lines: list[str], node: str) -> str:
+        """
+        Join formatted messages within the history token budget of a node.
 
-        return "\n".join(formatted_messages)
+        Args:
+            lines: Formatted messages of the conversation history, oldest first
+            node: Name of the node that sends the history
 
-    # Node implementations
-    async def _router_node(self, state: State) -> State:
-        messages_text = self._format_messages(state["messages"])
-        res = await self._router_node_chain.ainvoke({"messages": messages_text})
+        Returns:
+            Conversation history converted to text
+        """
+        token_budget = self.history_node_token_budgets.get(node)
+        if token_budget is None:
+            return "\n".join(lines)
 
-        return {"prompt_status": res.prompt_status}
+        return truncate_lines(lines, token_budget)
 
-    async def _check_progress(
-        self, state: State
-    ) -> Literal["entity_extract_node", "disallow_node"]:
-        if state["prompt_status"] == "allow":
-            return "entity_extract_node"
+    async def _format_history(self, messages: list[BaseMessage]) -> list[str]:
+        """
+        Format the conversation history within the history token budget.
+
+        The most recent messages that fit in the budget are kept verbatim, and the older ones are replaced with their summary.
+
+        Args:
+            messages: Conversation history list, including the current prompt
+
+        Returns:
+            Formatted messages, starting with the summary of the older ones if there is one
+        """
+        lines = [format_message(msg) for msg in messages]
+        start = (
+            recent_window_start(lines, self.history_token_budget)
+            if self.history_token_budget > 0
+            else 0
+        )
+        if start == 0:
+            return lines
+
+        summary = await self._summarize_history(messages[:start])
+        if summary is None:
+            return lines[start:]
+
+        return [f"- Summary of the earlier conversation: {summary}"] + lines[start:]
+
+    async def _summarize_history(self, messages: list[BaseMessage]) -> str | None:
+        """
+        Summarize the older messages of a conversation, extending the cached summary of an earlier turn if there is one.
+
+        Args:
+            messages: Messages that do not fit in the history token budget, oldest first
+
+        Returns:
+            Summary of the messages, or None if summarization failed
+        """
+        fingerprints = prefix_fingerprints(messages)
+        cached = self.history_summary_cache.lookup(fingerprints)
+        summarized_count, summary = cached or (0, "")
+        if summarized_count == len(messages):
+            return summary
+
+        try:
+            res = await self._history_summary_chain.ainvoke(
+                {
+                    "summary": summary or "None",
+                    "messages": self._truncate_history(
+                        [format_message(msg) for msg in messages[summarized_count:]],
+                        "history_node",
+                    ),
+                }
+            )
+        except Exception as e:
+            # Answering with the recent messages only is better than failing the request
+            logger.warning(
+                f"Dropped the older conversation history because summarization failed: {e}"
+            )
+            self.history_summary_failures += 1
+            return None
+
+        summary = str(res.content).strip()
+        self.history_summary_cache.store(fingerprints[-1], summary)
+
+        return summary
+
+    async def _query_graph_data(
+        self, keywords: list[str], limit: int, ranked: bool = False
+    ) -> dict[str, list[str] | list[dict[str, Any]]]:
+        """
+        Look up the graph data of all keywords in a single Cypher round trip.
+
+        Args:
+            keywords: Keywords to be searched in the node id or text property of the graph
+            limit: Maximum number of graph data rows. Each keyword gets an equal share of it.
+            ranked: Whether to return candidate edges with their match score, relationship type and neighbor degree
+
+        Returns:
+            A dictionary mapping each (lower-cased) keyword to its 'node - TYPE -> neighbor' rows, in keyword order.
+            If ranked, the rows are dictionaries with 'output', 'score', 'type' and 'degree'.
+        """
+        keywords = normalize_keywords(keywords)
+        keyword_graph_data = {keyword: list() for keyword in keywords}
+        if not keywords or limit <= 0:
+            return keyword_graph_data
+
+        # Ceiling division so that every keyword can get at least one row
+        keyword_limit = -(-limit // len(keywords))
+
+        # The snapshot matches nodes like the CONTAINS lookup, without a round trip to Neo4j
+        if self.graph_snapshot is not None:
+            return await asyncio.to_thread(
+                self.graph_snapshot.expand_keywords,
+                keywords,
+                keyword_limit,
+                ranked=ranked,
+                hops=self.graph_snapshot_hops,
+            )
+
+        if self.graph_query_cache is None:
+            return await self._lookup_graph_data(keywords, keyword_limit, ranked)
+
+        # Ranked and plain rows differ, so the kind of rows is part of the key.
+        # The limit is not: each key caches (limit it was looked up with, rows), and smaller limits are slices of it.
+        async def load(keys: list[tuple[str, bool]]) -> dict:
+            graph_data = await self._lookup_graph_data(
+                [keyword for keyword, _ in keys], keyword_limit, ranked
+            )
+            return {
+                (keyword, ranked): (keyword_limit, outputs)
+                for keyword, outputs in graph_data.items()
+            }
+
+        def usable(cached: tuple[int, list]) -> bool:
+            fetched_limit, outputs = cached
+            # Fewer rows than the limit are all the rows of the keyword, whatever the limit
+            return fetched_limit >= keyword_limit or len(outputs) < fetched_limit
+
+        cached_graph_data = await self.graph_query_cache.get_many(
+            [(keyword, ranked) for keyword in keywords], load, usable
+        )
+        return {
+            keyword: list(outputs[:keyword_limit])
+            for (keyword, _), (_, outputs) in cached_graph_data.items()
+        }
+
+    async def _lookup_graph_data(
+        self, keywords: list[str], keyword_limit: int, ranked: bool
+    ) -> dict[str, list[str] | list[dict[str, Any]]]:
+        """
+        Run the keyword graph lookup query.
+
+        Keywords are matched through the full-text index. Keywords without full-text hits,
+        or all keywords if the index is not usable, are matched as substrings with CONTAINS.
+
+        Args:
+            keywords: Lower-cased, unique keywords
+            keyword_limit: Maximum number of graph data rows per keyword
+            ranked: Whether to return candidate edges with their match score, relationship type and neighbor degree
+
+        Returns:
+            A dictionary mapping each keyword to its rows, in keyword order
+        """
+        keyword_graph_data = {keyword: list() for keyword in keywords}
+
+        # Relevance-ranked lookup through the full-text index.
+        # If the index has not been created yet, fall back to scanning with CONTAINS.
+        response = None
+        if self.fulltext_index_available:
+            try:
+                response = await self._aquery(
+                    KEYWORD_FULLTEXT_RANKED_QUERY if ranked else KEYWORD_FULLTEXT_QUERY,
+                    {
+                        "keywords": [
+                            {
+                                "keyword": keyword,
+                                "search": lucene_keyword_query(keyword),
+                            }
+                            for keyword in keywords
+                        ],
+                        "keyword_limit": keyword_limit,
+                        "index_name": FULLTEXT_INDEX_NAME,
+                    },
+                )
+            except ClientError as e:
+                logger.warning(
+                    f"Full-text index {FULLTEXT_INDEX_NAME} is not usable, falling back to CONTAINS matching: {e}"
+                )
+                self.fulltext_index_available = False
+
+        if response is not None:
+            for el in response:
+                keyword_graph_data[el["keyword"]] = el["outputs"]
+
+        # The full-text index only matches whole words and prefixes of entity and document nodes,
+        # so keywords without full-text hits are matched as substrings of any node
+        missing_keywords = [
+            keyword for keyword, outputs in keyword_graph_data.items() if not outputs
+        ]
+        if missing_keywords:
+            response = await self._aquery(
+                KEYWORD_CONTAINS_RANKED_QUERY if ranked else KEYWORD_CONTAINS_QUERY,
+                {
+                    "keywords": [{"keyword": keyword} for keyword in missing_keywords],
+                    "keyword_limit": keyword_limit,
+                },
+            )
+            for el in response:
+                keyword_graph_data[el["keyword"]] = el["outputs"]
+
+        return keyword_graph_data
+
+    async def _run_retrieval_leg(
+        self, leg_name: str, retrieval: Awaitable[list[Any]], timeout: int | float
+    ) -> list[Any] | None:
+        """
+        Await one retrieval leg with its own timeout.
+
+        Args:
+            leg_name: Name of the retrieval leg used in the log ('graph', 'vector' or 'prefetched vector')
+            retrieval: Coroutine that returns the formatted items or documents of the leg
+            timeout: Timeout for the leg in seconds
+
+        Returns:
+            Formatted items or documents of the leg, or None if the leg failed or timed out
+        """
+        try:
+            return await asyncio.wait_for(retrieval, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Retrieval of {leg_name} data timed out after {timeout} seconds."
+            )
+        except Exception as e:
+            logger.error(
+                f"Retrieval of {leg_name} data failed ({type(e).__name__}): {e}"
+            )
+
+        return None
+
+    async def _retrieve_graph_data(self, state: State) -> list[str]:
+        """
+        Retrieve graph data around the nodes matching the keywords.
+
+        Args:
+            state: Current graph state
+
+        Returns:
+            'node - TYPE -> neighbor' rows
+        """
+        # A fixed token budget keeps the graph data flat however large the database grows
+        if self.graph_retrieval_mode == "ranked":
+            return await self._retrieve_ranked_graph_data(state)
+
+        # Determine graph data limit based on attempt count
+        graph_data_limit = floor(
+            (
+                (
+                    (self.node_count + self.relationship_count)
+                    * self.maximum_information_acquisition_rate
+                )
+                / self.maximum_retriever_attempts
+            )
+            * state["retriever_attempt_count"]
+        )
+
+        # Based on whether each entity is included in the node id or text property of the graph, when a matching node is found, adjacent nodes and relationships are collected around that node.
+        keyword_graph_data = await self._query_graph_data(
+            state["keywords"], graph_data_limit
+        )
+        return [output for outputs in keyword_graph_data.values() for output in outputs]
+
+    async def _retrieve_ranked_graph_data(self, state: State) -> list[str]:
+        """
+        Retrieve the most relevant graph data around the nodes matching the keywords within the token budget.
+
+        Args:
+            state: Current graph state
+
+        Returns:
+            'node - TYPE -> neighbor' rows, most relevant first
+        """
+        # Like the proportional limit, the budget grows with each attempt and is reached on the last one
+        token_budget = floor(
+            self.graph_context_token_budget
+            / self.maximum_retriever_attempts
+            * state["retriever_attempt_count"]
+        )
+
+        # Every distinct keyword gets exactly graph_candidate_limit candidates, however often it was extracted
+        keywords = normalize_keywords(state["keywords"])
+        keyword_edges = await self._query_graph_data(
+            keywords, self.graph_candidate_limit * len(keywords), ranked=True
+        )
+        selected_outputs = rank_graph_edges(
+            keyword_edges, self.graph_edge_type_priority, token_budget
+        )
+        logger.debug(
+            f"Selected {len(selected_outputs)} of "
+            f"{sum(len(edges) for edges in keyword_edges.values())} candidate edges "
+            f"within {token_budget} tokens."
+        )
+
+        return selected_outputs
+
+    async def _retrieve_vector_data(self, state: State) -> list[str]:
+        """
+        Retrieve documents similar to the retriever query.
+
+        Args:
+            state: Current graph state
+
+        Returns:
+            Documents formatted with their metadata
+        """
+        # Vector search based on embedding properties embedded in text properties of nodes with document labels
+        # On the first attempt, the search already started speculatively with the raw prompt is reused
+        if (
+            state["retriever_attempt_count"] == 1
+            and state.get("prefetched_vector_documents") is not None
+        ):
+            vector_retriever_result = state["prefetched_vector_documents"]
+        else:
+            vector_retriever_result = await self.vector_retriever.ainvoke(
+                state["retriever_query"]
+            )
+
+        self.vector_k_stat.add(len(vector_retriever_result))
+        if not vector_retriever_result:
+            self.vector_tokens_stat.add(0)
+            return list()
+
+        vector_data_list = [""] * len(vector_retriever_result)
+        for idx, langchain_doc in enumerate(vector_retriever_result):
+            # Delete metadatas that doesn't help much
+            metadata = {
+                metadata_key: metadata_value
+                for metadata_key, metadata_value in langchain_doc.metadata.items()
+                if metadata_key not in ("source", "languages", "filetype")
+            }
+
+            doc_trans_text_list = [
+                f"{metadata_key}: \n{metadata[metadata_key]}"
+                for metadata_key in sorted(
+                    metadata, key=lambda meta_key: meta_key.lower()
+                )
+            ]
+            doc_text = f"""# Document\n{"\n".join(doc_trans_text_list)}\n{langchain_doc.page_content.strip()}""".strip()
+            vector_data_list[idx] = doc_text
+
+        self.vector_tokens_stat.add(estimate_tokens("\n\n".join(vector_data_list)))
+
+        return vector_data_list
+
+    # Node implementations
+    async def _history_node(self, state: State) -> State:
+        lines = await self._format_history(state["messages"])
+        formatted_messages = {
+            node: self._truncate_history(lines, node) for node in TEXT_HISTORY_NODES
+        }
+        self.history_tokens_stat.add(estimate_tokens("\n".join(lines)))
+
+        return {"formatted_messages": formatted_messages}
+
+    async def _router_node(self, state: State) -> State:
+        messages_text = state["formatted_messages"]["router_node"]
+        res = await self._router_node_chain.ainvoke({"messages": messages_text})
+
+        return {"prompt_status": res.prompt_status}
+
+    async def _speculative_router_node(self, state: State) -> State:
+        # Entity extraction (and optionally the first vector search) does not depend on the routing result,
+        # so it is started speculatively and thrown away if the prompt is disallowed.
+        speculative_tasks = {
+            "keywords": asyncio.create_task(self._entity_extract_node(state))
+        }
+        if self.speculative_vector_search:
+            # A prefetch that fails or times out leaves None, so the vector leg searches again as usual
+            speculative_tasks["prefetched_vector_documents"] = asyncio.create_task(
+                self._run_retrieval_leg(
+                    "prefetched vector",
+                    self.vector_retriever.ainvoke(state["messages"][-1].content),
+                    self.vector_retrieval_timeout,
+                )
+            )
+
+        # Whatever happens, no speculative task is left running once the node returns
+        try:
+            router_result = await self._router_node(state)
+            if router_result["prompt_status"] == "disallow":
+                return router_result
+
+            router_result.update(await speculative_tasks["keywords"])
+            if "prefetched_vector_documents" in speculative_tasks:
+                router_result["prefetched_vector_documents"] = await speculative_tasks[
+                    "prefetched_vector_documents"
+                ]
+
+            return router_result
+        finally:
+            await self._cancel_tasks(speculative_tasks.values())
+
+    async def _cancel_tasks(self, tasks: Iterable[asyncio.Task]):
+        """
+        Cancel speculative tasks and wait until they have finished.
+
+        Args:
+            tasks: asyncio tasks to cancel
+        """
+        tasks = list(tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _check_progress(
+        self, state: State
+    ) -> Literal["entity_extract_node", "disallow_node"]:
+        if state["prompt_status"] == "allow":
+            return "entity_extract_node"
+        else:
+            return "disallow_node"
+
+    async def _check_front_end_progress(
+        self, state: State
+    ) -> Literal["retriever_attempt_node", "disallow_node"]:
+        if state["prompt_status"] == "allow":
+            return "retriever_attempt_node"
         else:
             return "disallow_node"
 
     async def _disallow_node(self, state: State) -> State:
-        messages = [SystemMessage(DISALLOW_PROMPT)] + state["messages"]
+        messages = [SystemMessage(DISALLOW_PROMPT)] + self._history_messages(
+            state["messages"], "disallow_node"
+        )
         res = await self._disallow_node_chain.ainvoke(messages)
 
         return {"answer": res.content}
 
+    async def _front_end_node(self, state: State) -> State:
+        messages_text = state["formatted_messages"]["front_end_node"]
+        res = await self._front_end_node_chain.ainvoke(
+            {"messages": messages_text, "message": state["messages"][-1].content}
+        )
+
+        return {"prompt_status": res.prompt_status, "keywords": res.keywords}
+
     async def _entity_extract_node(self, state: State) -> State:
+        # The local matcher only finds keywords that exist as node ids, which is all the graph retriever can use
+        if self.entity_matcher is not None:
+            keywords = self.entity_matcher.extract(state["messages"][-1].content)
+            if keywords or self.entity_extraction_mode == "local":
+                return {"keywords": keywords}
+
         res = await self._entity_extract_node_chain.ainvoke(
             {"message": state["messages"][-1].content}
         )
@@ -453,8 +1857,16 @@ class SC2EditorLLM:
             return "answer_node"
 
     async def _retriever_query_node(self, state: State) -> State:
+        # On the first attempt, the vector leg reuses the search prefetched with the raw prompt,
+        # so the raw prompt is the query and no query has to be written by the LLM
+        if (
+            state["retriever_attempt_count"] == 1
+            and state.get("prefetched_vector_documents") is not None
+        ):
+            return {"retriever_query": str(state["messages"][-1].content)}
+
         context = state.get("context", "")
-        messages_text = self._format_messages(state["messages"])
+        messages_text = state["formatted_messages"]["retriever_query_node"]
         res = await self._retriever_query_node_chain.ainvoke(
             {"context": context, "messages": messages_text}
         )
@@ -462,70 +1874,28 @@ class SC2EditorLLM:
         return {"retriever_query": res.content}
 
     async def _retriever_node(self, state: State) -> State:
-        # Determine graph data limit based on attempt count
-        graph_data_limit = floor(
-            (
-                (
-                    (self.node_count + self.relationship_count)
-                    * self.maximum_information_acquisition_rate
-                )
-                / self.maximum_retriever_attempts
-            )
-            * state["retriever_attempt_count"]
+        # Graph retrieval and vector retrieval are independent, so both legs run at the same time.
+        # A leg that fails or exceeds its timeout is replaced with a notice instead of failing the request.
+        graph_items, vector_items = await asyncio.gather(
+            self._run_retrieval_leg(
+                "graph",
+                self._retrieve_graph_data(state),
+                self.graph_retrieval_timeout,
+            ),
+            self._run_retrieval_leg(
+                "vector",
+                self._retrieve_vector_data(state),
+                self.vector_retrieval_timeout,
+            ),
         )
 
-        # Import Graph Data
-        # Based on whether each entity is included in the node id or text property of the graph, when a matching node is found, adjacent nodes and relationships are collected around that node.
-        graph_data = ""
-
-        for text_keyword in state["keywords"]:
-            response = self.neo4j_graph.query(
-                f"""
-                    MATCH (node)
-                    WHERE toLower(node.id) CONTAINS toLower($query) OR toLower(node.text) CONTAINS toLower($query)
-                    MATCH (node)-[r]-(neighbor)
-                    WHERE type(r) <> 'MENTIONS'
-                    RETURN CASE
-                        WHEN startNode(r) = node
-                        THEN node.id + ' - ' + type(r) + ' -> ' + neighbor.id
-                        ELSE neighbor.id + ' - ' + type(r) + ' -> ' + node.id
-                    END AS output
-                    LIMIT {graph_data_limit};
-                    """,
-                {"query": text_keyword.lower()},
-            )
-            graph_data += "\n".join([el["output"] for el in response])
-            if graph_data:
-                graph_data += "\n"
-
-        graph_data = f"""{graph_data.strip() if graph_data else "There is no associated graph data."}"""
-
-        # Import Vector Data
-        # Vector search based on embedding properties embedded in text properties of nodes with document labels
-        vector_retriever_result = await self.vector_retriever.ainvoke(
-            state["retriever_query"]
-        )
-
-        if vector_retriever_result:
-            vector_data_list = [""] * len(vector_retriever_result)
-            for idx, langchain_doc in enumerate(vector_retriever_result):
-                # Delete metadatas that doesn't help much
-                del langchain_doc.metadata["source"]
-                del langchain_doc.metadata["languages"]
-                del langchain_doc.metadata["filetype"]
-
-                doc_trans_text_list = [
-                    f"{metadata_key}: \n{langchain_doc.metadata[metadata_key]}"
-                    for metadata_key in sorted(
-                        langchain_doc.metadata, key=lambda meta_key: meta_key.lower()
-                    )
-                ]
-                doc_text = f"""# Document\n{"\n".join(doc_trans_text_list)}\n{langchain_doc.page_content.strip()}""".strip()
-                vector_data_list[idx] = doc_text
+        if self.reranker is not None:
+            graph_items, vector_items = await self._rerank_items(
+                state, graph_items, vector_items
+            )
 
-            vector_data = "\n\n".join(vector_data_list)
-        else:
-            vector_data = "There is no associated vector data."
+        graph_data = self._format_retrieval_items("graph", graph_items, "\n")
+        vector_data = self._format_retrieval_items("vector", vector_items, "\n\n")
 
         # Combining Graph Data and Vector Data
         final_data = (
@@ -551,8 +1921,94 @@ class SC2EditorLLM:
             "context": context,
         }
 
+    def _format_retrieval_items(
+        self, leg_name: str, items: list[str] | None, separator: str
+    ) -> str:
+        """
+        Join the items of a retrieval leg, or explain why there are none.
+
+        Args:
+            leg_name: Name of the retrieval leg ('graph' or 'vector')
+            items: Formatted items of the leg, or None if the leg failed or timed out
+            separator: Separator between the items
+
+        Returns:
+            Data of the leg
+        """
+        if items is None:
+            return f"The {leg_name} data could not be retrieved for this attempt."
+        if not items:
+            return f"There is no associated {leg_name} data."
+
+        return separator.join(items).strip()
+
+    async def _rerank_items(
+        self,
+        state: State,
+        graph_items: list[str] | None,
+        vector_items: list[str] | None,
+    ) -> tuple[list[str] | None, list[str] | None]:
+        """
+        Keep only the graph triples and vector chunks most relevant to the retriever query.
+
+        Both kinds of items are ranked together, so the token budget goes to whichever is more relevant.
+
+        Args:
+            state: Current graph state
+            graph_items: 'node - TYPE -> neighbor' rows, or None if the graph leg failed
+            vector_items: Formatted documents, or None if the vector leg failed
+
+        Returns:
+            Kept graph items and vector items, each most relevant first
+        """
+        items = (graph_items or list()) + (vector_items or list())
+        if not items:
+            return graph_items, vector_items
+
+        query = state.get("retriever_query") or str(state["messages"][-1].content)
+
+        query_embedding = item_embeddings = None
+        if self.reranker.embedding_weight > 0:
+            try:
+                query_embedding, item_embeddings = await asyncio.gather(
+                    self.embeddings.aembed_query(query),
+                    self.embeddings.aembed_documents(items),
+                )
+            except Exception as e:
+                # Reranking still works on BM25 alone
+                logger.warning(
+                    f"Reranking without embeddings because embedding failed: {e}"
+                )
+                query_embedding = item_embeddings = None
+
+        kept_indices = self.reranker.rerank(
+            query, items, query_embedding, item_embeddings
+        )
+
+        graph_count = len(graph_items or list())
+        kept_graph_items = [items[idx] for idx in kept_indices if idx < graph_count]
+        kept_vector_items = [items[idx] for idx in kept_indices if idx >= graph_count]
+
+        self.reranker_input_tokens_stat.add(estimate_tokens("\n".join(items)))
+        self.reranker_output_tokens_stat.add(
+            estimate_tokens("\n".join(items[idx] for idx in kept_indices))
+        )
+
+        return (
+            kept_graph_items if graph_items is not None else None,
+            kept_vector_items if vector_items is not None else None,
+        )
+
     async def _context_cleanup_node(self, state: State) -> State:
-        messages_text = self._format_messages(state["messages"])
+        # A small context is passed to the answer judgment as it is
+        if (
+            self.context_cleanup_skip_tokens
+            and estimate_tokens(state["context"]) <= self.context_cleanup_skip_tokens
+        ):
+            self.context_cleanup_skipped += 1
+            return dict()
+
+        messages_text = state["formatted_messages"]["context_cleanup_node"]
         res = await self._context_cleanup_node_chain.ainvoke(
             {"context": state["context"], "messages": messages_text}
         )
@@ -560,13 +2016,21 @@ class SC2EditorLLM:
         return {"context": res.content}
 
     async def _answer_judgment_node(self, state: State) -> State:
-        messages_text = self._format_messages(state["messages"])
+        messages_text = state["formatted_messages"]["answer_judgment_node"]
         res = await self._answer_judgment_node_chain.ainvoke(
             {"context": state["context"], "messages": messages_text}
         )
 
         return {"answer_allow_status": res.answer_status}
 
+    async def _context_judgment_node(self, state: State) -> State:
+        messages_text = state["formatted_messages"]["context_judgment_node"]
+        res = await self._context_judgment_node_chain.ainvoke(
+            {"context": state["context"], "messages": messages_text}
+        )
+
+        return {"context": res.context, "answer_allow_status": res.answer_status}
+
     async def _check_answer_judgment(
         self, state: State
     ) -> Literal["retriever_attempt_node", "answer_node"]:
@@ -576,9 +2040,12 @@ class SC2EditorLLM:
             return "retriever_attempt_node"
 
     async def _answer_node(self, state: State) -> State:
+        # The current prompt counts toward the budget, but is sent as the question
         res = await self._answer_node_chain.ainvoke(
             {
-                "messages": state["messages"][:-1],
+                "messages": self._history_messages(state["messages"], "answer_node")[
+                    :-1
+                ],
                 "context": state["context"],
                 "question": state["messages"][-1].content,
             }
@@ -586,6 +2053,71 @@ class SC2EditorLLM:
 
         return {"answer": res.content}
 
+    def _history_messages(
+        self, messages: list[BaseMessage], node: str
+    ) -> list[BaseMessage]:
+        """
+        Keep the most recent messages within the history token budget of a node that sends them as messages.
+
+        Args:
+            messages: Conversation history list, including the current prompt
+            node: Name of the node that sends the history
+
+        Returns:
+            Kept messages, including the current prompt
+        """
+        token_budget = self.history_node_token_budgets.get(node)
+        if token_budget is None:
+            return messages
+
+        return truncate_messages(messages, token_budget)
+
+    def exceeds_prompt_limit(self, prompt: str) -> bool:
+        """
+        Method to check whether a prompt is too large to be answered.
+
+        Args:
+            prompt: Current prompt
+
+        Returns:
+            True if the prompt has more estimated tokens than max_prompt_tokens
+        """
+        return (
+            self.max_prompt_tokens > 0
+            and estimate_tokens(prompt) > self.max_prompt_tokens
+        )
+
+    def _compact_request(
+        self, messages: dict[str, list[BaseMessage]]
+    ) -> dict[str, list[BaseMessage]]:
+        """
+        Reject an oversized prompt with a ValueError and cut oversized history messages before any LLM call.
+
+        Args:
+            messages: This is the conversation history so far, including the current prompt. The dictionary must have only one key: 'messages'.
+
+        Returns:
+            The conversation history with every history message within max_history_message_tokens
+        """
+        history = messages["messages"]
+        if self.exceeds_prompt_limit(str(history[-1].content)):
+            self.rejected_requests += 1
+            raise ValueError(
+                f"The prompt exceeds the limit of {self.max_prompt_tokens} estimated tokens."
+            )
+        if self.max_history_message_tokens <= 0:
+            return messages
+
+        compacted_history = [
+            cut_message(msg, self.max_history_message_tokens) for msg in history[:-1]
+        ]
+        if any(
+            compacted is not msg for compacted, msg in zip(compacted_history, history)
+        ):
+            self.compacted_requests += 1
+
+        return {"messages": compacted_history + [history[-1]]}
+
     def astream(
         self,
         messages: dict[str, list[BaseMessage]],
@@ -632,17 +2164,281 @@ class SC2EditorLLM:
         ...         llm.delete_thread_id(thread_id=thread_id)
         >>> asyncio.run(streaming())
         """
+        # Done before the graph runs, so an oversized request does not reach any LLM call
+        messages = self._compact_request(messages)
+
+        if self.answer_cache is None or stream_mode != "messages":
+            return self._astream_graph(messages, thread_id, stream_mode)
+
+        return self._astream_with_answer_cache(messages, thread_id)
+
+    async def _astream_graph(
+        self,
+        messages: dict[str, list[BaseMessage]],
+        thread_id: str,
+        stream_mode: str,
+    ) -> AsyncIterator[dict[str, Any] | Any]:
+        """
+        Stream the graph after checking whether data derived from the graph database is stale.
+
+        Args:
+            messages: This is the conversation history so far, including the current prompt. The dictionary must have only one key: 'messages'.
+            thread_id: It is an identifier. It uses a value using uuid4.
+            stream_mode: The mode to stream output
+
+        Returns:
+            The asynchronous Iterator of the graph
+        """
+        await self._check_graph_version()
+
+        async for output in self._run_graph(messages, thread_id, stream_mode):
+            yield output
+
+    def _run_graph(
+        self,
+        messages: dict[str, list[BaseMessage]],
+        thread_id: str,
+        stream_mode: str,
+    ) -> AsyncIterator[dict[str, Any] | Any]:
+        """
+        Stream the compiled graph with the checkpointing of checkpointer_mode.
+
+        Args:
+            messages: This is the conversation history so far, including the current prompt. The dictionary must have only one key: 'messages'.
+            thread_id: It is an identifier. It uses a value using uuid4.
+            stream_mode: The mode to stream output
+
+        Returns:
+            The asynchronous Iterator of the graph
+        """
         return self.graph.astream(
             messages,
             {"configurable": {"thread_id": thread_id}},
             stream_mode=stream_mode,
+            # The bounded checkpointer only keeps the final state of a run, so the steps are not checkpointed
+            checkpoint_during=False if self.checkpointer_mode == "bounded" else None,
+        )
+
+    async def _astream_with_answer_cache(
+        self, messages: dict[str, list[BaseMessage]], thread_id: str
+    ) -> AsyncIterator[tuple[AIMessageChunk, dict[str, Any]]]:
+        """
+        Stream an answer in 'messages' mode, replaying the cached answer of a similar question if there is one.
+
+        A cached answer is replayed chunk by chunk as if it was streamed from answer_node,
+        so callers can consume it exactly like the output of the graph.
+        Replayed chunks carry the metadata keys of a streamed answer_node chunk, plus 'answer_cache': 'hit'.
+
+        Args:
+            messages: This is the conversation history so far, including the current prompt. The dictionary must have only one key: 'messages'.
+            thread_id: It is an identifier. It uses a value using uuid4.
+
+        Returns:
+            An asynchronous Iterator consisting of (message_chunk, metadata)
+        """
+        await self._check_graph_version()
+        # An answer generated from the old graph is not stored if another request clears the cache meanwhile
+        cache_generation = self.answer_cache.generation
+
+        question = str(messages["messages"][-1].content)
+        fingerprint = history_fingerprint(
+            messages["messages"][:-1], self.answer_cache_history_turns
         )
+        # The embedding is awaited before the graph starts, so a slow embedding API would delay every answer
+        try:
+            question_embedding = await asyncio.wait_for(
+                self.embeddings.aembed_query(normalize_question(question)),
+                timeout=self.answer_cache_embedding_timeout,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Skipped answer cache because embedding timed out after {self.answer_cache_embedding_timeout} seconds."
+            )
+            question_embedding = None
+        except Exception as e:
+            # The answer cache is an optimization, so the answer is generated as usual
+            logger.warning(f"Skipped answer cache because embedding failed: {e}")
+            question_embedding = None
+
+        if question_embedding is not None:
+            cached_chunks = self.answer_cache.lookup(question_embedding, fingerprint)
+            if cached_chunks is not None:
+                metadata = {
+                    **self._answer_chunk_metadata,
+                    "thread_id": thread_id,
+                    "answer_cache": "hit",
+                }
+                for chunk in cached_chunks:
+                    yield AIMessageChunk(content=chunk), dict(metadata)
+                return
+
+        answer_chunks = list()
+        async for msg, metadata in self._run_graph(messages, thread_id, "messages"):
+            if metadata["langgraph_node"] == "answer_node":
+                if not answer_chunks:
+                    self._answer_chunk_metadata = dict(metadata)
+                answer_chunks.append(msg.content)
+            yield msg, metadata
+
+        # Only answers that were streamed to the end are cached, disallowed prompts are not
+        if question_embedding is not None and answer_chunks:
+            self.answer_cache.store(
+                question_embedding,
+                fingerprint,
+                answer_chunks,
+                generation=cache_generation,
+            )
+
+    async def _check_graph_version(self):
+        """Check whether the graph database was re-ingested and drop data derived from the old graph if so"""
+        if (
+            time.monotonic() - self._graph_version_checked_at
+            < self.graph_version_check_interval
+        ):
+            return None
+
+        async with self._graph_version_lock:
+            # Another request may have checked while this one was waiting for the lock
+            if (
+                time.monotonic() - self._graph_version_checked_at
+                < self.graph_version_check_interval
+            ):
+                return None
+
+            try:
+                response = await self._aquery(GRAPH_VERSION_QUERY)
+                graph_version = response[0]["GraphVersion"]
+            except Exception as e:
+                logger.warning(f"Could not check the graph version: {e}")
+                return None
+            finally:
+                self._graph_version_checked_at = time.monotonic()
+
+            if self.graph_version is not None and graph_version != self.graph_version:
+                logger.info(
+                    f"Graph version changed from {self.graph_version} to {graph_version}."
+                )
+                self._on_graph_version_change()
+            self.graph_version = graph_version
+
+    def _on_graph_version_change(self):
+        """Drop everything derived from the previous version of the graph database"""
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+        if self.graph_query_cache is not None:
+            self.graph_query_cache.clear()
+
+        # The previous matcher and index keep serving requests until the new ones are built
+        if self.entity_matcher is not None:
+            self._start_background_task(self._refresh_entity_matcher())
+        if self.graph_snapshot is not None:
+            self._start_background_task(self._refresh_graph_snapshot())
+        if self.local_vector_index is not None:
+            self._start_background_task(self._refresh_local_vector_index())
+
+    def _start_background_task(self, coroutine: Awaitable[None]):
+        """
+        Run a coroutine in the background and keep a reference to it until it is done.
+
+        Args:
+            coroutine: Coroutine to run
+        """
+        task = asyncio.create_task(coroutine)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def get_metrics(self) -> dict[str, Any]:
+        """
+        Method to collect metrics of the LLM system.
+
+        Returns:
+            Metrics grouped by component
+        """
+        metrics = {
+            "graph_version": self.graph_version,
+            "neo4j_pool": self.neo4j_pool.stats(),
+            "gemini_pool": self.gemini_pool.stats(),
+            "startup": {
+                "statistics_source": self.statistics_source,
+                "phases_ms": dict(self.startup_timings),
+            },
+        }
+        if self.answer_cache is not None:
+            metrics["answer_cache"] = self.answer_cache.stats()
+        if self.graph_query_cache is not None:
+            metrics["graph_query_cache"] = self.graph_query_cache.stats()
+        if self.reranker is not None:
+            metrics["reranker"] = {
+                "input_tokens": self.reranker_input_tokens_stat.stats(),
+                "output_tokens": self.reranker_output_tokens_stat.stats(),
+            }
+        metrics["context_cleanup_skipped"] = self.context_cleanup_skipped
+        metrics["models"] = {
+            node: {
+                "timeout": self.node_timeouts.get(node, self.timeout),
+                **recorder.stats(),
+            }
+            for node, recorder in self.model_latency_recorders.items()
+        }
+        metrics["history"] = {
+            "token_budget": self.history_token_budget,
+            "tokens": self.history_tokens_stat.stats(),
+            "summary_cache": self.history_summary_cache.stats(),
+            "summary_failures": self.history_summary_failures,
+            "node_token_budgets": dict(self.history_node_token_budgets),
+            "rejected_requests": self.rejected_requests,
+            "compacted_requests": self.compacted_requests,
+        }
+        if isinstance(self.checkpointer, BoundedInMemorySaver):
+            metrics["checkpointer"] = {
+                "mode": self.checkpointer_mode,
+                **self.checkpointer.stats(),
+            }
+        elif self.checkpointer is not None:
+            metrics["checkpointer"] = {
+                "mode": self.checkpointer_mode,
+                "threads": len(self.checkpointer.storage),
+            }
+        else:
+            metrics["checkpointer"] = {"mode": self.checkpointer_mode}
+        metrics["vector_retrieval"] = {
+            "mode": self.vector_retrieval_mode,
+            "k": self.vector_k_stat.stats(),
+            "tokens": self.vector_tokens_stat.stats(),
+        }
+        if self.local_vector_index is not None:
+            metrics["local_vector_index"] = {
+                "documents": len(self.local_vector_index),
+                "graph_version": self.local_vector_index.version,
+                "precision": self.local_vector_index.precision,
+                "dimensions": self.local_vector_index.dimensions,
+                "search_type": self.local_vector_index.search_type,
+                "keyword_terms": self.local_vector_index.keyword_index.term_count
+                if self.local_vector_index.keyword_index is not None
+                else 0,
+                **self.local_vector_index.memory_usage(),
+            }
+        if self.entity_matcher is not None:
+            metrics["entity_matcher"] = {"entities": len(self.entity_matcher)}
+        if self.graph_snapshot is not None:
+            metrics["graph_snapshot"] = {
+                "nodes": len(self.graph_snapshot),
+                "relationships": self.graph_snapshot.relationship_count,
+                "relationship_types": len(self.graph_snapshot.type_names),
+                "graph_version": self.graph_snapshot.version,
+                "adjacency_bytes": self.graph_snapshot.memory_usage(),
+            }
+        if isinstance(self.embeddings, CachedEmbeddings):
+            metrics["embedding_cache"] = self.embeddings.stats()
+
+        return metrics
 
     def delete_thread_id(self, thread_id: str):
         """
-        Method to delete the corresponding thread_id from InMemorySaver.
+        Method to delete the corresponding thread_id from the checkpointer. Without a checkpointer, there is nothing to delete.
 
         Args:
             thread_id: It is an identifier. It uses a value using uuid4.
         """
-        self.checkpointer.delete_thread(thread_id)
+        if self.checkpointer is not None:
+            self.checkpointer.delete_thread(thread_id)
@@ -0,0 +1,25 @@
+"""
+Module for estimating and budgeting the number of tokens sent to the LLM.
+
+Counting tokens exactly needs a call to the Gemini API, so a character based estimate is used instead.
+"""
+
+# Python Standard Library imports
+from math import ceil
+
+
+# Gemini tokenizes English text and Markdown at roughly four characters per token
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Function to estimate the number of tokens of a text.
+
+    Args:
+        text: Text sent to the LLM
+
+    Returns:
+        Estimated number of tokens
+    """
+    return ceil(len(text) / CHARS_PER_TOKEN)
@@ -0,0 +1,91 @@
+"""
+Check the score threshold, score gap, token budget and min_k cut-offs of the adaptive vector retriever.
+
+No Neo4j database is used. A stand-in vector store returns fixed candidates with fixed scores.
+
+uv run python -m pytest tests/test_adaptive_retriever.py
+"""
+
+# Python Standard Library imports
+import asyncio
+
+# Third-party Library imports
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+# Custom Library imports
+from sc2editor.llm.adaptive_retriever import AdaptiveVectorRetriever
+
+
+# 40 characters are estimated at 10 tokens
+DOCUMENT_TOKENS = 10
+
+
+class StandInVectorStore(InMemoryVectorStore):
+    """Stand-in for Neo4jVector that returns the same candidates for every query."""
+
+    def __init__(self, scores: list[float]):
+        super().__init__(FakeEmbeddings(size=4))
+        self.scores = scores
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return [
+            (Document(f"{idx}".ljust(DOCUMENT_TOKENS * 4, "x")), score)
+            for idx, score in enumerate(self.scores[:k])
+        ]
+
+    async def asimilarity_search_with_score(self, query: str, k: int = 4, **kwargs):
+        return self.similarity_search_with_score(query, k, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "scores, settings, expected_count",
+    [
+        # Candidates below the score threshold are cut off
+        ([0.9, 0.8, 0.45, 0.44], dict(), 2),
+        # A drop larger than the score gap ends the result, even above the threshold
+        ([0.9, 0.85, 0.6, 0.58], dict(), 2),
+        # Small drops do not
+        ([0.9, 0.8, 0.7, 0.6], dict(), 4),
+        # The token budget caps the result
+        ([0.9, 0.9, 0.9, 0.9], dict(token_budget=2 * DOCUMENT_TOKENS + 5), 2),
+        # The first min_k candidates are kept below the threshold ...
+        ([0.4, 0.3, 0.2], dict(min_k=2), 2),
+        # ... and past a gap ...
+        ([0.9, 0.2, 0.1], dict(min_k=2), 2),
+        # ... but never beyond the token budget
+        ([0.4, 0.3, 0.2], dict(min_k=2, token_budget=DOCUMENT_TOKENS + 5), 1),
+        ([0.9], dict(token_budget=DOCUMENT_TOKENS - 1), 0),
+        # Only candidate_k candidates are fetched
+        ([0.9, 0.9, 0.9, 0.9], dict(candidate_k=3), 3),
+        ([], dict(), 0),
+    ],
+    ids=[
+        "threshold",
+        "gap",
+        "no-gap",
+        "budget",
+        "min_k-threshold",
+        "min_k-gap",
+        "min_k-budget",
+        "first-too-large",
+        "candidate_k",
+        "no-candidates",
+    ],
+)
+def test_cut_off(scores, settings, expected_count):
+    retriever = AdaptiveVectorRetriever(
+        vector_store=StandInVectorStore(scores),
+        **{"score_threshold": 0.5, "score_gap": 0.15, "min_k": 1, **settings},
+    )
+
+    documents = retriever.invoke("query")
+    async_documents = asyncio.run(retriever.ainvoke("query"))
+
+    # The leading candidates are returned, most similar first
+    assert [doc.page_content[0] for doc in documents] == [
+        str(idx) for idx in range(expected_count)
+    ]
+    assert async_documents == documents
@@ -0,0 +1,113 @@
+"""
+Check the similarity threshold, expiry, history fingerprints and invalidation of the semantic answer cache.
+
+No embedding model is used. Questions are hand-written embeddings.
+
+uv run python -m pytest tests/test_answer_cache.py
+"""
+
+# Python Standard Library imports
+import time
+
+# Third-party Library imports
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Custom Library imports
+from sc2editor.llm.answer_cache import (
+    SemanticAnswerCache,
+    history_fingerprint,
+    normalize_question,
+)
+
+
+QUESTION = [1.0, 0.0, 0.0]
+CHUNKS = ["Use ", "a trigger."]
+
+
+@pytest.mark.parametrize(
+    "embedding, expected_chunks",
+    [
+        # Scaled embeddings have the same direction, cosine similarity 1
+        ([2.0, 0.0, 0.0], CHUNKS),
+        # Cosine similarity 0.96
+        ([0.96, 0.28, 0.0], CHUNKS),
+        # Cosine similarity 0.94
+        ([0.94, 0.0, 0.3412], None),
+        ([0.0, 1.0, 0.0], None),
+    ],
+    ids=["same direction", "above threshold", "below threshold", "orthogonal"],
+)
+def test_similarity_threshold(embedding, expected_chunks):
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    cache.store(QUESTION, "history", CHUNKS)
+
+    assert cache.lookup(embedding, "history") == expected_chunks
+
+
+def test_most_similar_question_is_answered():
+    cache = SemanticAnswerCache(similarity_threshold=0.9)
+    cache.store([1.0, 0.0, 0.0], "history", ["first"])
+    cache.store([0.96, 0.28, 0.0], "history", ["second"])
+
+    assert cache.lookup([0.97, 0.25, 0.0], "history") == ["second"]
+    assert cache.lookup([1.0, 0.01, 0.0], "history") == ["first"]
+
+
+def test_other_history_fingerprint_is_a_miss():
+    follow_up = [HumanMessage("How do I make a trigger?"), AIMessage("Like this.")]
+    cache = SemanticAnswerCache()
+    cache.store(QUESTION, history_fingerprint(list(), turns=2), CHUNKS)
+
+    assert cache.lookup(QUESTION, history_fingerprint(follow_up, turns=2)) is None
+    assert cache.lookup(QUESTION, history_fingerprint(follow_up, turns=0)) == CHUNKS
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_history_fingerprint_ignores_case_and_whitespace():
+    history = [HumanMessage("How do I  make a Trigger?")]
+
+    assert history_fingerprint(history, 2) == history_fingerprint(
+        [HumanMessage("how do i make a trigger?")], 2
+    )
+    assert history_fingerprint(history, 2) != history_fingerprint(
+        [AIMessage("how do i make a trigger?")], 2
+    )
+    assert normalize_question("  How do I\nmake a Trigger? ") == (
+        "how do i make a trigger?"
+    )
+
+
+def test_expired_answer_is_a_miss():
+    cache = SemanticAnswerCache(ttl=0.05)
+    cache.store(QUESTION, "history", CHUNKS)
+    time.sleep(0.1)
+
+    assert cache.lookup(QUESTION, "history") is None
+    assert len(cache) == 0
+    assert cache.evictions == 1
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store([1.0, 0.0, 0.0], "history", ["first"])
+    cache.store([0.0, 1.0, 0.0], "history", ["second"])
+    assert cache.lookup([1.0, 0.0, 0.0], "history") == ["first"]
+    cache.store([0.0, 0.0, 1.0], "history", ["third"])
+
+    assert cache.lookup([0.0, 1.0, 0.0], "history") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "history") == ["first"]
+    assert cache.evictions == 1
+
+
+def test_answer_of_an_older_generation_is_not_stored():
+    cache = SemanticAnswerCache()
+    generation = cache.generation
+    # The graph database was re-ingested while the answer was streaming
+    cache.clear()
+    cache.store(QUESTION, "history", CHUNKS, generation=generation)
+
+    assert len(cache) == 0
+    cache.store(QUESTION, "history", CHUNKS, generation=cache.generation)
+    assert cache.lookup(QUESTION, "history") == CHUNKS
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,158 @@
+"""
+Check that cached answers are replayed like streamed answers, and that a slow question embedding skips the answer cache.
+
+No Neo4j database or Gemini API is used. The Cypher query, vector search, embeddings and LLM chains are replaced with local stand-ins.
+
+uv run python -m pytest tests/test_answer_cache_stream.py
+"""
+
+# Python Standard Library imports
+import os
+import asyncio
+import itertools
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Third-party Library imports
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+
+# Gemini chat models are only created, never called
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+# Custom Library imports
+from sc2editor.llm import SC2EditorLLM  # noqa: E402
+
+
+EMBEDDING_TIMEOUT = 0.2
+
+
+class EmptyGraph:
+    """Stand-in for Neo4jGraph without any graph data."""
+
+    def query(self, query: str, params: dict[str, Any] | None = None):
+        keywords = [el["keyword"] for el in (params or dict()).get("keywords", list())]
+        return [{"keyword": keyword, "outputs": list()} for keyword in keywords]
+
+    def close(self):
+        pass
+
+
+class StaticRetriever:
+    """Stand-in for the Neo4jVector retriever."""
+
+    async def ainvoke(self, query: str, *args, **kwargs):
+        return list()
+
+
+class StandInEmbeddings:
+    """Stand-in for the question embeddings, optionally slower than the embedding timeout."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.delay)
+        return [1.0, 0.0, 0.0]
+
+
+def create_llm(embedding_delay: float = 0.0) -> SC2EditorLLM:
+    """Create an SC2EditorLLM with the answer cache whose components are local stand-ins"""
+    llm = SC2EditorLLM(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        model="gemini-2.0-flash",
+        embedding="models/text-embedding-004",
+        maximum_retriever_attempts=1,
+        graph_query_backend="executor",
+        answer_cache_enabled=True,
+        answer_cache_embedding_timeout=EMBEDDING_TIMEOUT,
+        graph_version_check_interval=3600,
+        auto_initialize=False,
+    )
+
+    # Replace what initialize() would create by connecting to Neo4j
+    llm.neo4j_graph = EmptyGraph()
+    llm._graph_query_executor = ThreadPoolExecutor(max_workers=1)
+    llm._graph_query_semaphore = asyncio.Semaphore(1)
+    llm.node_count = llm.relationship_count = 100
+    llm.vector_retriever = StaticRetriever()
+    llm.embeddings = StandInEmbeddings(embedding_delay)
+    llm.builder = llm._create_graph()
+    llm.graph = llm.builder.compile(checkpointer=llm.checkpointer)
+    llm._is_initialized = True
+
+    # Replace Gemini chains
+    llm._router_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(prompt_status="allow")
+    )
+    llm._entity_extract_node_chain = RunnableLambda(
+        lambda inputs: SimpleNamespace(keywords=[inputs["message"]])
+    )
+    llm._retriever_query_node_chain = RunnableLambda(lambda _: AIMessage("query"))
+    llm._context_cleanup_node_chain = RunnableLambda(lambda _: AIMessage("context"))
+    llm._answer_judgment_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(answer_status="yes")
+    )
+    llm._answer_node_chain = RunnableLambda(lambda _: "answer") | GenericFakeChatModel(
+        messages=itertools.cycle([AIMessage("Use a trigger.")])
+    )
+
+    return llm
+
+
+async def stream_answer(
+    llm: SC2EditorLLM, thread_id: str
+) -> list[tuple[str, dict[str, Any]]]:
+    """Stream an answer and return the content and metadata of each answer chunk"""
+    chunks = list()
+
+    async for msg, metadata in llm.astream(
+        {"messages": [HumanMessage("How do I show a text?")]}, thread_id=thread_id
+    ):
+        if metadata["langgraph_node"] == "answer_node":
+            chunks.append((msg.content, metadata))
+    llm.delete_thread_id(thread_id=thread_id)
+
+    return chunks
+
+
+def test_replayed_answer_has_the_metadata_of_a_streamed_answer():
+    async def run():
+        llm = create_llm()
+        streamed = await stream_answer(llm, "first")
+        replayed = await stream_answer(llm, "second")
+
+        return llm, streamed, replayed
+
+    llm, streamed, replayed = asyncio.run(run())
+
+    assert "".join(content for content, _ in replayed) == "Use a trigger."
+    assert [content for content, _ in replayed] == [content for content, _ in streamed]
+    assert llm.answer_cache.stats()["hits"] == 1
+
+    streamed_metadata, replayed_metadata = streamed[0][1], replayed[0][1]
+    assert "answer_cache" not in streamed_metadata
+    assert set(replayed_metadata) == set(streamed_metadata) | {"answer_cache"}
+    assert replayed_metadata["thread_id"] == "second"
+    assert replayed_metadata["langgraph_node"] == "answer_node"
+
+
+def test_slow_question_embedding_skips_the_answer_cache():
+    async def run():
+        llm = create_llm(embedding_delay=EMBEDDING_TIMEOUT * 5)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        chunks = await stream_answer(llm, "first")
+
+        return llm, chunks, loop.time() - start
+
+    llm, chunks, elapsed = asyncio.run(run())
+
+    # The answer is generated without waiting for the embedding, and it is not cached without one
+    assert "".join(content for content, _ in chunks) == "Use a trigger."
+    assert elapsed < EMBEDDING_TIMEOUT * 5
+    assert len(llm.answer_cache) == 0
@@ -0,0 +1,91 @@
+"""
+Check that the bounded checkpointer keeps the checkpoints of at most max_threads threads.
+
+No LLM is used. A one-node LangGraph graph writes the checkpoints.
+
+uv run python -m pytest tests/test_bounded_saver.py
+"""
+
+# Python Standard Library imports
+import operator
+from typing import Annotated, TypedDict
+
+# Third-party Library imports
+from langgraph.graph import END, START, StateGraph
+
+# Custom Library imports
+from sc2editor.llm.bounded_saver import BoundedInMemorySaver
+
+
+MAX_THREADS = 3
+
+
+class State(TypedDict):
+    turns: Annotated[list[str], operator.add]
+
+
+def create_graph(checkpointer: BoundedInMemorySaver):
+    builder = StateGraph(State)
+    builder.add_node("echo_node", lambda state: {"turns": ["answer"]})
+    builder.add_edge(START, "echo_node")
+    builder.add_edge("echo_node", END)
+
+    return builder.compile(checkpointer=checkpointer)
+
+
+def thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def has_checkpoints(checkpointer: BoundedInMemorySaver, thread_id: str) -> bool:
+    return checkpointer.get_tuple(thread_config(thread_id)) is not None
+
+
+def test_least_recently_written_thread_is_evicted():
+    checkpointer = BoundedInMemorySaver(max_threads=MAX_THREADS)
+    graph = create_graph(checkpointer)
+
+    for idx in range(MAX_THREADS + 1):
+        graph.invoke({"turns": ["prompt"]}, thread_config(f"thread-{idx}"))
+
+    assert not has_checkpoints(checkpointer, "thread-0")
+    assert all(
+        has_checkpoints(checkpointer, f"thread-{idx}")
+        for idx in range(1, MAX_THREADS + 1)
+    )
+    assert checkpointer.stats() == {
+        "threads": MAX_THREADS,
+        "max_threads": MAX_THREADS,
+        "evictions": 1,
+    }
+
+
+def test_written_thread_becomes_the_most_recent_one():
+    checkpointer = BoundedInMemorySaver(max_threads=MAX_THREADS)
+    graph = create_graph(checkpointer)
+
+    for idx in range(MAX_THREADS):
+        graph.invoke({"turns": ["prompt"]}, thread_config(f"thread-{idx}"))
+    # The second turn of thread-0 makes thread-1 the least recently written thread
+    graph.invoke({"turns": ["prompt"]}, thread_config("thread-0"))
+    graph.invoke({"turns": ["prompt"]}, thread_config("thread-3"))
+
+    assert not has_checkpoints(checkpointer, "thread-1")
+    state = graph.get_state(thread_config("thread-0"))
+    assert state.values["turns"] == ["prompt", "answer", "prompt", "answer"]
+    assert checkpointer.evictions == 1
+
+
+def test_deleted_thread_frees_its_place():
+    checkpointer = BoundedInMemorySaver(max_threads=MAX_THREADS)
+    graph = create_graph(checkpointer)
+
+    for idx in range(MAX_THREADS):
+        graph.invoke({"turns": ["prompt"]}, thread_config(f"thread-{idx}"))
+    checkpointer.delete_thread("thread-1")
+    graph.invoke({"turns": ["prompt"]}, thread_config("thread-3"))
+
+    assert not has_checkpoints(checkpointer, "thread-1")
+    assert has_checkpoints(checkpointer, "thread-0")
+    assert checkpointer.stats()["threads"] == MAX_THREADS
+    assert checkpointer.evictions == 0
@@ -0,0 +1,134 @@
+"""
+Check that processes sharing the embedding cache directory never read each other's embeddings for their own texts.
+
+No Gemini API is used. Each text is embedded by a local stand-in that derives the embedding from the text.
+Two CachedEmbeddings instances stand in for two processes: they do not share any state but the cache files.
+
+uv run python -m pytest tests/test_cached_embeddings.py
+"""
+
+# Python Standard Library imports
+import asyncio
+import hashlib
+
+# Third-party Library imports
+from langchain_core.embeddings import Embeddings
+
+# Custom Library imports
+from sc2editor.embeddings import CachedEmbeddings
+
+
+DIMENSION = 8
+MAX_ENTRIES = 4
+
+
+class StandInEmbeddings(Embeddings):
+    """Stand-in for the Gemini embeddings that counts the texts it embeds."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded += len(texts)
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.embedded += 1
+        return self.vector(text)
+
+    @staticmethod
+    def vector(text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [float(byte) for byte in digest[:DIMENSION]]
+
+
+def create_cache(cache_dir) -> tuple[CachedEmbeddings, StandInEmbeddings]:
+    underlying_embeddings = StandInEmbeddings()
+    cache = CachedEmbeddings(
+        underlying_embeddings,
+        model="models/stand-in",
+        cache_dir=cache_dir,
+        max_entries=MAX_ENTRIES,
+    )
+    return cache, underlying_embeddings
+
+
+def test_processes_share_the_cache_files(tmp_path):
+    first, first_underlying = create_cache(tmp_path)
+    second, second_underlying = create_cache(tmp_path)
+
+    # Both processes store a text before seeing the other one's text
+    assert first.embed_query("first") == StandInEmbeddings.vector("first")
+    assert second.embed_query("second") == StandInEmbeddings.vector("second")
+
+    # Each process reads the text of the other one from the shared files
+    assert first.embed_query("second") == StandInEmbeddings.vector("second")
+    assert second.embed_query("first") == StandInEmbeddings.vector("first")
+    assert first_underlying.embedded == second_underlying.embedded == 1
+
+    # The second process fills the cache and replaces every row the first process knows
+    texts = [f"document {idx}" for idx in range(MAX_ENTRIES)]
+    asyncio.run(second.aembed_documents(texts))
+    assert first.embed_query("first") == StandInEmbeddings.vector("first")
+    assert first_underlying.embedded == 2
+    assert first.embed_documents(texts) == [
+        StandInEmbeddings.vector(text) for text in texts
+    ]
+
+    # Opening the cache again keeps the stored embeddings
+    reopened, reopened_underlying = create_cache(tmp_path)
+    assert reopened.embed_documents(texts) == [
+        StandInEmbeddings.vector(text) for text in texts
+    ]
+    assert reopened_underlying.embedded == 0
+    assert reopened.stats()["entries"] == MAX_ENTRIES
+
+
+class WiderStandInEmbeddings(StandInEmbeddings):
+    """Stand-in for an embedding model with twice the dimension."""
+
+    @staticmethod
+    def vector(text: str) -> list[float]:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [float(byte) for byte in digest[: 2 * DIMENSION]]
+
+
+def test_recreated_files_do_not_invalidate_open_memory_maps(tmp_path):
+    first, first_underlying = create_cache(tmp_path)
+    assert first.embed_query("first") == StandInEmbeddings.vector("first")
+
+    # Another process stores embeddings of another dimension, so it recreates the cache files
+    wider = CachedEmbeddings(
+        WiderStandInEmbeddings(),
+        model="models/stand-in",
+        cache_dir=tmp_path,
+        max_entries=MAX_ENTRIES,
+    )
+    assert wider.embed_query("wider") == WiderStandInEmbeddings.vector("wider")
+
+    # The first process still reads its old memory map, which was replaced instead of truncated
+    assert first.embed_query("first") == StandInEmbeddings.vector("first")
+    assert first_underlying.embedded == 1
+
+    # On its next write, the first process notices the replaced files and reopens them
+    assert first.embed_query("second") == StandInEmbeddings.vector("second")
+    assert first.embed_query("second") == StandInEmbeddings.vector("second")
+    assert first_underlying.embedded == 2
+    # No temporary file is left behind
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [
+        ".f32",
+        ".json",
+        ".keys",
+        ".lock",
+    ]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        test_processes_share_the_cache_files(Path(cache_dir))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        test_recreated_files_do_not_invalidate_open_memory_maps(Path(cache_dir))
+    print("The processes read only their own embeddings from the shared cache.")
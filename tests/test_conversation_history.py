@@ -0,0 +1,109 @@
+"""
+Check the token-budgeted conversation history: the recent window, the cut markers and the summary cache.
+
+No Gemini API is used. Token counts are the character estimates of the token budget module.
+
+uv run python -m pytest tests/test_conversation_history.py
+"""
+
+# Third-party Library imports
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# Custom Library imports
+from sc2editor.llm.conversation_history import (
+    HistorySummaryCache,
+    cut_marker,
+    cut_message,
+    prefix_fingerprints,
+    recent_window_start,
+    truncate_lines,
+    truncate_messages,
+)
+
+
+# Each line is 10 estimated tokens plus 1 for its line break
+LINES = [f"- Human: {'x' * 31}", f"- AI: {'y' * 34}", f"- Human: {'z' * 31}"]
+
+
+@pytest.mark.parametrize(
+    "lines, token_budget, expected_start",
+    [
+        (LINES, 1000, 0),
+        (LINES, 22, 1),
+        (LINES, 21, 2),
+        # The current prompt is kept even if it exceeds the budget on its own
+        (LINES, 0, 2),
+        ([f"- Human: {'x' * 1000}"], 10, 0),
+    ],
+    ids=["everything fits", "two fit", "one fits", "no budget", "long prompt"],
+)
+def test_recent_window_start(lines, token_budget, expected_start):
+    assert recent_window_start(lines, token_budget) == expected_start
+
+
+def test_truncated_lines_count_the_cut_lines():
+    assert truncate_lines(LINES, 1000) == "\n".join(LINES)
+    assert truncate_lines(LINES, 11) == "\n".join([f"- {cut_marker(2)}", LINES[2]])
+    assert cut_marker(2).startswith("[2 earlier messages")
+
+
+def test_truncated_messages_start_with_a_marker():
+    messages = [HumanMessage("x" * 40), AIMessage("y" * 40), HumanMessage("z" * 40)]
+
+    assert truncate_messages(messages, 1000) == messages
+    truncated = truncate_messages(messages, 13)
+    assert truncated == [SystemMessage(cut_marker(2)), messages[2]]
+
+
+def test_long_message_is_cut_with_a_marker():
+    message = HumanMessage("x" * 100)
+
+    assert cut_message(message, 25) is message
+    cut = cut_message(message, 10)
+    assert cut.content == "x" * 40 + (
+        "\n[60 characters of this message were cut to fit the token budget]"
+    )
+    # The original message of the conversation history is not changed
+    assert message.content == "x" * 100
+
+
+def test_summary_cache_hits():
+    messages = [HumanMessage(f"message {idx}") for idx in range(4)]
+    fingerprints = prefix_fingerprints(messages)
+    cache = HistorySummaryCache()
+    cache.store(fingerprints[1], "summary of two messages")
+
+    # Only the two newer messages have to be summarized
+    assert cache.lookup(fingerprints) == (2, "summary of two messages")
+    # The summarized messages themselves
+    assert cache.lookup(fingerprints[:2]) == (2, "summary of two messages")
+    # A conversation that differs in its first message shares no prefix
+    assert (
+        cache.lookup(prefix_fingerprints([HumanMessage("other")] + messages[1:]))
+        is None
+    )
+
+    assert cache.stats() == {
+        "entries": 1,
+        "hits": 1,
+        "partial_hits": 1,
+        "misses": 1,
+        "hit_rate": pytest.approx(2 / 3),
+        "evictions": 0,
+    }
+
+
+def test_summary_cache_evicts_the_least_recently_used_summary():
+    fingerprints = prefix_fingerprints(
+        [HumanMessage(f"message {idx}") for idx in range(3)]
+    )
+    cache = HistorySummaryCache(max_entries=2)
+    cache.store(fingerprints[0], "first")
+    cache.store(fingerprints[1], "second")
+    assert cache.lookup(fingerprints[:1]) == (1, "first")
+    cache.store(fingerprints[2], "third")
+
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    assert cache.lookup(fingerprints[:2]) == (1, "first")
@@ -0,0 +1,75 @@
+"""
+Check the local entity extraction: longest-leftmost matching, plural stemming and stopwords.
+
+uv run python -m pytest tests/test_entity_matcher.py
+"""
+
+# Third-party Library imports
+import pytest
+
+# Custom Library imports
+from sc2editor.llm.entity_matcher import EntityMatcher, stem
+
+
+ENTITY_IDS = [
+    "Trigger",
+    "Trigger Editor",
+    "Editor",
+    "Marine",
+    "Unit",
+    "units",
+    "Ability",
+    "Unit Selection",
+    "Selection Changed",
+    "Text Message",
+    "The",
+    "is it",
+]
+
+
+@pytest.mark.parametrize(
+    "word, expected",
+    [
+        ("marines", "marine"),
+        ("abilities", "ability"),
+        ("boxes", "box"),
+        ("switches", "switch"),
+        ("class", "class"),
+        ("status", "status"),
+        ("basis", "basis"),
+        ("bus", "bus"),
+        ("unit", "unit"),
+    ],
+)
+def test_stem(word, expected):
+    assert stem(word) == expected
+
+
+@pytest.mark.parametrize(
+    "prompt, expected",
+    [
+        # The longest match starting first wins over the entities it contains
+        ("How do I open the Trigger Editor?", ["Trigger Editor"]),
+        ("Editor or trigger editor", ["Editor", "Trigger Editor"]),
+        # Overlapping entities: the leftmost one is kept and the one it overlaps is dropped
+        ("when the unit selection changed", ["Unit Selection"]),
+        ("Selection changed for a unit", ["Selection Changed", "Unit"]),
+        # Plural words and case differences match the singular node id
+        ("MARINES with abilities", ["Marine", "Ability"]),
+        ("Show a text message to all units", ["Text Message", "Unit"]),
+        # Each entity is returned once
+        ("unit, unit and units", ["Unit"]),
+        # Ids made only of stopwords are never keywords
+        ("What is it? The end.", []),
+        ("", []),
+    ],
+)
+def test_extract(prompt, expected):
+    assert EntityMatcher(ENTITY_IDS).extract(prompt) == expected
+
+
+def test_ids_differing_in_case_or_number_are_one_entity():
+    matcher = EntityMatcher(ENTITY_IDS)
+
+    # 'units' is the same keyword as 'Unit', and 'The' and 'is it' consist only of stopwords
+    assert len(matcher) == len(ENTITY_IDS) - 3
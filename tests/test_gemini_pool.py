@@ -0,0 +1,202 @@
+"""
+Check that the chat models share the connections of the Gemini client pool.
+
+No Gemini API is used. A local gRPC server stands in for the Gemini API and records the connection each request arrived on.
+
+uv run python -m pytest tests/test_gemini_pool.py
+"""
+
+# Python Standard Library imports
+import asyncio
+
+# Third-party Library imports
+import grpc
+from langchain_core.messages import HumanMessage
+from google.ai.generativelanguage_v1beta.types import (
+    Candidate,
+    Content,
+    GenerateContentRequest,
+    GenerateContentResponse,
+    Part,
+)
+
+# Custom Library imports
+from sc2editor.llm.gemini_pool import (
+    GeminiClientPool,
+    PooledChatGoogleGenerativeAI,
+    client_info,
+)
+
+
+MAX_CONNECTIONS = 2
+CONCURRENT_REQUESTS = 20
+RESPONSE_SECONDS = 0.05
+MODEL_TIMEOUT = 7.0
+
+
+class StandInGeminiServer:
+    """Stand-in for the GenerativeService of the Gemini API that answers every request with a fixed text."""
+
+    def __init__(self):
+        self.peers = list()
+        self.deadlines = list()
+        self.server = grpc.aio.server()
+        self.server.add_generic_rpc_handlers(
+            (
+                grpc.method_handlers_generic_handler(
+                    "google.ai.generativelanguage.v1beta.GenerativeService",
+                    {
+                        "GenerateContent": grpc.unary_unary_rpc_method_handler(
+                            self.generate_content,
+                            request_deserializer=GenerateContentRequest.deserialize,
+                            response_serializer=GenerateContentResponse.serialize,
+                        ),
+                        "StreamGenerateContent": grpc.unary_stream_rpc_method_handler(
+                            self.stream_generate_content,
+                            request_deserializer=GenerateContentRequest.deserialize,
+                            response_serializer=GenerateContentResponse.serialize,
+                        ),
+                    },
+                ),
+            )
+        )
+        self.port = self.server.add_insecure_port("127.0.0.1:0")
+
+    @staticmethod
+    def response(text: str) -> GenerateContentResponse:
+        return GenerateContentResponse(
+            candidates=[
+                Candidate(
+                    content=Content(parts=[Part(text=text)], role="model"),
+                    finish_reason=Candidate.FinishReason.STOP,
+                )
+            ]
+        )
+
+    async def generate_content(self, request, context):
+        self.peers.append(context.peer())
+        self.deadlines.append(context.time_remaining())
+        await asyncio.sleep(RESPONSE_SECONDS)
+        return self.response("answer")
+
+    async def stream_generate_content(self, request, context):
+        self.peers.append(context.peer())
+        for token in ("an", "sw", "er"):
+            await asyncio.sleep(RESPONSE_SECONDS / 3)
+            yield self.response(token)
+
+
+def test_chat_models_share_pooled_connections():
+    async def run():
+        server = StandInGeminiServer()
+        await server.server.start()
+        pool = GeminiClientPool(
+            api_key="test",
+            max_connections=MAX_CONNECTIONS,
+            api_endpoint=f"127.0.0.1:{server.port}",
+            use_tls=False,
+        )
+        models = [
+            PooledChatGoogleGenerativeAI(
+                model="gemini-2.0-flash",
+                temperature=temperature,
+                timeout=MODEL_TIMEOUT,
+                google_api_key=pool.api_key,
+                client_pool=pool,
+            )
+            for temperature in (0, 0.3)
+        ]
+
+        try:
+            # Sequential requests of different models reuse one warm connection
+            for idx in range(4):
+                response = await models[idx % 2].ainvoke("prompt")
+                assert response.content == "answer"
+            chunks = [chunk.content async for chunk in models[1].astream("prompt")]
+            assert "".join(chunks) == "answer"
+            assert len(set(server.peers)) == 1
+            sequential_peers = set(server.peers)
+
+            # Concurrent requests are spread over at most MAX_CONNECTIONS connections
+            server.peers.clear()
+            await asyncio.gather(
+                *(
+                    models[idx % 2].ainvoke("prompt")
+                    for idx in range(CONCURRENT_REQUESTS)
+                )
+            )
+            concurrent_peers = set(server.peers)
+
+            return pool.stats(), server.deadlines, sequential_peers, concurrent_peers
+        finally:
+            await pool.aclose()
+            await server.server.stop(None)
+
+    stats, deadlines, sequential_peers, concurrent_peers = asyncio.run(run())
+
+    assert len(concurrent_peers) == MAX_CONNECTIONS
+    assert sequential_peers <= concurrent_peers
+    assert len(stats["async"]["channels"]) == MAX_CONNECTIONS
+    assert stats["async"]["requests"] == 5 + CONCURRENT_REQUESTS
+    assert stats["async"]["in_flight"] == 0
+    # The timeout of the model is sent with every request
+    assert all(abs(deadline - MODEL_TIMEOUT) < 1 for deadline in deadlines)
+
+
+def test_langchain_google_genai_uses_the_pooled_clients():
+    # Fails if an upgrade of langchain-google-genai stops reading the client and async_client of the model
+    pool = GeminiClientPool(api_key="test", use_tls=False)
+    model = PooledChatGoogleGenerativeAI(
+        model="gemini-2.0-flash", google_api_key=pool.api_key, client_pool=pool
+    )
+    assert model.client is pool.sync_client()
+    assert client_info("ChatGoogleGenerativeAI").user_agent.startswith(
+        "langchain-google-genai/"
+    )
+
+    requests = list()
+
+    async def generate_content(request, **kwargs):
+        requests.append(request)
+        return StandInGeminiServer.response("answer")
+
+    async def run():
+        async with pool.lease() as client:
+            leased = model._leased_copy(client)
+            assert leased.async_client is client
+
+            # ChatGoogleGenerativeAI sends the request with the leased client
+            client.generate_content = generate_content
+            response = await super(PooledChatGoogleGenerativeAI, leased)._agenerate(
+                [HumanMessage("prompt")]
+            )
+        await pool.aclose()
+        return response
+
+    response = asyncio.run(run())
+    assert response.generations[0].message.content == "answer"
+    assert len(requests) == 1
+
+
+def test_channels_of_previous_event_loops_are_closed():
+    async def run(pool: GeminiClientPool, close: bool):
+        async with pool.lease():
+            channel = pool._async_channels[0]
+        if close:
+            await pool.aclose()
+        return channel
+
+    pool = GeminiClientPool(api_key="test", use_tls=False)
+    first_channel = asyncio.run(run(pool, close=False))
+    second_channel = asyncio.run(run(pool, close=True))
+
+    assert first_channel is not second_channel
+    assert first_channel._channel.closed()
+    assert second_channel._channel.closed()
+
+
+if __name__ == "__main__":
+    test_chat_models_share_pooled_connections()
+    test_langchain_google_genai_uses_the_pooled_clients()
+    test_channels_of_previous_event_loops_are_closed()
+    print("The chat models shared the pooled connections.")
@@ -0,0 +1,227 @@
+"""
+Check the hits, expiry, eviction, coalescing and invalidation of the graph query cache.
+
+No Neo4j database is used. The lookups are local coroutines that count the keys they load.
+
+uv run python -m pytest tests/test_graph_query_cache.py
+"""
+
+# Python Standard Library imports
+import asyncio
+
+# Third-party Library imports
+import pytest
+
+# Custom Library imports
+from sc2editor.llm.graph_query_cache import GraphQueryCache
+
+
+class StandInLookup:
+    """Stand-in for the keyword graph lookup that returns the upper-cased key, optionally after a delay."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.calls = list()
+        self.started = asyncio.Event()
+
+    async def __call__(self, keys: list[str]) -> dict[str, str]:
+        self.calls.append(list(keys))
+        self.started.set()
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {key: key.upper() for key in keys}
+
+
+def test_hit_and_miss():
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup()
+
+        first = await cache.get_many(["unit", "trigger"], lookup)
+        second = await cache.get_many(["trigger", "unit", "region"], lookup)
+
+        return cache, lookup, first, second
+
+    cache, lookup, first, second = asyncio.run(run())
+
+    assert first == {"unit": "UNIT", "trigger": "TRIGGER"}
+    assert second == {"trigger": "TRIGGER", "unit": "UNIT", "region": "REGION"}
+    # Only the key that was not cached yet is looked up again
+    assert lookup.calls == [["unit", "trigger"], ["region"]]
+    assert (cache.hits, cache.misses) == (2, 3)
+
+
+def test_expired_result_is_loaded_again():
+    async def run():
+        cache = GraphQueryCache(ttl=0.05)
+        lookup = StandInLookup()
+
+        await cache.get_many(["unit"], lookup)
+        await asyncio.sleep(0.1)
+        await cache.get_many(["unit"], lookup)
+
+        return cache, lookup
+
+    cache, lookup = asyncio.run(run())
+
+    assert lookup.calls == [["unit"], ["unit"]]
+    assert cache.evictions == 1
+
+
+def test_least_recently_used_result_is_evicted():
+    async def run():
+        cache = GraphQueryCache(max_entries=2)
+        lookup = StandInLookup()
+
+        await cache.get_many(["unit", "trigger"], lookup)
+        # 'unit' becomes the most recently used result, so 'trigger' is evicted by 'region'
+        await cache.get_many(["unit"], lookup)
+        await cache.get_many(["region"], lookup)
+        await cache.get_many(["unit", "trigger"], lookup)
+
+        return cache, lookup
+
+    cache, lookup = asyncio.run(run())
+
+    assert lookup.calls == [["unit", "trigger"], ["region"], ["trigger"]]
+    assert cache.evictions == 2
+
+
+def test_concurrent_misses_share_one_load():
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup(delay=0.05)
+
+        results = await asyncio.gather(
+            cache.get_many(["unit"], lookup), cache.get_many(["unit"], lookup)
+        )
+
+        return cache, lookup, results
+
+    cache, lookup, results = asyncio.run(run())
+
+    assert lookup.calls == [["unit"]]
+    assert results == [{"unit": "UNIT"}, {"unit": "UNIT"}]
+    assert (cache.misses, cache.coalesced) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "cancel, expected_error",
+    [(False, ValueError), (True, RuntimeError)],
+    ids=["failed", "cancelled"],
+)
+def test_failed_load_raises_in_every_waiter(cancel, expected_error):
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup(delay=0.05, error=ValueError("Neo4j is down"))
+
+        loader = asyncio.create_task(cache.get_many(["unit"], lookup))
+        await lookup.started.wait()
+        waiter = asyncio.create_task(cache.get_many(["unit"], lookup))
+        await asyncio.sleep(0)
+        if cancel:
+            loader.cancel()
+
+        results = await asyncio.gather(loader, waiter, return_exceptions=True)
+
+        return cache, results
+
+    cache, (loader_result, waiter_result) = asyncio.run(run())
+
+    if cancel:
+        assert isinstance(loader_result, asyncio.CancelledError)
+    else:
+        assert isinstance(loader_result, ValueError)
+    assert isinstance(waiter_result, expected_error)
+    # A failed lookup is not cached
+    assert len(cache) == 0
+
+
+def test_clear_during_load_does_not_store_the_stale_result():
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup(delay=0.05)
+
+        loader = asyncio.create_task(cache.get_many(["unit"], lookup))
+        await lookup.started.wait()
+        cache.clear()
+        stale_result = await loader
+        # The lookup after clear() does not wait for the stale lookup either
+        await cache.get_many(["unit"], lookup)
+
+        return cache, lookup, stale_result
+
+    cache, lookup, stale_result = asyncio.run(run())
+
+    # The running lookup still answers its own caller ...
+    assert stale_result == {"unit": "UNIT"}
+    # ... but its result was not stored, so the key was looked up again
+    assert lookup.calls == [["unit"], ["unit"]]
+    assert cache.invalidations == 1
+
+
+def test_unusable_results_are_loaded_again():
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup()
+
+        def load_with(size: int):
+            async def load(keys: list[str]) -> dict[str, tuple[int, str]]:
+                return {
+                    key: (size, value) for key, value in (await lookup(keys)).items()
+                }
+
+            return load
+
+        def usable_for(size: int):
+            return lambda result: result[0] >= size
+
+        await cache.get_many(["unit", "trigger"], load_with(2), usable_for(2))
+        # A smaller lookup is answered from the cache ...
+        small = await cache.get_many(["unit"], load_with(1), usable_for(1))
+        # ... a larger one replaces the cached result
+        large = await cache.get_many(["unit", "trigger"], load_with(5), usable_for(5))
+        again = await cache.get_many(["unit"], load_with(3), usable_for(3))
+
+        return cache, lookup, small, large, again
+
+    cache, lookup, small, large, again = asyncio.run(run())
+
+    assert small == {"unit": (2, "UNIT")}
+    assert large == {"unit": (5, "UNIT"), "trigger": (5, "TRIGGER")}
+    assert again == {"unit": (5, "UNIT")}
+    assert lookup.calls == [["unit", "trigger"], ["unit", "trigger"]]
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 4, 0)
+
+
+def test_unusable_concurrent_result_is_loaded_again():
+    async def run():
+        cache = GraphQueryCache()
+        lookup = StandInLookup(delay=0.05)
+
+        def load_with(size: int):
+            async def load(keys: list[str]) -> dict[str, tuple[int, str]]:
+                return {
+                    key: (size, value) for key, value in (await lookup(keys)).items()
+                }
+
+            return load
+
+        results = await asyncio.gather(
+            cache.get_many(["unit"], load_with(1), lambda result: result[0] >= 1),
+            cache.get_many(["unit"], load_with(5), lambda result: result[0] >= 5),
+        )
+        # The larger result is cached
+        cached = await cache.get_many(
+            ["unit"], load_with(5), lambda result: result[0] >= 5
+        )
+
+        return lookup, results, cached
+
+    lookup, results, cached = asyncio.run(run())
+
+    assert results == [{"unit": (1, "UNIT")}, {"unit": (5, "UNIT")}]
+    assert cached == {"unit": (5, "UNIT")}
+    assert lookup.calls == [["unit"], ["unit"]]
@@ -0,0 +1,194 @@
+"""
+Check that a slow graph query of one request does not stall token streaming of another request, on both graph query backends.
+
+No Neo4j database or Gemini API is used. The Cypher query, vector search and LLM chains are replaced with local stand-ins.
+
+uv run python -m pytest tests/test_graph_query_concurrency.py
+"""
+
+# Python Standard Library imports
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator
+
+# Third-party Library imports
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.chat_models import BaseChatModel
+
+# Gemini chat models are only created, never called
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+# Custom Library imports
+from sc2editor.llm import SC2EditorLLM  # noqa: E402
+
+
+SLOW_QUERY_SECONDS = 1.0
+TOKEN_INTERVAL_SECONDS = 0.05
+
+
+class SlowGraph:
+    """Stand-in for Neo4jGraph whose query blocks the calling thread, like the real synchronous driver."""
+
+    def __init__(self):
+        self.slow_query_window = (0.0, 0.0)
+
+    def query(self, query: str, params: dict[str, Any] | None = None):
+        keywords = [el["keyword"] for el in (params or dict()).get("keywords", list())]
+        if "slow" in keywords:
+            start = time.perf_counter()
+            time.sleep(SLOW_QUERY_SECONDS)
+            self.slow_query_window = (start, time.perf_counter())
+        return [{"keyword": keyword, "outputs": list()} for keyword in keywords]
+
+    def close(self):
+        pass
+
+
+class SlowAsyncDriver:
+    """Stand-in for the async Neo4j driver whose query waits without blocking the event loop."""
+
+    def __init__(self):
+        self.slow_query_window = (0.0, 0.0)
+
+    async def execute_query(self, query: str, params: dict[str, Any], routing_=None):
+        keywords = [el["keyword"] for el in params.get("keywords", list())]
+        if "slow" in keywords:
+            start = time.perf_counter()
+            await asyncio.sleep(SLOW_QUERY_SECONDS)
+            self.slow_query_window = (start, time.perf_counter())
+        records = [
+            SimpleNamespace(
+                data=lambda keyword=keyword: {"keyword": keyword, "outputs": list()}
+            )
+            for keyword in keywords
+        ]
+        return records, None, None
+
+
+class StaticRetriever:
+    """Stand-in for the Neo4jVector retriever."""
+
+    async def ainvoke(self, query: str, *args, **kwargs):
+        return list()
+
+
+class TokenStreamChatModel(BaseChatModel):
+    """Chat model that streams a fixed answer token by token with a small delay."""
+
+    tokens: list[str] = [f"token{idx} " for idx in range(20)]
+
+    @property
+    def _llm_type(self) -> str:
+        return "token-stream"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage("".join(self.tokens)))]
+        )
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        for token in self.tokens:
+            await asyncio.sleep(TOKEN_INTERVAL_SECONDS)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+def create_llm(graph_query_backend: str) -> SC2EditorLLM:
+    """Create an SC2EditorLLM whose graph queries run on the given backend"""
+    llm = SC2EditorLLM(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        model="gemini-2.0-flash",
+        embedding="models/text-embedding-004",
+        maximum_retriever_attempts=1,
+        graph_query_backend=graph_query_backend,
+        graph_query_concurrency=2,
+        auto_initialize=False,
+    )
+
+    # Replace what initialize() would create by connecting to Neo4j
+    llm.neo4j_graph = SlowGraph()
+    if graph_query_backend == "async_driver":
+        llm.neo4j_async_driver = SlowAsyncDriver()
+    llm._graph_query_executor = ThreadPoolExecutor(max_workers=2)
+    llm._graph_query_semaphore = asyncio.Semaphore(2)
+    llm.node_count = llm.relationship_count = 100
+    llm.vector_retriever = StaticRetriever()
+    llm.builder = llm._create_graph()
+    llm.graph = llm.builder.compile(checkpointer=llm.checkpointer)
+    llm._is_initialized = True
+
+    # Replace Gemini chains
+    llm._router_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(prompt_status="allow")
+    )
+    llm._entity_extract_node_chain = RunnableLambda(
+        lambda inputs: SimpleNamespace(keywords=[inputs["message"]])
+    )
+    llm._retriever_query_node_chain = RunnableLambda(lambda _: AIMessage("query"))
+    llm._context_cleanup_node_chain = RunnableLambda(lambda _: AIMessage("context"))
+    llm._answer_judgment_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(answer_status="yes")
+    )
+    llm._answer_node_chain = RunnableLambda(lambda _: "answer") | TokenStreamChatModel()
+
+    return llm
+
+
+async def stream_tokens(llm: SC2EditorLLM, prompt: str) -> list[float]:
+    """Stream an answer and return the arrival time of each answer token"""
+    token_times = list()
+
+    async for msg, metadata in llm.astream(
+        {"messages": [HumanMessage(prompt)]}, thread_id=prompt
+    ):
+        if metadata["langgraph_node"] == "answer_node":
+            token_times.append(time.perf_counter())
+    llm.delete_thread_id(thread_id=prompt)
+
+    return token_times
+
+
+@pytest.mark.parametrize("graph_query_backend", ["executor", "async_driver"])
+def test_token_streaming_continues_during_slow_graph_query(graph_query_backend):
+    async def run() -> tuple[list[float], tuple[float, float]]:
+        llm = create_llm(graph_query_backend)
+
+        # Request B starts first and spends SLOW_QUERY_SECONDS in its graph query
+        slow_request = asyncio.create_task(stream_tokens(llm, "slow"))
+        await asyncio.sleep(0.1)
+
+        # Request A streams while request B is still waiting for Neo4j
+        token_times = await stream_tokens(llm, "fast")
+        await slow_request
+
+        return token_times, (
+            llm.neo4j_async_driver or llm.neo4j_graph
+        ).slow_query_window
+
+    token_times, (slow_query_start, slow_query_end) = asyncio.run(run())
+
+    # Tokens of request A arrived while the query of request B was running ...
+    assert any(slow_query_start < t < slow_query_end for t in token_times)
+    # ... without a gap anywhere near the length of the slow query
+    largest_gap = max(b - a for a, b in zip(token_times, token_times[1:]))
+    assert largest_gap < SLOW_QUERY_SECONDS / 2
+
+
+if __name__ == "__main__":
+    for graph_query_backend in ("executor", "async_driver"):
+        test_token_streaming_continues_during_slow_graph_query(graph_query_backend)
+        print(
+            f"Token streaming was not blocked by the slow graph query ({graph_query_backend})."
+        )
@@ -0,0 +1,104 @@
+"""
+Check the relevance of candidate edges and their greedy selection under a token budget.
+
+uv run python -m pytest tests/test_graph_ranking.py
+"""
+
+# Third-party Library imports
+import pytest
+
+# Custom Library imports
+from sc2editor.llm.graph_ranking import edge_relevance, rank_graph_edges
+
+
+def edge(output: str, score: float, degree: int = 0, edge_type: str = "RELATED_TO"):
+    return {"output": output, "score": score, "type": edge_type, "degree": degree}
+
+
+@pytest.mark.parametrize(
+    "match_score, degree, edge_type, expected",
+    [
+        (1.0, 0, "RELATED_TO", 1.0),
+        # Hubs are ranked down by the logarithm of their degree
+        (1.0, 2, "RELATED_TO", 0.5),
+        (1.0, 6, "RELATED_TO", 1 / 3),
+        (0.5, 0, "RELATED_TO", 0.5),
+        # Listed relationship types are weighted, the others weigh 1
+        (0.5, 0, "HAS_PARAMETER", 1.0),
+        (1.0, 0, "MENTIONS", 0.25),
+    ],
+)
+def test_edge_relevance(match_score, degree, edge_type, expected):
+    priority = {"HAS_PARAMETER": 2.0, "MENTIONS": 0.25}
+
+    assert edge_relevance(match_score, degree, edge_type, priority) == pytest.approx(
+        expected
+    )
+
+
+@pytest.mark.parametrize(
+    "keyword_edges, token_budget, expected",
+    [
+        # The hub neighbor is ranked below the specific one
+        (
+            {"unit": [edge("Unit - R -> Hub", 1.0, 30), edge("Unit - R -> Leaf", 1.0)]},
+            100,
+            ["Unit - R -> Leaf", "Unit - R -> Hub"],
+        ),
+        # Scores are normalized per keyword, so a keyword with low raw scores is not crowded out
+        (
+            {
+                "unit": [edge("Unit - R -> A", 10.0), edge("Unit - R -> B", 5.0)],
+                "text": [edge("Text - R -> C", 2.0)],
+            },
+            100,
+            ["Unit - R -> A", "Text - R -> C", "Unit - R -> B"],
+        ),
+        # An edge found through several keywords keeps its highest relevance
+        (
+            {
+                "unit": [edge("Unit - R -> A", 1.0), edge("Unit - R -> B", 0.2)],
+                "text": [edge("Unit - R -> B", 1.0, 2), edge("Text - R -> C", 0.1)],
+            },
+            100,
+            ["Unit - R -> A", "Unit - R -> B", "Text - R -> C"],
+        ),
+        # Each 13-character row costs 4 tokens: the budget runs out after two of them
+        (
+            {
+                "unit": [
+                    edge("Unit - R -> A", 1.0),
+                    edge("Unit - R -> B", 0.9),
+                    edge("Unit - R -> C", 0.8),
+                ]
+            },
+            9,
+            ["Unit - R -> A", "Unit - R -> B"],
+        ),
+        # An edge that does not fit is skipped, and a shorter, less relevant one still fits
+        (
+            {
+                "unit": [
+                    edge("Unit - R -> A", 1.0),
+                    edge("Unit - R -> A very long neighbor name", 0.9),
+                    edge("Unit - R -> C", 0.8),
+                ]
+            },
+            9,
+            ["Unit - R -> A", "Unit - R -> C"],
+        ),
+        ({"unit": [edge("Unit - R -> A", 1.0)]}, 0, []),
+        ({"unit": list()}, 100, []),
+    ],
+    ids=[
+        "hub",
+        "per-keyword",
+        "duplicate",
+        "budget-exhausted",
+        "budget-skip",
+        "no-budget",
+        "no-edges",
+    ],
+)
+def test_rank_graph_edges(keyword_edges, token_budget, expected):
+    assert rank_graph_edges(keyword_edges, dict(), token_budget) == expected
@@ -0,0 +1,113 @@
+"""
+Check the node matching and the multi-hop CSR expansion of the in-memory graph snapshot.
+
+uv run python -m pytest tests/test_graph_snapshot.py
+"""
+
+# Third-party Library imports
+import pytest
+
+# Custom Library imports
+from sc2editor.llm.graph_snapshot import GraphSnapshot, HOP_SCORE_DECAY
+
+
+NODES = [
+    {"element_id": "n0", "id": "Unit", "text": None, "degree": 2},
+    {"element_id": "n1", "id": "Marine", "text": "", "degree": 2},
+    {"element_id": "n2", "id": "Barracks", "text": None, "degree": 2},
+    {"element_id": "n3", "id": "Supply", "text": None, "degree": 1},
+    {"element_id": "n4", "id": "Zergling", "text": "A small zerg unit", "degree": 1},
+]
+RELATIONSHIPS = [
+    {"source": "n1", "target": "n0", "type": "IS_A"},
+    {"source": "n2", "target": "n1", "type": "PRODUCES"},
+    {"source": "n2", "target": "n3", "type": "REQUIRES"},
+    {"source": "n4", "target": "n0", "type": "IS_A"},
+    # Relationships to nodes without an id are skipped
+    {"source": "n4", "target": "unknown", "type": "MENTIONS"},
+]
+
+
+@pytest.fixture
+def snapshot() -> GraphSnapshot:
+    return GraphSnapshot.build(NODES, RELATIONSHIPS, version=3)
+
+
+def test_build(snapshot):
+    assert len(snapshot) == len(NODES)
+    assert snapshot.relationship_count == 4
+    assert snapshot.type_names == ["IS_A", "PRODUCES", "REQUIRES"]
+    assert snapshot.version == 3
+
+
+@pytest.mark.parametrize(
+    "keyword, expected",
+    [
+        # Exact id match, then text match
+        ("unit", [(0, 1.0), (4, 0.5)]),
+        # Keywords match inside node ids, like the CONTAINS lookup
+        ("zerg", [(4, 0.75)]),
+        ("ar", [(1, 0.75), (2, 0.75)]),
+        ("hydralisk", []),
+        ("", []),
+    ],
+)
+def test_match(snapshot, keyword, expected):
+    assert snapshot.match(keyword) == expected
+
+
+@pytest.mark.parametrize(
+    "keyword, limit, hops, expected",
+    [
+        # Outgoing and incoming edges of the matched node, in both directions
+        ("marine", 10, 1, ["Marine - IS_A -> Unit", "Barracks - PRODUCES -> Marine"]),
+        # The second hop continues from the neighbors in the order they were reached,
+        # without returning the edges back to the matched node
+        (
+            "marine",
+            10,
+            2,
+            [
+                "Marine - IS_A -> Unit",
+                "Barracks - PRODUCES -> Marine",
+                "Zergling - IS_A -> Unit",
+                "Barracks - REQUIRES -> Supply",
+            ],
+        ),
+        # The limit cuts the expansion off in the same order
+        (
+            "marine",
+            3,
+            2,
+            [
+                "Marine - IS_A -> Unit",
+                "Barracks - PRODUCES -> Marine",
+                "Zergling - IS_A -> Unit",
+            ],
+        ),
+        ("supply", 10, 1, ["Barracks - REQUIRES -> Supply"]),
+        ("hydralisk", 10, 2, []),
+    ],
+)
+def test_expand(snapshot, keyword, limit, hops, expected):
+    assert snapshot.expand(keyword, limit, hops=hops) == expected
+
+
+def test_expand_ranked_decays_the_score_per_hop(snapshot):
+    edges = snapshot.expand("marine", 10, ranked=True, hops=2)
+
+    assert [(edge["output"], edge["score"]) for edge in edges] == [
+        ("Marine - IS_A -> Unit", 1.0),
+        ("Barracks - PRODUCES -> Marine", 1.0),
+        ("Zergling - IS_A -> Unit", HOP_SCORE_DECAY),
+        ("Barracks - REQUIRES -> Supply", HOP_SCORE_DECAY),
+    ]
+    # The degree is the degree of the neighbor, not of the matched node
+    assert [edge["degree"] for edge in edges] == [2, 2, 1, 1]
+
+
+def test_expand_keywords(snapshot):
+    assert snapshot.expand_keywords(["supply", "hydralisk"], 10) == {
+        "supply": ["Barracks - REQUIRES -> Supply"],
+        "hydralisk": [],
+    }
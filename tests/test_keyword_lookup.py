@@ -0,0 +1,185 @@
+"""
+Check how keywords are matched, limited and cached in the keyword graph lookup.
+
+No Neo4j database is used. A stand-in graph answers the full-text and CONTAINS queries from fixed rows.
+
+uv run python -m pytest tests/test_keyword_lookup.py
+"""
+
+# Python Standard Library imports
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Third-party Library imports
+import pytest
+
+# Gemini chat models are only created, never called
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+# Custom Library imports
+from sc2editor.llm import SC2EditorLLM  # noqa: E402
+from sc2editor.llm.cypher_queries import lucene_keyword_query  # noqa: E402
+from sc2editor.llm.graph_query_cache import GraphQueryCache  # noqa: E402
+
+
+class StandInGraph:
+    """Stand-in for Neo4jGraph that records the keyword lookups and answers them from fixed rows."""
+
+    def __init__(
+        self, fulltext_rows: dict[str, list[str]], contains_rows: dict[str, list[str]]
+    ):
+        self.fulltext_rows = fulltext_rows
+        self.contains_rows = contains_rows
+        self.lookups = list()
+
+    def query(self, query: str, params: dict[str, Any] | None = None):
+        fulltext = "db.index.fulltext.queryNodes" in query
+        rows = self.fulltext_rows if fulltext else self.contains_rows
+        keywords = [el["keyword"] for el in params["keywords"]]
+        self.lookups.append(
+            (
+                "fulltext" if fulltext else "contains",
+                keywords,
+                params["keyword_limit"],
+            )
+        )
+        return [
+            {
+                "keyword": keyword,
+                "outputs": rows.get(keyword, list())[: params["keyword_limit"]],
+            }
+            for keyword in keywords
+        ]
+
+
+def create_llm(graph: StandInGraph, fulltext_index_available: bool) -> SC2EditorLLM:
+    """Create an SC2EditorLLM whose graph queries are answered by the stand-in graph"""
+    llm = SC2EditorLLM(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        model="gemini-2.0-flash",
+        embedding="models/text-embedding-004",
+        graph_query_backend="executor",
+        auto_initialize=False,
+    )
+    llm.neo4j_graph = graph
+    llm._graph_query_executor = ThreadPoolExecutor(max_workers=1)
+    llm._graph_query_semaphore = asyncio.Semaphore(1)
+    llm.fulltext_index_available = fulltext_index_available
+
+    return llm
+
+
+@pytest.mark.parametrize(
+    "keyword, expected_query",
+    [
+        ("zerg", '"zerg" OR zerg*'),
+        ("spawning pool", '"spawning pool"'),
+        ('say "gg"', '"say \\"gg\\""'),
+    ],
+    ids=["single word", "several words", "quotes"],
+)
+def test_lucene_keyword_query(keyword, expected_query):
+    assert lucene_keyword_query(keyword) == expected_query
+
+
+def test_keywords_without_fulltext_hits_fall_back_to_contains():
+    graph = StandInGraph(
+        fulltext_rows={"zerg": ["Zergling - MORPHS_FROM -> Larva"]},
+        contains_rows={
+            "zerg": ["Zerg - HAS_UNIT -> Zergling"],
+            "ling": ["Zergling - MORPHS_FROM -> Larva"],
+        },
+    )
+    llm = create_llm(graph, fulltext_index_available=True)
+
+    graph_data = asyncio.run(llm._lookup_graph_data(["zerg", "ling"], 5, False))
+
+    assert graph_data == {
+        "zerg": ["Zergling - MORPHS_FROM -> Larva"],
+        "ling": ["Zergling - MORPHS_FROM -> Larva"],
+    }
+    # Only the keyword the full-text index did not find is scanned with CONTAINS
+    assert graph.lookups == [
+        ("fulltext", ["zerg", "ling"], 5),
+        ("contains", ["ling"], 5),
+    ]
+
+
+def test_all_keywords_use_contains_without_fulltext_index():
+    graph = StandInGraph(
+        fulltext_rows=dict(), contains_rows={"zerg": ["Zerg - HAS_UNIT -> Zergling"]}
+    )
+    llm = create_llm(graph, fulltext_index_available=False)
+
+    graph_data = asyncio.run(llm._lookup_graph_data(["zerg", "ling"], 5, False))
+
+    assert graph_data == {"zerg": ["Zerg - HAS_UNIT -> Zergling"], "ling": list()}
+    assert graph.lookups == [("contains", ["zerg", "ling"], 5)]
+
+
+def test_cached_lookup_is_sliced_to_smaller_limits():
+    graph = StandInGraph(
+        fulltext_rows={
+            "zerg": [f"Zerg - HAS_UNIT -> Unit {idx}" for idx in range(10)],
+            "larva": ["Zergling - MORPHS_FROM -> Larva"],
+        },
+        contains_rows=dict(),
+    )
+    llm = create_llm(graph, fulltext_index_available=True)
+    llm.graph_query_cache = GraphQueryCache()
+
+    async def run():
+        return [
+            await llm._query_graph_data(["zerg", "larva"], limit)
+            for limit in (4, 2, 10, 6)
+        ]
+
+    results = asyncio.run(run())
+
+    assert [len(graph_data["zerg"]) for graph_data in results] == [2, 1, 5, 3]
+    assert all(
+        graph_data["zerg"] == graph.fulltext_rows["zerg"][: len(graph_data["zerg"])]
+        for graph_data in results
+    )
+    assert all(
+        graph_data["larva"] == graph.fulltext_rows["larva"] for graph_data in results
+    )
+    # Smaller limits are slices of the cached rows. 'larva' has fewer rows than any limit, so it is looked up once
+    assert graph.lookups == [
+        ("fulltext", ["zerg", "larva"], 2),
+        ("fulltext", ["zerg"], 5),
+    ]
+
+
+@pytest.mark.parametrize(
+    "limit, expected_keyword_limit",
+    [(10, 4), (3, 1), (1, 1)],
+    ids=["ceiling", "exact", "fewer rows than keywords"],
+)
+def test_keywords_share_the_limit_in_one_round_trip(limit, expected_keyword_limit):
+    graph = StandInGraph(
+        fulltext_rows={
+            keyword: [f"{keyword} - RELATED_TO -> Node {idx}" for idx in range(10)]
+            for keyword in ("unit", "text", "region")
+        },
+        contains_rows=dict(),
+    )
+    llm = create_llm(graph, fulltext_index_available=True)
+
+    graph_data = asyncio.run(
+        llm._query_graph_data(["Unit", " unit ", "text", "", "region"], limit)
+    )
+
+    # Keywords are normalized, and each distinct keyword gets its own share of the limit in the same query
+    assert graph.lookups == [
+        ("fulltext", ["unit", "text", "region"], expected_keyword_limit)
+    ]
+    assert list(graph_data) == ["unit", "text", "region"]
+    assert all(
+        outputs == graph.fulltext_rows[keyword][:expected_keyword_limit]
+        for keyword, outputs in graph_data.items()
+    )
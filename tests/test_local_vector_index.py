@@ -0,0 +1,183 @@
+"""
+Check the snapshots, compact matrices and hybrid ranking of the local vector index.
+
+No Neo4j database or embedding model is used. The documents are random unit embeddings with a fixed seed.
+
+uv run python -m pytest tests/test_local_vector_index.py
+"""
+
+# Third-party Library imports
+import numpy as np
+import pytest
+from langchain_core.embeddings import FakeEmbeddings
+
+# Custom Library imports
+from sc2editor.llm.local_vector_index import LocalVectorIndex, reciprocal_rank_fusion
+
+
+DOCUMENT_COUNT = 500
+DIMENSION = 64
+QUERY_COUNT = 20
+
+
+@pytest.fixture
+def documents():
+    rng = np.random.default_rng(7)
+    embeddings = rng.standard_normal((DOCUMENT_COUNT, DIMENSION)).astype(np.float32)
+    texts = [f"document {idx}" for idx in range(DOCUMENT_COUNT)]
+    metadatas = [{"source": f"page-{idx}"} for idx in range(DOCUMENT_COUNT)]
+    queries = rng.standard_normal((QUERY_COUNT, DIMENSION)).astype(np.float32)
+
+    return texts, metadatas, embeddings, queries
+
+
+def create_index(**kwargs) -> LocalVectorIndex:
+    return LocalVectorIndex(embedding=FakeEmbeddings(size=DIMENSION), **kwargs)
+
+
+def test_snapshot_round_trip(documents, tmp_path):
+    texts, metadatas, embeddings, queries = documents
+    saved = create_index()
+    saved.load(texts, metadatas, embeddings, version=3, snapshot_dir=tmp_path)
+
+    loaded = create_index()
+    assert loaded.load_snapshot(tmp_path, version=3, document_count=DOCUMENT_COUNT)
+
+    assert len(loaded) == DOCUMENT_COUNT
+    assert loaded.version == 3
+    for expected, actual in zip(
+        saved.search_by_vectors(queries, k=5), loaded.search_by_vectors(queries, k=5)
+    ):
+        np.testing.assert_array_equal(expected, actual)
+    # The temporary files were renamed to the snapshot files
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "documents.f32",
+        "documents.json",
+    ]
+
+
+@pytest.mark.parametrize(
+    "version, document_count",
+    [(4, DOCUMENT_COUNT), (3, DOCUMENT_COUNT + 1)],
+    ids=["other version", "other document count"],
+)
+def test_snapshot_of_another_graph_is_not_loaded(
+    documents, tmp_path, version, document_count
+):
+    texts, metadatas, embeddings, _ = documents
+    create_index().load(texts, metadatas, embeddings, version=3, snapshot_dir=tmp_path)
+
+    index = create_index()
+    assert not index.load_snapshot(
+        tmp_path, version=version, document_count=document_count
+    )
+    assert len(index) == 0
+
+
+def test_documents_have_the_page_content_of_the_neo4j_vector_store(documents):
+    texts, metadatas, embeddings, _ = documents
+    index = create_index()
+    index.load(texts, metadatas, embeddings)
+
+    document, score = index.similarity_search_with_score_by_vectors(
+        [embeddings[42]], k=1
+    )[0][0]
+
+    assert document.page_content == "\ntext: document 42"
+    assert document.metadata == {"source": "page-42"}
+    assert score == pytest.approx(1.0)
+
+
+def exact_top_k(
+    embeddings: np.ndarray, queries: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    similarities = queries @ embeddings.T
+    indices = np.argsort(-similarities, axis=1, kind="stable")[:, :k]
+
+    return indices, np.take_along_axis(similarities, indices, axis=1)
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_rescored_compact_matrix_finds_the_float32_top_k(documents, precision):
+    texts, metadatas, embeddings, queries = documents
+    index = create_index(precision=precision, rescore_factor=4)
+    index.load(texts, metadatas, embeddings)
+
+    indices, similarities = index.search_by_vectors(queries, k=5)
+    expected_indices, expected_similarities = exact_top_k(embeddings, queries, k=5)
+
+    np.testing.assert_array_equal(indices, expected_indices)
+    # Rescored similarities come from the full-precision embeddings
+    np.testing.assert_allclose(similarities, expected_similarities, atol=1e-5)
+    assert index.memory_usage()["search_matrix_bytes"] < embeddings.nbytes
+
+
+def test_truncated_dimensions_are_renormalized(documents):
+    texts, metadatas, embeddings, queries = documents
+    index = create_index(dimensions=16)
+    index.load(texts, metadatas, embeddings)
+
+    indices, similarities = index.search_by_vectors(queries, k=5)
+    expected_indices, expected_similarities = exact_top_k(
+        embeddings[:, :16], queries[:, :16], k=5
+    )
+
+    # Without rescoring, the similarities are cosine similarities of the truncated embeddings
+    np.testing.assert_array_equal(indices, expected_indices)
+    np.testing.assert_allclose(similarities, expected_similarities, atol=1e-5)
+    assert index.memory_usage()["search_matrix_bytes"] == DOCUMENT_COUNT * 16 * 4
+
+
+@pytest.mark.parametrize(
+    "rankings, weights, expected_order, expected_best_score",
+    [
+        # Documents found by both rankings come first
+        ([[0, 1, 2], [2, 0, 3]], [1.0, 1.0], [0, 2, 1, 3], 1 / 61 + 1 / 62),
+        # Equal scores keep the order of the first ranking
+        ([[0, 1], [1, 0]], [1.0, 1.0], [0, 1], 1 / 61 + 1 / 62),
+        # A heavier ranking decides the order
+        ([[0, 1], [1, 0]], [1.0, 2.0], [1, 0], 1 / 62 + 2 / 61),
+    ],
+    ids=["found by both", "tie", "weighted"],
+)
+def test_reciprocal_rank_fusion_order(
+    rankings, weights, expected_order, expected_best_score
+):
+    indices, scores = reciprocal_rank_fusion(
+        [np.array(ranking) for ranking in rankings], weights, k=60
+    )
+
+    assert indices.tolist() == expected_order
+    assert scores.tolist() == sorted(scores.tolist(), reverse=True)
+    assert scores[0] == pytest.approx(expected_best_score)
+
+
+def test_hybrid_search_promotes_keyword_matches(documents, tmp_path):
+    texts, metadatas, embeddings, queries = documents
+    texts = list(texts)
+    texts[123] = "The Zergling morphs from a larva"
+    index = create_index(search_type="hybrid")
+    index.load(texts, metadatas, embeddings, version=1, snapshot_dir=tmp_path)
+
+    vector_indices, _ = index.search_by_vectors(queries[:1], k=5)
+    assert 123 not in vector_indices[0]
+    results = index.hybrid_search_with_score("zergling larva", queries[0], k=5)
+
+    # The only keyword match is fused into the vector ranking
+    assert "\ntext: The Zergling morphs from a larva" in [
+        document.page_content for document, _ in results
+    ]
+    assert results[0][1] == pytest.approx(1.0)
+
+    # The keyword index is saved with the snapshot and loaded back
+    loaded = create_index(search_type="hybrid")
+    assert loaded.load_snapshot(tmp_path, version=1, document_count=DOCUMENT_COUNT)
+    assert loaded.keyword_index is not None
+    assert [
+        document.page_content
+        for document, _ in loaded.hybrid_search_with_score(
+            "zergling larva", queries[0], k=5
+        )
+    ] == [document.page_content for document, _ in results]
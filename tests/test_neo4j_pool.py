@@ -0,0 +1,122 @@
+"""
+Check the connection slots and statistics of the monitored Neo4j drivers.
+
+No Neo4j database is used. Stand-in drivers answer every query after a fixed delay.
+
+uv run python -m pytest tests/test_neo4j_pool.py
+"""
+
+# Python Standard Library imports
+import time
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party Library imports
+import pytest
+from neo4j.exceptions import ClientError
+
+# Custom Library imports
+from sc2editor.llm.neo4j_pool import MonitoredAsyncDriver, MonitoredDriver, PoolMonitor
+
+
+MAX_SIZE = 2
+QUERY_SECONDS = 0.1
+
+
+class StandInDriver:
+    """Stand-in for the synchronous Neo4j driver that records how many queries run at the same time."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.closed = False
+
+    def execute_query(self, query: str):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        time.sleep(QUERY_SECONDS)
+        self.running -= 1
+        return query
+
+    @contextmanager
+    def session(self, **config):
+        yield config
+
+    def close(self):
+        self.closed = True
+
+
+class StandInAsyncDriver(StandInDriver):
+    """Stand-in for the async Neo4j driver."""
+
+    async def execute_query(self, query: str):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(QUERY_SECONDS)
+        self.running -= 1
+        return query
+
+    @asynccontextmanager
+    async def session(self, **config):
+        yield config
+
+
+def test_queries_wait_for_a_connection_slot():
+    stand_in = StandInDriver()
+    driver = MonitoredDriver(stand_in, PoolMonitor(MAX_SIZE, acquisition_timeout=5))
+
+    with ThreadPoolExecutor(max_workers=2 * MAX_SIZE) as executor:
+        results = list(executor.map(driver.execute_query, ["a", "b", "c", "d"]))
+    with driver.session(database="neo4j") as session:
+        assert session == {"database": "neo4j"}
+        assert driver.monitor.in_use == 1
+    driver.close()
+
+    stats = driver.monitor.stats()
+    assert results == ["a", "b", "c", "d"]
+    assert stand_in.max_running == MAX_SIZE
+    assert stand_in.closed
+    assert stats["in_use"] == 0
+    assert stats["acquisition_ms"]["count"] == 5
+    # Two of the queries waited for the first two to finish
+    assert stats["acquisition_ms"]["max"] >= QUERY_SECONDS * 1000 * 0.8
+
+
+def test_async_queries_wait_for_a_connection_slot():
+    async def run():
+        stand_in = StandInAsyncDriver()
+        driver = MonitoredAsyncDriver(
+            stand_in, PoolMonitor(MAX_SIZE, acquisition_timeout=5)
+        )
+        results = await asyncio.gather(
+            *(driver.execute_query(query) for query in ["a", "b", "c", "d"])
+        )
+        async with driver.session(database="neo4j") as session:
+            assert session == {"database": "neo4j"}
+
+        return stand_in, driver.monitor.stats(), results
+
+    stand_in, stats, results = asyncio.run(run())
+
+    assert results == ["a", "b", "c", "d"]
+    assert stand_in.max_running == MAX_SIZE
+    assert stats["in_use"] == 0
+    assert stats["acquisition_ms"]["max"] >= QUERY_SECONDS * 1000 * 0.8
+
+
+def test_acquisition_timeout_raises_the_driver_error():
+    async def run():
+        driver = MonitoredAsyncDriver(
+            StandInAsyncDriver(), PoolMonitor(1, acquisition_timeout=QUERY_SECONDS / 4)
+        )
+        return driver.monitor, await asyncio.gather(
+            driver.execute_query("a"), driver.execute_query("b"), return_exceptions=True
+        )
+
+    monitor, (first, second) = asyncio.run(run())
+
+    assert first == "a"
+    assert isinstance(second, ClientError)
+    assert monitor.stats()["acquisition_errors"] == 1
+    assert monitor.stats()["utilisation"] == pytest.approx(0.0)
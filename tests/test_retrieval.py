@@ -0,0 +1,189 @@
+"""
+Check the retrieval flow of the graph: the prefetched first vector search, the queries of later attempts and
+the retrieval legs that fail or time out.
+
+No Neo4j database or Gemini API is used. The Cypher query, vector search and LLM chains are replaced with local stand-ins.
+
+uv run python -m pytest tests/test_retrieval.py
+"""
+
+# Python Standard Library imports
+import os
+import time
+import asyncio
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Third-party Library imports
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+# Gemini chat models are only created, never called
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+# Custom Library imports
+from sc2editor.llm import SC2EditorLLM  # noqa: E402
+
+
+PROMPT = "How do I show a text when a unit is selected?"
+
+
+class StandInGraph:
+    """Stand-in for Neo4jGraph that answers every keyword with one row, optionally after a delay or with an error."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+
+    def query(self, query: str, params: dict[str, Any] | None = None):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        keywords = [el["keyword"] for el in (params or dict()).get("keywords", list())]
+        return [
+            {"keyword": keyword, "outputs": [f"{keyword} - RELATED_TO -> Trigger"]}
+            for keyword in keywords
+        ]
+
+    def close(self):
+        pass
+
+
+class RecordingRetriever:
+    """Stand-in for the Neo4jVector retriever that records its queries, optionally answering after a delay or with an error."""
+
+    def __init__(self, delay: float = 0.0, error: Exception | None = None):
+        self.delay = delay
+        self.error = error
+        self.queries = list()
+
+    async def ainvoke(self, query: str, *args, **kwargs):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [Document(page_content=f"\ntext: Found with {query}")]
+
+
+def create_llm(
+    graph: StandInGraph | None = None,
+    retriever: RecordingRetriever | None = None,
+    **kwargs,
+) -> SC2EditorLLM:
+    """Create an SC2EditorLLM whose components are local stand-ins, and whose answers are judged insufficient"""
+    llm = SC2EditorLLM(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_username="neo4j",
+        neo4j_password="password",
+        model="gemini-2.0-flash",
+        embedding="models/text-embedding-004",
+        graph_query_backend="executor",
+        graph_version_check_interval=3600,
+        auto_initialize=False,
+        **kwargs,
+    )
+
+    # Replace what initialize() would create by connecting to Neo4j
+    llm.neo4j_graph = graph or StandInGraph()
+    llm._graph_query_executor = ThreadPoolExecutor(max_workers=1)
+    llm._graph_query_semaphore = asyncio.Semaphore(1)
+    llm.node_count = llm.relationship_count = 100
+    llm.vector_retriever = retriever or RecordingRetriever()
+    llm.builder = llm._create_graph()
+    llm.graph = llm.builder.compile(checkpointer=llm.checkpointer)
+    llm._is_initialized = True
+
+    # Replace Gemini chains
+    llm.retriever_query_calls = list()
+
+    def write_retriever_query(inputs: dict[str, Any]) -> AIMessage:
+        llm.retriever_query_calls.append(inputs)
+        return AIMessage(f"query {len(llm.retriever_query_calls)}")
+
+    llm._router_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(prompt_status="allow")
+    )
+    llm._entity_extract_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(keywords=["unit", "text"])
+    )
+    llm._retriever_query_node_chain = RunnableLambda(write_retriever_query)
+    llm._context_cleanup_node_chain = RunnableLambda(
+        lambda inputs: AIMessage(inputs["context"])
+    )
+    llm._answer_judgment_node_chain = RunnableLambda(
+        lambda _: SimpleNamespace(answer_status="no")
+    )
+    llm._answer_node_chain = RunnableLambda(lambda _: AIMessage("answer"))
+
+    return llm
+
+
+def run_graph(llm: SC2EditorLLM) -> dict[str, Any]:
+    """Run the graph on the prompt and return its final state"""
+    return asyncio.run(
+        llm.graph.ainvoke(
+            {"messages": [HumanMessage(PROMPT)]},
+            {"configurable": {"thread_id": "retrieval"}},
+        )
+    )
+
+
+def test_prefetched_first_attempt_does_not_write_a_query():
+    llm = create_llm(
+        front_end_mode="speculative",
+        speculative_vector_search=True,
+        maximum_retriever_attempts=2,
+    )
+
+    run_graph(llm)
+
+    # The first attempt uses the search prefetched with the prompt, only the second one writes a query
+    assert llm.vector_retriever.queries == [PROMPT, "query 1"]
+    assert len(llm.retriever_query_calls) == 1
+
+
+def test_every_attempt_writes_a_query_without_prefetch():
+    llm = create_llm(front_end_mode="speculative", maximum_retriever_attempts=2)
+
+    run_graph(llm)
+
+    assert llm.vector_retriever.queries == ["query 1", "query 2"]
+    assert len(llm.retriever_query_calls) == 2
+
+
+@pytest.mark.parametrize(
+    "failing_leg, failure",
+    [
+        ("graph", dict(delay=0.5)),
+        ("graph", dict(error=RuntimeError("connection lost"))),
+        ("vector", dict(delay=0.5)),
+        ("vector", dict(error=RuntimeError("connection lost"))),
+    ],
+    ids=["graph timeout", "graph error", "vector timeout", "vector error"],
+)
+def test_failed_leg_is_replaced_with_a_notice(failing_leg, failure):
+    llm = create_llm(
+        graph=StandInGraph(**failure) if failing_leg == "graph" else None,
+        retriever=RecordingRetriever(**failure) if failing_leg == "vector" else None,
+        front_end_mode="speculative",
+        maximum_retriever_attempts=1,
+        graph_retrieval_timeout=0.1,
+        vector_retrieval_timeout=0.1,
+    )
+
+    state = run_graph(llm)
+
+    # The failed leg is explained in the context, and the other leg still returns its data
+    notice = f"The {failing_leg} data could not be retrieved for this attempt."
+    graph_data = "unit - RELATED_TO -> Trigger"
+    vector_data = "Found with query 1"
+    assert notice in state["context"]
+    if failing_leg == "graph":
+        assert state["graph_context"] == notice
+        assert vector_data in state["vector_context"]
+    else:
+        assert state["vector_context"] == notice
+        assert graph_data in state["graph_context"]